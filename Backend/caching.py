@@ -0,0 +1,151 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import hashlib, json, os, threading, time
+
+def content_key(*parts: Any) -> str:
+    """Stable sha256 over JSON-serialisable parts (dict key order does not matter)."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TTLCache:
+    """In-memory LRU cache with per-entry TTL and an approximate byte budget."""
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, max_entries: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0], now - entry[1]
+
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        if ttl_seconds <= 0:
+            return
+        size = len(json.dumps(value, ensure_ascii=False, default=str))
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, now, now + ttl_seconds, size)
+            self._bytes += size
+            while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_entries):
+                self._drop(next(iter(self._data)))
+
+    def resize(self, max_bytes: int) -> None:
+        """Change the byte budget, evicting least recently used entries above a smaller one."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._data and self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key: str) -> None:
+        _, _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+class DiskCache:
+    """Persistent JSON cache, one file per key, evicting least recently used files above max_bytes.
+
+    Sizes and access order live in an in-memory LRU index with a running byte
+    total, so get and put do not touch the rest of the directory. The directory
+    is scanned at startup, seeding the order from file mtimes (which get keeps
+    current), and again when its mtime shows that another process (e.g. a
+    second uvicorn worker) added or removed files, so max_bytes holds for the
+    directory as a whole.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> file size, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        # Directory mtime after our own last change; anything else means another writer
+        self._dir_mtime: Optional[int] = None
+        self._scan()
+
+    def _dir_stamp(self) -> Optional[int]:
+        try:
+            return self.directory.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self) -> None:
+        self._index.clear()
+        self._bytes = 0
+        self._dir_mtime = self._dir_stamp()
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(files):
+            self._index[key] = size
+            self._bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self._dir_stamp() != self._dir_mtime:
+                self._scan()
+            path = self._path(key)
+            # Per process, so two workers writing the same key do not share a temp file
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._evict()
+            self._dir_mtime = self._dir_stamp()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
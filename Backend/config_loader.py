@@ -1,13 +1,17 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Mapping
-import os, re
+from typing import Any, Mapping, Optional
+import os, re, threading, time
 
 try:
     import yaml
 except Exception:
     yaml = None
 
+# Seconds between mtime checks of the config file; reads in between are a plain attribute lookup.
+RELOAD_CHECK_INTERVAL_S = float(os.getenv("RESEARCH_CONFIG_CHECK_S", "1.0"))
+
 def _default_path() -> Path:
     env_path = os.getenv("RESEARCH_CONFIG", "").strip()
     if env_path:
@@ -44,4 +48,88 @@ def load_config(path: Path | None = None) -> Mapping[str, Any]:
             "env": {}
         }
     data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    return _expand_env_value(data)
\ No newline at end of file
+    return _expand_env_value(data)
+
+class FrozenDict(dict):
+    """Read-only dict; stays a dict so json.dumps and ``{**cfg}`` keep working."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config is read-only")
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+_SECTIONS = ("providers", "investment_profile", "research_policy", "routing", "logging", "env")
+
+def _validate(data: Any) -> None:
+    if not isinstance(data, dict):
+        raise ValueError("config root must be a mapping")
+    for section in _SECTIONS:
+        if section in data and data[section] is not None and not isinstance(data[section], dict):
+            raise ValueError(f"config section '{section}' must be a mapping")
+    for name, prov in (data.get("providers") or {}).items():
+        if not isinstance(prov, dict):
+            raise ValueError(f"provider '{name}' must be a mapping")
+        for key in ("timeout_seconds", "max_output_tokens", "retries", "backoff_ms"):
+            if key in prov and not isinstance(prov[key], (int, float)):
+                raise ValueError(f"providers.{name}.{key} must be a number")
+    bounds = (data.get("research_policy") or {}).get("risk_bounds")
+    if bounds is not None and (not isinstance(bounds, list) or len(bounds) != 2):
+        raise ValueError("research_policy.risk_bounds must be [min, max]")
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    version: int
+    path: Path
+    mtime: Optional[float]
+    data: Mapping[str, Any]
+
+_lock = threading.Lock()
+_snapshot: Optional[ConfigSnapshot] = None
+_next_check = 0.0
+
+def _file_mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+def get_config_snapshot(force_check: bool = False) -> ConfigSnapshot:
+    """Return the process-wide config, re-parsing only when the file changed."""
+    global _snapshot, _next_check
+    snap = _snapshot
+    now = time.monotonic()
+    if snap is not None and not force_check and now < _next_check:
+        return snap
+    with _lock:
+        snap = _snapshot
+        path = _default_path()
+        mtime = _file_mtime(path)
+        if snap is None or snap.path != path or snap.mtime != mtime:
+            try:
+                data = load_config(path)
+                _validate(data)
+                _snapshot = ConfigSnapshot(version=(snap.version + 1) if snap else 1,
+                                           path=path, mtime=mtime, data=_freeze(data))
+            except Exception as e:
+                if snap is None:
+                    raise
+                # Keep serving the last good config; retry once the file changes again.
+                print(f"Config reload failed, keeping version {snap.version}: {e}")
+                _snapshot = ConfigSnapshot(version=snap.version, path=path, mtime=mtime, data=snap.data)
+        _next_check = now + RELOAD_CHECK_INTERVAL_S
+        return _snapshot
+
+def get_config() -> Mapping[str, Any]:
+    """Cached, read-only config for request handlers."""
+    return get_config_snapshot().data
+
+def config_version() -> int:
+    """Monotonic counter bumped on every successful reload; use it to invalidate derived caches."""
+    return get_config_snapshot().version
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+import asyncio, time
+
+T = TypeVar("T")
+
+async def race(starters: Sequence[Tuple[str, Callable[[], Awaitable[T]]]], hedge_delay_s: float,
+               accept: Callable[[T], bool]) -> Tuple[Optional[str], Optional[T], Dict[str, Any]]:
+    """Run starters as a hedged race and return (winner, result, meta).
+
+    The first starter runs immediately; the next one is launched once
+    hedge_delay_s passes without an accepted result, or as soon as a running
+    attempt finishes with a rejected one. The first accepted result wins and
+    every other attempt is cancelled. If nothing is accepted, the last
+    finished result is returned with winner None.
+    """
+    t0 = time.perf_counter()
+    queue = list(starters)
+    running: Dict[asyncio.Task, Tuple[str, float]] = {}
+    launched: List[str] = []
+    last: Optional[T] = None
+    accepted: Optional[T] = None
+    winner: Optional[str] = None
+    hedge_fired_ms: Optional[float] = None
+
+    def launch() -> None:
+        nonlocal hedge_fired_ms
+        name, start = queue.pop(0)
+        if launched and hedge_fired_ms is None:
+            hedge_fired_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+        launched.append(name)
+        running[asyncio.ensure_future(start())] = (name, time.perf_counter())
+
+    launch()
+    try:
+        while running:
+            timeout = max(0.0, hedge_delay_s) if queue else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            rejected = False
+            for task in done:
+                name, _ = running.pop(task)
+                if winner is not None:
+                    continue
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"Race attempt {name} raised: {e}")
+                    rejected = True
+                    continue
+                if accept(result):
+                    winner, accepted = name, result
+                else:
+                    last, rejected = result, True
+            if winner is not None:
+                break
+            if rejected and queue:
+                launch()
+    finally:
+        now = time.perf_counter()
+        # Time the losing attempts were in flight; a proxy for the tokens the hedge cost
+        overhead_ms = sum((now - started) * 1000.0 for _, started in running.values())
+        for task in running:
+            task.cancel()
+
+    meta = {"mode": "race", "winner": winner, "launched": launched,
+            "hedge_delay_ms": round(hedge_delay_s * 1000.0, 2), "hedge_fired_ms": hedge_fired_ms,
+            "cancelled": [name for name, _ in running.values()],
+            "hedge_overhead_ms": round(overhead_ms, 2)}
+    return winner, (accepted if winner is not None else last), meta
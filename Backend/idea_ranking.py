@@ -0,0 +1,61 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Tuple
+import re
+
+_DIGIT = re.compile(r"\d")
+_SPACE = re.compile(r"\s+")
+_EXIT_TERMS = ("stop", "take-profit", "take profit", "tp", "sl", "trailing")
+# Defaults idea_from_text fills in when the model left a field out
+_FILLERS = {"thesis": "No thesis", "entry_rule": "Market BUY", "exit_rule": "Zeit-Exit 60min"}
+
+def _norm(text: Any) -> str:
+    return _SPACE.sub(" ", str(text or "")).strip().lower()
+
+def score_idea(idea: Mapping[str, Any], request: Mapping[str, Any], cfg: Mapping[str, Any]) -> float:
+    """Local quality score for one candidate; higher is better.
+
+    Rewards ideas that match the requested risk, stay within the budget,
+    give concrete (numeric) entry/exit rules and a catalyst, and fit the
+    investment profile's keywords.
+    """
+    score = 0.0
+    try:
+        score -= abs(int(idea.get("risk")) - int(request.get("risk")))
+    except (TypeError, ValueError):
+        score -= 2.0
+    try:
+        budget, wanted = float(idea.get("budget_sol")), float(request.get("budget_sol"))
+        score -= 2.0 * min(1.0, max(0.0, budget - wanted) / wanted)
+    except (TypeError, ValueError, ZeroDivisionError):
+        pass
+
+    entry, exit_rule = str(idea.get("entry_rule") or ""), str(idea.get("exit_rule") or "")
+    score += 1.0 if _DIGIT.search(entry) else 0.0
+    score += 1.0 if _DIGIT.search(exit_rule) else 0.0
+    score += 0.5 if any(term in exit_rule.lower() for term in _EXIT_TERMS) else 0.0
+    score += 0.5 if idea.get("expected_catalyst") else 0.0
+    score += min(1.0, len(str(idea.get("thesis") or "").split()) / 30.0)
+    score -= sum(1.0 for key, filler in _FILLERS.items() if idea.get(key) == filler)
+
+    profile = cfg.get("investment_profile") or {}
+    text = f"{idea.get('asset', '')} {idea.get('thesis', '')} {entry} {exit_rule}".lower()
+    if any(str(k).lower() in text for k in profile.get("include_keywords") or []):
+        score += 0.5
+    if any(str(k).lower() in text for k in profile.get("exclude_keywords") or []):
+        score -= 3.0
+    return round(score, 3)
+
+def rank_ideas(ideas: List[Mapping[str, Any]], request: Mapping[str, Any], cfg: Mapping[str, Any]) -> List[Tuple[float, Mapping[str, Any]]]:
+    """(score, idea) best first; near-identical candidates (same asset and rules, or same thesis) keep only their best."""
+    scored = sorted(((score_idea(idea, request, cfg), i, idea) for i, idea in enumerate(ideas)), key=lambda s: (-s[0], s[1]))
+    seen = set()
+    ranked: List[Tuple[float, Mapping[str, Any]]] = []
+    for score, _, idea in scored:
+        keys = {("setup", _norm(idea.get("asset")), _norm(idea.get("entry_rule")), _norm(idea.get("exit_rule")))}
+        if idea.get("thesis") != _FILLERS["thesis"]:
+            keys.add(("thesis", _norm(idea.get("thesis"))))
+        if keys & seen:
+            continue
+        seen |= keys
+        ranked.append((score, idea))
+    return ranked
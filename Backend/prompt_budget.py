@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import math, re
+from .services.tweet_dedup import dedupe_tweets
+
+try:
+    import tiktoken
+except Exception:
+    tiktoken = None  # type: ignore
+
+# Terms that make a tweet relevant for a Solana yield report; each hit adds to its score
+YIELD_TERMS = ("yield", "apy", "apr", "stake", "staking", "rewards", "farm", "liquidity", "lp", "vault",
+               "lend", "lending", "restak", "lst", "jitosol", "msol", "airdrop", "points", "defi", "tvl")
+
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[a-z0-9$#@]+")
+
+_encoder: Any = None
+
+def count_tokens(text: str) -> int:
+    """Local token count: tiktoken's cl100k_base when installed, else ~4 characters per token."""
+    global _encoder
+    if tiktoken is not None:
+        if _encoder is None:
+            try:
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoder = False
+        if _encoder:
+            return len(_encoder.encode(text))
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+def truncate_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    if tiktoken is not None and _encoder:
+        return _encoder.decode(_encoder.encode(text)[:max_tokens]).rstrip() + " …", True
+    return text[:max_tokens * 4].rstrip() + " …", True
+
+def relevance(tweet: Mapping[str, Any]) -> float:
+    """Yield-term hits weigh most; engagement (public_metrics) and near-duplicate count (dup_count) break ties."""
+    words = _WORD.findall(str(tweet.get("text", "")).lower())
+    hits = sum(1 for w in words if any(w.startswith(term) for term in YIELD_TERMS))
+    metrics = tweet.get("public_metrics") or {}
+    engagement = sum(int(metrics.get(k, 0) or 0) for k in ("like_count", "retweet_count", "reply_count", "quote_count"))
+    return hits * 2.0 + math.log1p(engagement) + math.log(max(1, int(tweet.get("dup_count", 1) or 1)))
+
+def build_tweet_block(tweets: Sequence[Mapping[str, Any]], budget_tokens: int,
+                      max_tokens_per_tweet: int = 120, dedup_threshold: float = 0.6) -> Tuple[str, Dict[str, Any]]:
+    """Render tweets for a prompt within ``budget_tokens``; returns (text, stats).
+
+    Near-duplicates are collapsed into one line with their count, each tweet is
+    cut to max_tokens_per_tweet, and the most relevant tweets are added until
+    the budget is used up.
+    """
+    non_empty = [t for t in tweets if str(t.get("text", "")).strip()]
+    unique, _ = dedupe_tweets(non_empty, dedup_threshold)
+
+    ranked = sorted(enumerate(unique), key=lambda it: (-relevance(it[1]), it[0]))
+    lines: List[str] = []
+    used, truncated = 0, 0
+    for _, tweet in ranked:
+        text, cut = truncate_tokens(_SPACE.sub(" ", str(tweet.get("text", "")).strip()), max_tokens_per_tweet)
+        copies = f", posted {tweet['dup_count']}x" if tweet["dup_count"] > 1 else ""
+        line = f"Tweet {len(lines) + 1}: {text} (Created: {tweet.get('created_at', '')}{copies})"
+        cost = count_tokens(line) + 1
+        if used + cost > budget_tokens:
+            continue
+        lines.append(line)
+        used += cost
+        truncated += int(cut)
+
+    stats = {"tweets_total": len(tweets), "tweets_included": len(lines),
+             "tweets_dropped": len(tweets) - len(lines), "dropped_empty": len(tweets) - len(non_empty),
+             "dropped_duplicates": len(non_empty) - len(unique),
+             "dropped_over_budget": len(unique) - len(lines), "truncated": truncated,
+             "tweet_tokens": used, "budget_tokens": budget_tokens,
+             "tokenizer": "tiktoken" if tiktoken is not None and _encoder else "chars/4"}
+    return "\n".join(lines), stats
+
+def chunk_text(text: str, chunk_tokens: int, max_chunks: int = 8) -> List[str]:
+    """Split text into at most max_chunks pieces of about chunk_tokens, preferring paragraph breaks."""
+    total = count_tokens(text)
+    if max_chunks > 0 and total > chunk_tokens * max_chunks:
+        chunk_tokens = math.ceil(total / max_chunks)
+    pieces: List[str] = []
+    for para in re.split(r"\n\s*\n", text):
+        while count_tokens(para) > chunk_tokens:
+            # Oversized paragraph: cut at the last line break inside the limit, else hard
+            limit = chunk_tokens * 4
+            cut = para.rfind("\n", 0, limit)
+            cut = cut if cut > limit // 2 else limit
+            pieces.append(para[:cut])
+            para = para[cut:].lstrip("\n")
+        if para.strip():
+            pieces.append(para)
+
+    costs = [count_tokens(piece) for piece in pieces]
+    while True:
+        chunks: List[str] = []
+        current: List[str] = []
+        used = 0
+        for piece, cost in zip(pieces, costs):
+            if current and used + cost > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+        if current:
+            chunks.append("\n\n".join(current))
+        # Packing whole paragraphs can overshoot max_chunks; grow the chunks until it fits
+        if max_chunks <= 0 or len(chunks) <= max_chunks:
+            return chunks
+        chunk_tokens = math.ceil(chunk_tokens * 1.25)
+
+def prompt_budget(cfg: Mapping[str, Any]) -> Tuple[int, int]:
+    """(input token budget for tweets, per-tweet cap) from yield_report: in the config."""
+    yr = cfg.get("yield_report") or {}
+    return int(yr.get("input_token_budget", 6000)), int(yr.get("max_tokens_per_tweet", 120))
@@ -0,0 +1,73 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import math, random, threading
+
+class _Window:
+    """Rolling figures for one (provider, model): EWMA latency/error rate and a sample window for p95."""
+
+    def __init__(self, samples: int):
+        self.ewma_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.latencies: Deque[float] = deque(maxlen=samples)
+
+    def p95_ms(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+class ProviderStats:
+    """Per provider/model latency and error tracking used to order the auto-mode chain.
+
+    The score is the expected time to a valid answer: the EWMA latency plus
+    error_rate x error_penalty_ms (a failed attempt costs about a timeout, even
+    when it fails fast), inflated by the chance of having to try again,
+    1 / (1 - error_rate). Providers without samples score 0 so they get measured first.
+    """
+
+    def __init__(self, alpha: float = 0.2, samples: int = 100, error_penalty_ms: float = 30000.0):
+        self.alpha = alpha
+        self.error_penalty_ms = error_penalty_ms
+        self.samples = samples
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            w = self._windows.get((provider, model))
+            if w is None:
+                w = self._windows[(provider, model)] = _Window(self.samples)
+            w.calls += 1
+            w.latencies.append(latency_ms)
+            w.ewma_ms = latency_ms if w.ewma_ms is None else (1 - self.alpha) * w.ewma_ms + self.alpha * latency_ms
+            w.error_rate = (1 - self.alpha) * w.error_rate + self.alpha * (0.0 if ok else 1.0)
+
+    def score(self, provider: str, model: str) -> float:
+        w = self._windows.get((provider, model))
+        if w is None or w.ewma_ms is None:
+            return 0.0
+        return (w.ewma_ms + w.error_rate * self.error_penalty_ms) / max(0.05, 1.0 - w.error_rate)
+
+    def order(self, candidates: Sequence[Tuple[str, str]], explore_ratio: float = 0.0,
+              rng: Any = random) -> Tuple[List[str], bool]:
+        """Provider names best-first for the given (provider, model) pairs; returns (order, explored).
+
+        With probability explore_ratio a random non-best provider is moved to
+        the front so the others keep getting fresh samples.
+        """
+        ranked = [name for name, _ in sorted(candidates, key=lambda c: self.score(*c))]
+        if len(ranked) > 1 and explore_ratio > 0 and rng.random() < explore_ratio:
+            pick = ranked.pop(rng.randrange(1, len(ranked)))
+            return [pick] + ranked, True
+        return ranked, False
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {f"{provider}/{model}": {"calls": w.calls,
+                                            "ewma_ms": round(w.ewma_ms, 1) if w.ewma_ms is not None else None,
+                                            "p95_ms": round(w.p95_ms(), 1) if w.latencies else None,
+                                            "error_rate": round(w.error_rate, 3),
+                                            "score_ms": round(self.score(provider, model), 1)}
+                    for (provider, model), w in self._windows.items()}
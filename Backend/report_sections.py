@@ -0,0 +1,71 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import hashlib, re
+
+from .prompt_budget import truncate_tokens
+
+# Markdown headings, numbered headings ("2. Risks") and all-caps label lines ("RISK ASSESSMENT:")
+_HEADING = re.compile(r"^(#{1,6}\s+\S.*|\d{1,2}[.)]\s+\S.{0,80}|[A-Z][A-Z0-9 &/()-]{2,60}:?)\s*$")
+_SPACE = re.compile(r"\s+")
+
+def split_sections(text: str) -> List[str]:
+    """Split a report at its headings; reports without at least two headings split at blank lines."""
+    lines = text.splitlines()
+    starts = [i for i, line in enumerate(lines) if _HEADING.match(line.strip())]
+    if len(starts) < 2:
+        return [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(lines)]
+    sections = ["\n".join(lines[a:b]).strip() for a, b in zip(bounds, bounds[1:])]
+    return [s for s in sections if s]
+
+def section_fingerprint(section: str) -> str:
+    """Whitespace-only edits do not count as changes."""
+    return hashlib.sha1(_SPACE.sub(" ", section).strip().encode("utf-8")).hexdigest()
+
+def diff_sections(previous: Sequence[str], sections: Sequence[str]) -> Tuple[List[int], int]:
+    """Compare against the fingerprints of the last analyzed version; returns (indices of changed or new sections, removed count).
+
+    Sections are matched by content, so moving a section around is not a change. Old sections
+    without a match count as removed only beyond the changed ones, which are taken to be their edits.
+    """
+    old = set(previous)
+    current = [section_fingerprint(s) for s in sections]
+    changed = [i for i, fp in enumerate(current) if fp not in old]
+    removed = max(0, len(old - set(current)) - len(changed))
+    return changed, removed
+
+def incremental_prompt(sections: Sequence[str], changed: Sequence[int], removed: int,
+                       prior_analysis: str, summary_tokens: int) -> str:
+    """Report content for a re-analysis: the prior analysis (capped) and only the changed sections."""
+    summary, _ = truncate_tokens(prior_analysis.strip(), summary_tokens)
+    parts = [f"PRIOR ANALYSIS (of the previous version of this report):\n{summary}",
+             f"CHANGED SECTIONS ({len(changed)} of {len(sections)} sections changed or new"
+             f"{f', {removed} removed' if removed else ''}):"]
+    parts += [f"[Section {i + 1}]\n{sections[i]}" for i in changed]
+    return "\n\n".join(parts)
+
+def incremental_settings(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    analysis = cfg.get("analysis") or {}
+    return {"enabled": bool(analysis.get("incremental", True)),
+            "max_changed_ratio": float(analysis.get("incremental_max_changed_ratio", 0.5)),
+            "summary_tokens": int(analysis.get("incremental_summary_tokens", 1500))}
+
+def revision_record(sections: Sequence[str], analysis: str, source: str) -> Dict[str, Any]:
+    """What analyze_report keeps per report to re-analyze it incrementally next time."""
+    return {"fingerprints": [section_fingerprint(s) for s in sections], "analysis_result": analysis, "source": source}
+
+def plan_incremental(record: Optional[Mapping[str, Any]], sections: Sequence[str],
+                     cfg: Mapping[str, Any]) -> Optional[Tuple[List[int], int]]:
+    """(changed, removed) when an incremental re-analysis pays off, else None for a full analysis.
+
+    ([], 0) means only whitespace changed and the prior analysis still applies.
+    """
+    settings = incremental_settings(cfg)
+    if not settings["enabled"] or not record or not record.get("analysis_result") or not sections:
+        return None
+    changed, removed = diff_sections(record.get("fingerprints") or [], sections)
+    if len(changed) > settings["max_changed_ratio"] * len(sections):
+        return None
+    return changed, removed
@@ -1,22 +1,56 @@
 from __future__ import annotations
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Mapping, Any, Dict
-import datetime, time, re
+from typing import Optional, List, Mapping, Any, AsyncIterator, Awaitable, Callable, Dict, Tuple
+import asyncio, datetime, json, time, re
+from contextlib import asynccontextmanager
 from pathlib import Path
-from .config_loader import load_config
-from .services.llm_openai import call_openai_generate_with_meta, call_openai_analyze
-from .services.llm_grok import call_grok_generate_with_meta, call_grok_analyze
-from .services.twitter_x import recent_search
-
-router = APIRouter(prefix="/api/research", tags=["research"])
+from .caching import DiskCache, TTLCache, content_key
+from .config_loader import config_version, get_config
+from .hedging import race
+from .idea_ranking import rank_ideas
+from .prompt_budget import build_tweet_block, chunk_text, count_tokens, prompt_budget
+from .provider_stats import ProviderStats
+from .signal_prefetch import SignalSnapshot
+from .report_sections import incremental_prompt, incremental_settings, plan_incremental, revision_record, split_sections
+from .singleflight import SingleFlight
+from .services.http_clients import aclose_all
+from .services.deadline import deadline_scope, expired, remaining, share
+from .services.output_budget import output_key, output_scope, output_states
+from .services.rate_limit import RateLimited, current_priority, limiter_states, priority_scope, retry_after_header
+from .services.resilience import breaker_states, deadline_error, get_breaker
+from .services.llm_grok import acall_grok_generate, grok_resolution, aprobe_grok
+from .services.registry import get_provider, provider_names
+from .services.twitter_x import arecent_search
+from .services.tweet_store import store_states
+
+@asynccontextmanager
+async def _lifespan(app):
+    cfg = get_config()
+    probe = None
+    if (cfg.get("providers") or {}).get("grok", {}).get("probe_on_startup", False):
+        # Resolve the Grok endpoint/model pair off the request path
+        probe = asyncio.create_task(aprobe_grok(cfg))
+    # Twitter signals are refreshed on a schedule (idle while routing.use_twitter_signals is off); /idea only reads the snapshot
+    prefetch = asyncio.create_task(_signals.run())
+    yield
+    for task in (probe, prefetch):
+        if task is not None:
+            task.cancel()
+    await aclose_all()
+
+router = APIRouter(prefix="/api/research", tags=["research"], lifespan=_lifespan)
 
 class IdeaRequest(BaseModel):
     risk: int = Field(..., ge=1, le=5)
     budget_sol: float = Field(..., gt=0)
     universe: Optional[List[str]] = None
     constraints: Optional[str] = None
-    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', or 'auto'")
+    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', another configured provider, or 'auto'")
+    bypass_cache: bool = Field(False, description="Skip the idea cache and force a fresh provider call")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Overall time budget; defaults to deadlines.idea_ms, capped by deadlines.max_ms")
+    n: int = Field(1, ge=1, le=10, description="Candidates generated in one completion; payload is the best, candidates all of them ranked")
 
 class IdeaPayload(BaseModel):
     idea_id: str
@@ -38,6 +72,25 @@ class IdeaResponse(BaseModel):
     error: Optional[str] = None
     retries: Optional[int] = None
     duration_ms: Optional[float] = None
+    routing: Optional[Dict[str, Any]] = None
+    cache_hit: Optional[bool] = None
+    cache_age_s: Optional[float] = None
+    candidates: Optional[List[IdeaPayload]] = None
+    candidate_scores: Optional[List[float]] = None
+    retry_after: Optional[float] = None
+
+class IdeaBatchRequest(BaseModel):
+    requests: List[IdeaRequest] = Field(..., min_length=1, max_length=200)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description="Per-provider concurrency; defaults to providers.<name>.max_concurrency")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Time budget for the whole batch; each idea keeps its own deadline as well")
+
+class IdeaBatchResponse(BaseModel):
+    ok: bool
+    ts: str
+    count: int
+    results: List[IdeaResponse]
+    saved_filename: Optional[str] = None
+    duration_ms: Optional[float] = None
 
 class ReportInfo(BaseModel):
     filename: str
@@ -47,7 +100,9 @@ class ReportInfo(BaseModel):
 class AnalyzeReportRequest(BaseModel):
     filename: str
     instructions: str = Field(..., description="Analysis instructions")
-    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', or 'auto'")
+    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', another configured provider, or 'auto'")
+    bypass_cache: bool = Field(False, description="Skip the analysis cache and force a fresh provider call")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Overall time budget; defaults to deadlines.analysis_ms, capped by deadlines.max_ms")
 
 class AnalyzeReportResponse(BaseModel):
     ok: bool
@@ -58,6 +113,8 @@ class AnalyzeReportResponse(BaseModel):
     error: Optional[str] = None
     retries: Optional[int] = None
     duration_ms: Optional[float] = None
+    routing: Optional[Dict[str, Any]] = None
+    cache_hit: Optional[bool] = None
 
 class TwitterScrapeRequest(BaseModel):
     query: Optional[str] = Field("(yield OR staking OR rewards) (SOL OR Solana) -is:retweet lang:en", description="Twitter search query")
@@ -77,6 +134,7 @@ class TwitterScrapeResponse(BaseModel):
     ok: bool
     tweets: List[Dict[str, Any]]
     count: int
+    duplicates: int = 0    # near-identical tweets folded into the returned ones (see their dup_count)
     query: str
     ts: str
     error: Optional[str] = None
@@ -84,7 +142,8 @@ class TwitterScrapeResponse(BaseModel):
 class YieldReportRequest(BaseModel):
     twitter_data: List[Dict[str, Any]]
     analysis_instructions: str = Field(..., description="Instructions for yield analysis")
-    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', or 'auto'")
+    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', another configured provider, or 'auto'")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Overall time budget; defaults to deadlines.analysis_ms, capped by deadlines.max_ms")
 
 class YieldReportResponse(BaseModel):
     ok: bool
@@ -95,11 +154,15 @@ class YieldReportResponse(BaseModel):
     error: Optional[str] = None
     retries: Optional[int] = None
     duration_ms: Optional[float] = None
+    routing: Optional[Dict[str, Any]] = None
+    prompt_stats: Optional[Dict[str, Any]] = None
 
 class YieldAnalysisRequest(BaseModel):
     report_filename: str
     analysis_focus: str = Field("comprehensive", description="Analysis focus: 'comprehensive', 'risk', 'opportunity', 'technical'")
-    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', or 'auto'")
+    provider: Optional[str] = Field("auto", description="LLM provider: 'openai', 'grok', another configured provider, or 'auto'")
+    bypass_cache: bool = Field(False, description="Skip the analysis cache and force a fresh provider call")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Overall time budget; defaults to deadlines.analysis_ms, capped by deadlines.max_ms")
 
 class YieldAnalysisResponse(BaseModel):
     ok: bool
@@ -110,6 +173,8 @@ class YieldAnalysisResponse(BaseModel):
     error: Optional[str] = None
     retries: Optional[int] = None
     duration_ms: Optional[float] = None
+    routing: Optional[Dict[str, Any]] = None
+    cache_hit: Optional[bool] = None
 
 def _fallback_from_file(budget_sol: float, risk: int) -> Mapping[str, Any]:
     try:
@@ -123,152 +188,469 @@ def _fallback_from_file(budget_sol: float, risk: int) -> Mapping[str, Any]:
             "ttl_minutes":90,"expected_catalyst":"Fallback/Manuell"}
     return idea
 
-def _generate_idea_with_provider(req: IdeaRequest, cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
-    """Generate idea using specified provider with fallback logic."""
+_idea_cache = TTLCache()
+_signals = SignalSnapshot()
+
+_idea_cache_version: Optional[int] = None
+
+def _configured_idea_cache(cfg: Mapping[str, Any]) -> TTLCache:
+    """_idea_cache with the caching: settings of the current config, applied once per config version."""
+    global _idea_cache_version
+    version = config_version()
+    if _idea_cache_version != version:
+        _idea_cache_version = version
+        _idea_cache.resize(int((cfg.get("caching") or {}).get("idea_max_bytes", 4 * 1024 * 1024)))
+    return _idea_cache
+
+def _idea_cache_key(req: IdeaRequest, cfg: Mapping[str, Any]) -> str:
+    """Normalized request plus the window of the signal snapshot behind the digest, not the digest text.
+
+    The digest is rebuilt on every refresh; snapshots from the same
+    caching.idea_signal_bucket_seconds window share cached ideas.
+    """
+    request = _idea_request_dict(req, cfg)
+    request["universe"] = sorted({str(a).strip().upper() for a in request["universe"]})
+    request["constraints"] = " ".join(str(request["constraints"]).split())
+    cache_cfg = cfg.get("caching") or {}
+    bucket = _signals.digest_bucket(cfg, float(cache_cfg.get("idea_signal_bucket_seconds", cache_cfg.get("idea_ttl_seconds", 300))))
+    return content_key("idea", config_version(), request, bucket, (req.provider or "auto").lower(), req.n,
+                       cfg.get("investment_profile", {}), cfg.get("research_policy", {}))
+
+def _idea_cache_ttl(payload: IdeaPayload, cfg: Mapping[str, Any]) -> float:
+    """Cache TTL in seconds; never longer than the idea itself is valid."""
+    ttl = float((cfg.get("caching") or {}).get("idea_ttl_seconds", 300))
+    return min(ttl, payload.ttl_minutes * 60.0)
+
+_analysis_caches: Dict[Tuple[str, int], DiskCache] = {}
+
+def _analysis_cache(cfg: Mapping[str, Any]) -> Optional[DiskCache]:
+    """On-disk analysis cache shared by analyze_report and yield/analyze; None if disabled."""
+    cache_cfg = cfg.get("caching") or {}
+    if not cache_cfg.get("analysis_cache", True):
+        return None
+    directory = str(cache_cfg.get("analysis_dir", "Cache/analysis"))
+    max_bytes = int(cache_cfg.get("analysis_max_bytes", 50 * 1024 * 1024))
+    cache = _analysis_caches.get((directory, max_bytes))
+    if cache is None:
+        cache = _analysis_caches[(directory, max_bytes)] = DiskCache(Path(__file__).resolve().parent.parent / directory, max_bytes)
+    return cache
+
+def _analysis_cache_key(kind: str, report_content: str, instructions: str, provider: Optional[str], cfg: Mapping[str, Any]) -> str:
+    """Keyed on the requested provider and the set of providers that may answer, not the adaptive order,
+    which changes with latency stats and exploration draws."""
+    providers = cfg.get("providers") or {}
+    names = provider_names(cfg)
+    candidates = sorted(p for p in names if _provider_enabled(cfg, p) or p == provider)
+    models = [(name, providers.get(name, {}).get("model"), providers.get(name, {}).get("temperature"))
+              for name in candidates]
+    return content_key(kind, report_content, instructions, provider or "auto", models)
+
+def _deadline_s(client_ms: Optional[int], cfg: Mapping[str, Any], key: str) -> Optional[float]:
+    """Request deadline in seconds: the client's deadline_ms, else deadlines.<key>; capped by deadlines.max_ms."""
+    deadlines = cfg.get("deadlines") or {}
+    ms = client_ms or deadlines.get(key)
+    if not ms:
+        return None
+    if deadlines.get("max_ms"):
+        ms = min(int(ms), int(deadlines["max_ms"]))
+    return int(ms) / 1000.0
+
+def _provider_enabled(cfg: Mapping[str, Any], name: str) -> bool:
+    return bool((cfg.get("providers") or {}).get(name, {}).get("enabled", False))
+
+_provider_stats = ProviderStats()
+
+def _provider_model(cfg: Mapping[str, Any], name: str) -> str:
+    return str((cfg.get("providers") or {}).get(name, {}).get("model", ""))
+
+def _provider_chain(provider: str, cfg: Mapping[str, Any]) -> List[str]:
+    """Providers to try in order: an explicit choice always goes first, the others only if enabled.
+
+    For provider="auto" with routing.adaptive the enabled providers are ordered by
+    their measured expected time to a valid answer (see provider_stats.py), with a
+    routing.explore_ratio share of requests sent to another provider first.
+    Providers whose circuit breaker is open go last, whatever their score.
+    """
+    names = provider_names(cfg)
+    if provider in names:
+        return [provider] + [p for p in names if p != provider and _provider_enabled(cfg, p)]
+    enabled = [p for p in names if _provider_enabled(cfg, p)]
+    routing = cfg.get("routing") or {}
+    if routing.get("adaptive", False) and len(enabled) > 1:
+        _provider_stats.alpha = float(routing.get("stats_alpha", _provider_stats.alpha))
+        _provider_stats.error_penalty_ms = float(routing.get("error_penalty_ms", _provider_stats.error_penalty_ms))
+        order, explored = _provider_stats.order([(p, _provider_model(cfg, p)) for p in enabled],
+                                                float(routing.get("explore_ratio", 0.0)))
+        if explored:
+            print(f"Adaptive routing: exploring {order[0]} first")
+        providers = cfg.get("providers") or {}
+        rejecting = {p for p in order if get_breaker(p, providers.get(p) or {}).rejecting()}
+        return [p for p in order if p not in rejecting] + [p for p in order if p in rejecting]
+    if not routing.get("prefer_openai", True) and "openai" in enabled:
+        enabled.remove("openai")
+        enabled.append("openai")
+    return enabled
+
+def _idea_request_dict(req: IdeaRequest, cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    return {"risk": req.risk, "budget_sol": req.budget_sol,
+            "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
+            "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")}
+
+def _idea_prompt_request(req: IdeaRequest, cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    """The request as sent to the providers: with routing.twitter_digest, plus a digest of the signal snapshot."""
+    request = _idea_request_dict(req, cfg)
+    digest = _signals.digest(cfg)
+    if digest:
+        request["twitter_signals"] = digest
+    return request
+
+def _race_mode(provider: str, chain: List[str], cfg: Mapping[str, Any]) -> Optional[float]:
+    """Hedge delay in seconds when provider=auto should race the chain, else None."""
+    routing = cfg.get("routing") or {}
+    if provider in provider_names(cfg) or len(chain) < 2 or routing.get("mode", "sequential") != "race":
+        return None
+    return max(0.0, float(routing.get("hedge_delay_ms", 1500))) / 1000.0
+
+def _is_valid_idea(data: Optional[Mapping[str, Any]]) -> bool:
+    if not data:
+        return False
+    try:
+        IdeaPayload(**data)
+        return True
+    except Exception:
+        return False
+
+def _valid_ideas(data: Any) -> List[Mapping[str, Any]]:
+    return [d for d in data if _is_valid_idea(d)] if isinstance(data, list) else []
+
+def _idea_ok(result: Tuple[Any, ...]) -> bool:
+    return _is_valid_idea(result[0])
+
+def _ideas_ok(result: Tuple[Any, ...]) -> bool:
+    return bool(_valid_ideas(result[0]))
+
+def _analysis_ok(result: Tuple[Any, ...]) -> bool:
+    return bool(result[0])
+
+def _raise_if_rate_limited(errors: List[Optional[str]]) -> None:
+    """Fail fast with 429 + Retry-After when every provider tried refused the call at admission."""
+    if errors and all(isinstance(e, RateLimited) for e in errors):
+        first = min(errors, key=lambda e: e.retry_after or 0.0)
+        raise HTTPException(status_code=429, detail=str(first), headers=retry_after_header(first))
+
+_singleflight = SingleFlight()
+
+async def _call_limited(limits: Optional[Dict[str, asyncio.Semaphore]], name: str, fn: Callable[..., Awaitable[Any]], *args: Any,
+                        timed_out: Any = None, accept: Optional[Callable[[Any], bool]] = None) -> Any:
+    """Await fn(*args, cfg) for provider ``name``.
+
+    Identical concurrent calls (same provider, arguments, config version, output
+    scope and rate-limit priority) share one upstream request. It runs under the
+    latest deadline among its waiting callers; each caller bounds its own wait,
+    and the call is cancelled when the last one gives up. Only the call that actually goes upstream
+    takes a slot in the provider's worker pool and its semaphore from ``limits``. When the request
+    deadline passes first, the call is abandoned and ``timed_out`` returned.
+    With ``accept``, the upstream latency and whether accept(result) held are
+    recorded in _provider_stats for adaptive routing.
+    """
+    key = content_key(fn.__name__, name, config_version(), output_key(name, fn.__name__), current_priority(), args[:-1])
+    model = _provider_model(args[-1], name)
+
+    backend = get_provider(name)
+
+    async def measured() -> Any:
+        async with backend.pool(args[-1]):
+            backend.busy += 1
+            t0 = time.perf_counter()
+            try:
+                result = await fn(*args)
+            finally:
+                backend.busy -= 1
+        if accept is not None:
+            _provider_stats.record(name, model, (time.perf_counter() - t0) * 1000.0, accept(result))
+        return result
+
+    async def upstream() -> Any:
+        sem = limits.get(name) if limits else None
+        if sem is None:
+            return await measured()
+        async with sem:
+            return await measured()
+
+    left = remaining()
+    if left is None:
+        return await _singleflight.do(key, upstream)
+    try:
+        return await asyncio.wait_for(_singleflight.do(key, upstream), left)
+    except asyncio.TimeoutError:
+        print(f"{name} did not answer within the request deadline")
+        if accept is not None:
+            _provider_stats.record(name, model, left * 1000.0, False)
+        return timed_out
+
+async def _generate_idea_with_provider(req: IdeaRequest, cfg: Mapping[str, Any],
+                                       limits: Optional[Dict[str, asyncio.Semaphore]] = None) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int, Optional[Dict[str, Any]]]:
+    """Generate idea using specified provider with fallback logic.
+
+    Returns (data, source, error, retries, routing_meta); routing_meta is only set in race mode.
+    ``limits`` optionally bounds concurrent calls per provider (used by the batch endpoint).
+    With req.n > 1 data is the list of schema-valid candidates from one generate_n call.
+    """
     provider = req.provider or "auto"
-
-    # Determine which provider to use
-    if provider == "grok":
-        # Try Grok first
-        data, source, error, retries = call_grok_generate_with_meta(
-            {"risk": req.risk, "budget_sol": req.budget_sol,
-             "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-             "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-            cfg
-        )
-        if data:
-            return data, source, error, retries
-
-        # If Grok fails and fallback is enabled, try OpenAI
-        if source == "fallback" and (cfg.get("providers", {}).get("openai", {}).get("enabled", False)):
-            print("Grok failed, trying OpenAI as fallback...")
-            data, source, error, retries = call_openai_generate_with_meta(
-                {"risk": req.risk, "budget_sol": req.budget_sol,
-                 "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-                 "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-                cfg
-            )
-            if data:
-                return data, f"openai-{source}", error, retries
-
-    elif provider == "openai":
-        # Try OpenAI first
-        data, source, error, retries = call_openai_generate_with_meta(
-            {"risk": req.risk, "budget_sol": req.budget_sol,
-             "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-             "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-            cfg
-        )
-        if data:
-            return data, source, error, retries
-
-        # If OpenAI fails and fallback is enabled, try Grok
-        if source == "fallback" and (cfg.get("providers", {}).get("grok", {}).get("enabled", False)):
-            print("OpenAI failed, trying Grok as fallback...")
-            data, source, error, retries = call_grok_generate_with_meta(
-                {"risk": req.risk, "budget_sol": req.budget_sol,
-                 "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-                 "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-                cfg
-            )
-            if data:
-                return data, f"grok-{source}", error, retries
-
-    else:  # provider == "auto" - try both in order
-        # Try OpenAI first (default)
-        if cfg.get("providers", {}).get("openai", {}).get("enabled", False):
-            data, source, error, retries = call_openai_generate_with_meta(
-                {"risk": req.risk, "budget_sol": req.budget_sol,
-                 "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-                 "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-                cfg
-            )
-            if data:
-                return data, source, error, retries
-
-        # Try Grok as fallback
-        if cfg.get("providers", {}).get("grok", {}).get("enabled", False):
-            data, source, error, retries = call_grok_generate_with_meta(
-                {"risk": req.risk, "budget_sol": req.budget_sol,
-                 "universe": req.universe or (cfg.get("research_policy", {}).get("universe") or ["SOL"]),
-                 "constraints": req.constraints or (cfg.get("research_policy", {}).get("constraints") or "Spot only")},
-                cfg
-            )
-            if data:
-                return data, source, error, retries
+    request = _idea_prompt_request(req, cfg)
+    chain = _provider_chain(provider, cfg)
+    n = req.n or 1
+    ok = _ideas_ok if n > 1 else _idea_ok
+
+    def call(name: str, timed_out: Tuple[Any, ...]) -> Awaitable[Any]:
+        backend = get_provider(name)
+        if n > 1:
+            return _call_limited(limits, name, backend.generate_n, request, n, cfg, timed_out=timed_out, accept=ok)
+        return _call_limited(limits, name, backend.generate, request, cfg, timed_out=timed_out, accept=ok)
+
+    hedge_delay = _race_mode(provider, chain, cfg)
+    if hedge_delay is not None:
+        starters = [(name, lambda name=name: call(name, (None, "error", deadline_error(name), 0))) for name in chain]
+        winner, result, meta = await race(starters, hedge_delay, ok)
+        if winner is not None:
+            data, source, error, retries = result
+            return (_valid_ideas(data) if n > 1 else data), source, error, retries, meta
+        error = result[2] if result else None
+        _raise_if_rate_limited([error])
+        return None, "error", error or "All providers failed", 0, meta
+
+    errors: List[Optional[str]] = []
+    for i, name in enumerate(chain):
+        if expired():
+            print(f"Request deadline exceeded, skipping {', '.join(chain[i:])}")
+            return None, "error", deadline_error("Idea request"), 0, None
+        if i > 0:
+            print(f"{chain[i - 1]} failed, trying {name} as fallback...")
+        # Each provider still in the chain gets an equal share of what is left; unused time rolls over
+        with share(len(chain) - i):
+            data, source, error, retries = await call(name, (None, "fallback", deadline_error(name), 0))
+        # Only a schema-valid idea ends the chain; anything else falls through to the next provider
+        if ok((data,)):
+            return (_valid_ideas(data) if n > 1 else data), source, error, retries, None
+        errors.append(error or (f"Invalid idea payload from {name}" if data else None))
+        # An explicitly chosen provider only hands over when its fallback is enabled
+        if provider in provider_names(cfg) and source != "fallback":
+            break
 
     # If we get here, both providers failed - this should not happen due to fallback logic
     # But if it does, we'll handle it in the main function
-    return None, "error", "All providers failed", 0
+    _raise_if_rate_limited(errors)
+    if expired():
+        return None, "error", deadline_error("Idea request"), 0, None
+    return None, "error", "All providers failed", 0, None
 
-def _analyze_report_with_provider(report_content: str, instructions: str, req: AnalyzeReportRequest, cfg: Mapping[str, Any]) -> Tuple[Optional[str], str, Optional[str], int]:
-    """Analyze report using specified provider with fallback logic."""
-    provider = req.provider or "auto"
+async def _analyze_report_with_provider(report_content: str, instructions: str, req: Any, cfg: Mapping[str, Any]) -> Tuple[Optional[str], str, Optional[str], int, Optional[Dict[str, Any]]]:
+    """Analyze report using specified provider with fallback logic.
 
-    # Determine which provider to use
-    if provider == "grok":
-        # Try Grok first
-        analysis, error = call_grok_analyze(report_content, instructions, cfg)
-        if analysis:
-            return analysis, "grok", None, 0
-
-        # If Grok fails and fallback is enabled, try OpenAI
-        if cfg.get("providers", {}).get("openai", {}).get("enabled", False):
-            print("Grok failed, trying OpenAI as fallback...")
-            analysis, error = call_openai_analyze(report_content, instructions, cfg)
-            if analysis:
-                return analysis, "openai-fallback", None, 0
-
-    elif provider == "openai":
-        # Try OpenAI first
-        analysis, error = call_openai_analyze(report_content, instructions, cfg)
+    Returns (analysis, source, error, retries, routing_meta); routing_meta is only set in race mode.
+    """
+    provider = req.provider or "auto"
+    chain = _provider_chain(provider, cfg)
+
+    hedge_delay = _race_mode(provider, chain, cfg)
+    if hedge_delay is not None:
+        starters = [(name, lambda name=name: _call_limited(None, name, get_provider(name).analyze, report_content, instructions, cfg,
+                                                                 timed_out=(None, deadline_error(name)), accept=_analysis_ok)) for name in chain]
+        winner, result, meta = await race(starters, hedge_delay, _analysis_ok)
+        if winner is not None:
+            return result[0], winner, None, 0, meta
+        _raise_if_rate_limited([result[1] if result else None])
+        return None, "error", (result[1] if result else None) or "All providers failed", 0, meta
+
+    errors: List[Optional[str]] = []
+    for i, name in enumerate(chain):
+        if expired():
+            print(f"Request deadline exceeded, skipping {', '.join(chain[i:])}")
+            return None, "error", deadline_error("Analysis request"), 0, None
+        if i > 0:
+            print(f"{chain[i - 1]} failed, trying {name} as fallback...")
+        with share(len(chain) - i):
+            analysis, error = await _call_limited(None, name, get_provider(name).analyze, report_content, instructions, cfg,
+                                                  timed_out=(None, deadline_error(name)), accept=_analysis_ok)
         if analysis:
-            return analysis, "openai", None, 0
-
-        # If OpenAI fails and fallback is enabled, try Grok
-        if cfg.get("providers", {}).get("grok", {}).get("enabled", False):
-            print("OpenAI failed, trying Grok as fallback...")
-            analysis, error = call_grok_analyze(report_content, instructions, cfg)
-            if analysis:
-                return analysis, "grok-fallback", None, 0
-
-    else:  # provider == "auto" - try both in order
-        # Try OpenAI first (default)
-        if cfg.get("providers", {}).get("openai", {}).get("enabled", False):
-            analysis, error = call_openai_analyze(report_content, instructions, cfg)
-            if analysis:
-                return analysis, "openai", None, 0
-
-        # Try Grok as fallback
-        if cfg.get("providers", {}).get("grok", {}).get("enabled", False):
-            analysis, error = call_grok_analyze(report_content, instructions, cfg)
-            if analysis:
-                return analysis, "grok", None, 0
+            return analysis, name, None, 0, None
+        errors.append(error)
 
     # If we get here, both providers failed
-    return None, "error", "All providers failed", 0
+    _raise_if_rate_limited(errors)
+    if expired():
+        return None, "error", deadline_error("Analysis request"), 0, None
+    return None, "error", "All providers failed", 0, None
+
+async def _reanalyze_changed_sections(record: Mapping[str, Any], sections: List[str], plan: Tuple[List[int], int],
+                                     req: Any, cfg: Mapping[str, Any]) -> Tuple[Optional[str], str, Optional[str], int, Optional[Dict[str, Any]]]:
+    """Incremental analyze_report: the prior analysis plus only the changed sections go to the LLM,
+    which returns the complete updated analysis. Same result shape as _analyze_report_with_provider."""
+    changed, removed = plan
+    meta = {"sections": len(sections), "changed": len(changed), "removed": removed}
+    if not changed and not removed:
+        # Whitespace-only edit: the prior analysis still applies
+        return record["analysis_result"], record.get("source", "cache"), None, 0, {"incremental": {**meta, "reused": True}}
+    content = incremental_prompt(sections, changed, removed, record["analysis_result"], incremental_settings(cfg)["summary_tokens"])
+    instructions = (f"{req.instructions}\n\nThis is a re-analysis of an edited report: the content above holds the prior "
+                    f"analysis and only the sections that changed since. Return the complete updated analysis: keep what "
+                    f"still holds, revise it for the changed sections and drop points about removed content.")
+    with output_scope("incremental"):
+        analysis, source, error, retries, routing = await _analyze_report_with_provider(content, instructions, req, cfg)
+    return analysis, source, error, retries, {**(routing or {}), "incremental": meta}
+
+_YIELD_FOCUS_INSTRUCTIONS = {
+    "comprehensive": "Provide a comprehensive analysis of the yield opportunities, risks, and recommendations.",
+    "risk": "Focus on risk assessment, potential downsides, and risk mitigation strategies.",
+    "opportunity": "Focus on identifying the most promising yield opportunities and entry strategies.",
+    "technical": "Focus on technical analysis, smart contract risks, and protocol-specific considerations."
+}
+
+def _yield_report_prompt(req: YieldReportRequest, cfg: Mapping[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Return (prompt, prompt_stats); the tweets are deduplicated and fitted to yield_report.input_token_budget."""
+    budget_tokens, per_tweet = prompt_budget(cfg)
+    dedup_threshold = float((cfg.get("yield_report") or {}).get("dedup_threshold", 0.6))
+    twitter_content, stats = build_tweet_block(req.twitter_data, budget_tokens, per_tweet, dedup_threshold)
+    if stats["tweets_dropped"]:
+        print(f"Yield report prompt: {stats['tweets_included']}/{stats['tweets_total']} tweets included "
+              f"({stats['dropped_duplicates']} duplicates, {stats['dropped_empty']} empty, "
+              f"{stats['dropped_over_budget']} over budget)")
+
+    return f"""
+        Analyze the following Twitter data for yield opportunities and investment ideas in the Solana ecosystem:
+
+        TWITTER DATA:
+        {twitter_content}
+
+        ANALYSIS INSTRUCTIONS:
+        {req.analysis_instructions}
+
+        Please provide:
+        1. Summary of key themes and sentiment
+        2. Potential yield opportunities identified
+        3. Risk assessment
+        4. Investment recommendations
+        5. Market context and timing considerations
+
+        Focus on actionable insights for yield farming, staking, and DeFi opportunities.
+        """, stats
+
+def _yield_analysis_instructions(focus: str) -> str:
+    """Focus instructions for yield/analyze; the report itself travels once, as report_content."""
+    return _YIELD_FOCUS_INSTRUCTIONS.get(focus, _YIELD_FOCUS_INSTRUCTIONS["comprehensive"])
+
+def _analysis_chunks(report_content: str, cfg: Mapping[str, Any]) -> Optional[List[str]]:
+    """Chunks for map-reduce analysis, or None when the report is below analysis.map_reduce_threshold_tokens."""
+    analysis = cfg.get("analysis") or {}
+    if not analysis.get("map_reduce", True):
+        return None
+    if count_tokens(report_content) <= int(analysis.get("map_reduce_threshold_tokens", 6000)):
+        return None
+    chunks = chunk_text(report_content, int(analysis.get("chunk_tokens", 3000)), int(analysis.get("max_chunks", 8)))
+    return chunks if len(chunks) > 1 else None
+
+async def _map_chunks(chunks: List[str], instructions: str, req: Any, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str], int, Dict[str, Any]]:
+    """Map phase: analyze all chunks concurrently; returns (partial analyses for the reduce step, error, retries, meta).
+
+    Failed chunks are named in the merged text so the reduce step knows what is missing;
+    only when every chunk fails is the first error returned.
+    """
+    n = len(chunks)
+    part_instructions = [f"{instructions}\n\nThis is part {i}/{n} of a longer report. Analyze only this part; "
+                         f"the partial analyses are merged afterwards." for i in range(1, n + 1)]
+    with output_scope("map"):
+        results = await asyncio.gather(*(_analyze_report_with_provider(chunk, part, req, cfg)
+                                         for chunk, part in zip(chunks, part_instructions)), return_exceptions=True)
+    if all(isinstance(r, BaseException) for r in results):
+        raise results[0]
+
+    partials: List[str] = []
+    sources: List[str] = []
+    errors: List[str] = []
+    retries = 0
+    for i, result in enumerate(results, 1):
+        if isinstance(result, BaseException):
+            errors.append(str(getattr(result, "detail", result)))
+            partials.append(f"Partial analysis {i}/{n}: (part could not be analyzed)")
+            continue
+        analysis, source, error, used, _ = result
+        retries += used
+        if not analysis:
+            errors.append(error or "All providers failed")
+            partials.append(f"Partial analysis {i}/{n}: (part could not be analyzed)")
+            continue
+        sources.append(source)
+        partials.append(f"Partial analysis {i}/{n}:\n{analysis}")
+
+    meta = {"chunks": n, "failed_chunks": len(errors), "map_sources": sources}
+    if not sources:
+        return None, errors[0], retries, meta
+    if errors:
+        print(f"Map-reduce analysis: {len(errors)}/{n} chunks failed ({errors[0]})")
+    return "\n\n".join(partials), None, retries, meta
+
+def _reduce_instructions(instructions: str, n: int) -> str:
+    return (f"{instructions}\n\nThe report was analyzed in {n} parts; the content above holds the partial analyses. "
+            f"Merge them into one coherent analysis without repeating points.")
+
+async def _map_reduce_analyze(chunks: List[str], instructions: str, req: Any, cfg: Mapping[str, Any]) -> Tuple[Optional[str], str, Optional[str], int, Optional[Dict[str, Any]]]:
+    """Chunked analysis: concurrent map over the chunks, then one merge call. Same result shape as _analyze_report_with_provider."""
+    # Half of the remaining deadline for the map phase, the rest for the merge
+    with share(2):
+        partials, error, retries, meta = await _map_chunks(chunks, instructions, req, cfg)
+    if partials is None:
+        return None, "error", error, retries, {"map_reduce": meta}
+    analysis, source, error, used, _ = await _analyze_report_with_provider(partials, _reduce_instructions(instructions, len(chunks)), req, cfg)
+    return analysis, source, error, retries + used, {"map_reduce": meta}
+
+def _report_dir(cfg: Mapping[str, Any]) -> Path:
+    log_cfg = cfg.get("logging", {})
+    report_dir = Path(__file__).resolve().parent.parent / log_cfg.get("report_dir", "Report")
+    report_dir.mkdir(parents=True, exist_ok=True)
+    return report_dir
 
 @router.get("/health")
 def health():
-    cfg = load_config()
+    cfg = get_config()
     return {"ok": True,
             "providers":{"openai_enabled":bool((cfg.get("providers") or {}).get("openai",{}).get("enabled",False)),
                           "grok_enabled":bool((cfg.get("providers") or {}).get("grok",{}).get("enabled",False)),
                           "twitter_enabled":bool((cfg.get("providers") or {}).get("twitter",{}).get("enabled",False))},
-            "timeout_s": int((cfg.get("providers") or {}).get("openai",{}).get("timeout_seconds",12))}
+            "timeout_s": int((cfg.get("providers") or {}).get("openai",{}).get("timeout_seconds",12)),
+            "grok_resolution": grok_resolution(),
+            "idea_cache": _idea_cache.stats(),
+            "singleflight": _singleflight.stats(),
+            "circuit_breakers": breaker_states(),
+            "provider_scores": _provider_stats.snapshot(),
+            "rate_limits": limiter_states(),
+            "output_tokens": output_states(),
+            "tweet_store": store_states(),
+            "twitter_signals": _signals.stats(),
+            "registry": {name: get_provider(name).status(cfg) for name in provider_names(cfg)}}
+
+@router.get("/providers")
+async def list_providers(probe: bool = False):
+    """Registered LLM providers with their worker pools; probe=true also checks each enabled backend."""
+    cfg = get_config()
+    result = {name: get_provider(name).status(cfg) for name in provider_names(cfg)}
+    if probe:
+        enabled = [name for name, st in result.items() if st["enabled"]]
+        errors = await asyncio.gather(*[get_provider(name).probe(cfg) for name in enabled])
+        for name, error in zip(enabled, errors):
+            result[name]["probe"] = {"ok": error is None, "error": error}
+    return {"ok": True, "providers": result}
 
 @router.get("/test/grok")
-def test_grok():
+async def test_grok():
     """Simple test endpoint for Grok API connectivity."""
-    cfg = load_config()
-    from Backend.services.llm_grok import call_grok_generate
+    cfg = get_config()
 
     # Simple test payload
     test_req = {"test": "Hello Grok", "message": "Respond with a simple greeting"}
     test_cfg = {"providers": cfg.get("providers", {}), "research_policy": cfg.get("research_policy", {})}
 
     try:
-        result, error = call_grok_generate(test_req, test_cfg)
+        result, error = await acall_grok_generate(test_req, test_cfg)
         if result:
             return {"ok": True, "status": "success", "response": result, "source": "grok"}
         else:
@@ -309,8 +691,8 @@ def get_reports():
         return []
 
 @router.post("/analyze_report", response_model=AnalyzeReportResponse)
-def analyze_report(req: AnalyzeReportRequest):
-    cfg = load_config()
+async def analyze_report(req: AnalyzeReportRequest):
+    cfg = get_config()
     start = time.perf_counter()
 
     try:
@@ -329,8 +711,34 @@ def analyze_report(req: AnalyzeReportRequest):
 
         report_content = report_path.read_text(encoding="utf-8", errors="ignore")
 
+        cache = None if req.bypass_cache else _analysis_cache(cfg)
+        cache_key = _analysis_cache_key("analyze_report", report_content, req.instructions, req.provider, cfg)
+        cached = cache.get(cache_key) if cache else None
+        if cached:
+            return AnalyzeReportResponse(
+                ok=True,
+                source=cached["source"],
+                ts=datetime.datetime.utcnow().isoformat(),
+                analysis_result=cached["analysis_result"],
+                saved_filename=cached.get("saved_filename"),
+                retries=0,
+                cache_hit=True,
+                duration_ms=round((time.perf_counter() - start) * 1000.0, 2)
+            )
+
+        # An edited report that was analyzed before only sends its changed sections
+        sections = split_sections(report_content)
+        revision_key = _analysis_cache_key("report_revision", req.filename, req.instructions, req.provider, cfg)
+        previous = cache.get(revision_key) if cache else None
+        plan = plan_incremental(previous, sections, cfg)
+
         # Analyze with LLM
-        analysis_result, source, error, retries = _analyze_report_with_provider(report_content, req.instructions, req, cfg)
+        with deadline_scope(_deadline_s(req.deadline_ms, cfg, "analysis_ms")), output_scope("analysis"):
+            if plan is None:
+                analysis_result, source, error, retries, routing = await _analyze_report_with_provider(report_content, req.instructions, req, cfg)
+            else:
+                analysis_result, source, error, retries, routing = await _reanalyze_changed_sections(
+                    previous, sections, plan, req, cfg)
 
         duration = (time.perf_counter() - start) * 1000.0
 
@@ -342,6 +750,7 @@ def analyze_report(req: AnalyzeReportRequest):
                 analysis_result="",
                 error=error,
                 retries=retries,
+                routing=routing,
                 duration_ms=round(duration, 2)
             )
 
@@ -360,6 +769,10 @@ def analyze_report(req: AnalyzeReportRequest):
         elif source == "grok-fallback":
             final_source = "grok"
 
+        if cache:
+            cache.put(cache_key, {"analysis_result": analysis_result, "source": final_source, "saved_filename": saved_filename})
+            cache.put(revision_key, revision_record(sections, analysis_result, final_source))
+
         return AnalyzeReportResponse(
             ok=True,
             source=final_source,
@@ -368,9 +781,13 @@ def analyze_report(req: AnalyzeReportRequest):
             saved_filename=saved_filename,
             error=None,
             retries=retries,
+            routing=routing,
+            cache_hit=False,
             duration_ms=round(duration, 2)
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         duration = (time.perf_counter() - start) * 1000.0
         print(f"Error analyzing report: {e}")
@@ -384,28 +801,47 @@ def analyze_report(req: AnalyzeReportRequest):
             duration_ms=round(duration, 2)
         )
 
-@router.post("/idea", response_model=IdeaResponse)
-def generate_idea(req: IdeaRequest):
-    cfg = load_config()
-    tw_signals = []
-    if cfg.get("routing",{}).get("use_twitter_signals",False):
-        signals, error = recent_search(cfg)
-        if signals:
-            tw_signals = signals
-    start = time.perf_counter()
+def _twitter_signals(cfg: Mapping[str, Any]) -> list:
+    """Current tweets of the background prefetcher; never waits on the Twitter API."""
+    return _signals.current(cfg)
+
+async def _produce_idea(req: IdeaRequest, cfg: Mapping[str, Any], tw_signals: Optional[list] = None,
+                        write_report: bool = True, limits: Optional[Dict[str, asyncio.Semaphore]] = None) -> Dict[str, Any]:
+    """Build one IdeaResponse body: cache lookup, provider call, static fallback, report file."""
+    cache_cfg = cfg.get("caching") or {}
+    cache_enabled = bool(cache_cfg.get("idea_cache", True)) and not req.bypass_cache
+    cache_key = _idea_cache_key(req, cfg)
+    if cache_enabled:
+        cached = _configured_idea_cache(cfg).get(cache_key)
+        if cached is not None:
+            body, age = cached
+            return {**body, "ts": datetime.datetime.utcnow().isoformat(),
+                    "cache_hit": True, "cache_age_s": round(age, 3), "duration_ms": 0.0}
 
-    # Use the provider-aware function
-    idea_data, source, error, retries = _generate_idea_with_provider(req, cfg)
+    start = time.perf_counter()
+    if tw_signals is None:
+        tw_signals = _twitter_signals(cfg)
+    # One deadline covers the whole provider chain; past it the static fallback is used
+    with deadline_scope(_deadline_s(req.deadline_ms, cfg, "idea_ms")):
+        idea_data, source, error, retries, routing = await _generate_idea_with_provider(req, cfg, limits)
 
     duration = (time.perf_counter() - start) * 1000.0
 
+    candidates = scores = None
+    if isinstance(idea_data, list):
+        # n-best: dedupe and rank locally, the best candidate becomes the payload
+        ranked = rank_ideas(idea_data, _idea_request_dict(req, cfg), cfg)
+        scores = [score for score, _ in ranked]
+        candidates = [IdeaPayload(**idea).model_dump() for _, idea in ranked]
+        idea_data = candidates[0]
+
     # If all providers failed, use static fallback
     if not idea_data:
         idea_data = _fallback_from_file(req.budget_sol, req.risk)
 
     payload = IdeaPayload(**idea_data)
     log_cfg = cfg.get("logging", {})
-    if log_cfg.get("write_idea_reports", True):
+    if write_report and log_cfg.get("write_idea_reports", True):
         report_dir = Path(log_cfg.get("report_dir", "Report")); report_dir.mkdir(parents=True, exist_ok=True)
         ts = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         (report_dir / f"research_{ts}.txt").write_text(str(payload.model_dump()), encoding="utf-8")
@@ -417,15 +853,62 @@ def generate_idea(req: IdeaRequest):
     elif source.startswith("grok-"):
         final_source = "grok"
 
-    return {"ok": True, "source": final_source, "ts": datetime.datetime.utcnow().isoformat(),
-            "payload": payload, "twitter_signals": tw_signals or None,
-            "error": error, "retries": retries,
-            "duration_ms": round(duration, 2)}
+    body = {"ok": True, "source": final_source, "ts": datetime.datetime.utcnow().isoformat(),
+            "payload": payload.model_dump(), "twitter_signals": tw_signals or None,
+            "error": error, "retries": retries, "routing": routing,
+            "duration_ms": round(duration, 2), "cache_hit": False}
+    if candidates is not None:
+        body.update(candidates=candidates, candidate_scores=scores)
+    # Only real provider answers are cached; the static fallback should be retried next time
+    if cache_enabled and source not in ("error", "fallback"):
+        _idea_cache.put(cache_key, body, _idea_cache_ttl(payload, cfg))
+    return body
+
+@router.post("/idea", response_model=IdeaResponse)
+async def generate_idea(req: IdeaRequest):
+    return await _produce_idea(req, get_config())
+
+async def _batch_item(req: IdeaRequest, cfg: Mapping[str, Any], tw_signals: list,
+                      limits: Dict[str, asyncio.Semaphore]) -> Dict[str, Any]:
+    """One /ideas/batch result; a rate-limited item fails on its own (ok=false, retry_after) instead of failing the batch."""
+    try:
+        return await _produce_idea(req, cfg, tw_signals, write_report=False, limits=limits)
+    except HTTPException as e:
+        retry_after = (e.headers or {}).get("Retry-After")
+        return {"ok": False, "source": "error", "ts": datetime.datetime.utcnow().isoformat(),
+                "payload": _fallback_from_file(req.budget_sol, req.risk), "error": str(e.detail), "retries": 0,
+                "retry_after": float(retry_after) if retry_after else None, "cache_hit": False}
+
+@router.post("/ideas/batch", response_model=IdeaBatchResponse)
+async def generate_ideas_batch(req: IdeaBatchRequest):
+    """Generate many ideas concurrently, bounded per provider, with one consolidated report."""
+    cfg = get_config()
+    start = time.perf_counter()
+    providers = cfg.get("providers") or {}
+    limits = {name: asyncio.Semaphore(req.max_concurrency or int(providers.get(name, {}).get("max_concurrency", 4)))
+              for name in provider_names(cfg)}
+    # Batch items queue behind interactive requests at the provider rate limiters
+    with deadline_scope(_deadline_s(req.deadline_ms, cfg, "batch_ms")), priority_scope(1):
+        tw_signals = _twitter_signals(cfg)
+        results = await asyncio.gather(*[_batch_item(r, cfg, tw_signals, limits) for r in req.requests])
+
+    saved_filename = None
+    log_cfg = cfg.get("logging", {})
+    if log_cfg.get("write_idea_reports", True):
+        report_dir = Path(log_cfg.get("report_dir", "Report")); report_dir.mkdir(parents=True, exist_ok=True)
+        ts = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        saved_filename = f"research_batch_{ts}.txt"
+        lines = [f"{i+1}. [{r['source']}] {r['payload']}" for i, r in enumerate(results)]
+        (report_dir / saved_filename).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    return {"ok": True, "ts": datetime.datetime.utcnow().isoformat(), "count": len(results),
+            "results": results, "saved_filename": saved_filename,
+            "duration_ms": round((time.perf_counter() - start) * 1000.0, 2)}
 
 @router.post("/twitter/scrape", response_model=TwitterScrapeResponse)
-def scrape_twitter_yield_data(req: TwitterScrapeRequest):
-    """Scrape Twitter for yield-related data and ideas."""
-    cfg = load_config()
+async def scrape_twitter_yield_data(req: TwitterScrapeRequest):
+    """Scrape Twitter for yield-related data and ideas; with providers.twitter.store the window is served from the local tweet store."""
+    cfg = get_config()
     start = time.perf_counter()
 
     try:
@@ -455,7 +938,8 @@ def scrape_twitter_yield_data(req: TwitterScrapeRequest):
         }
 
         # Perform Twitter search
-        tweets, error = recent_search(search_cfg)
+        tweets, error = await arecent_search(search_cfg)
+        _raise_if_rate_limited([error] if error else [])
 
         duration = (time.perf_counter() - start) * 1000.0
 
@@ -473,11 +957,14 @@ def scrape_twitter_yield_data(req: TwitterScrapeRequest):
             ok=True,
             tweets=tweets,
             count=len(tweets),
+            duplicates=sum(int(t.get("dup_count", 1)) - 1 for t in tweets),
             query=req.query,
             ts=datetime.datetime.utcnow().isoformat(),
             error=None
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         duration = (time.perf_counter() - start) * 1000.0
         print(f"Error scraping Twitter: {e}")
@@ -491,41 +978,20 @@ def scrape_twitter_yield_data(req: TwitterScrapeRequest):
         )
 
 @router.post("/yield/report", response_model=YieldReportResponse)
-def generate_yield_report(req: YieldReportRequest):
+async def generate_yield_report(req: YieldReportRequest):
     """Generate a yield analysis report from Twitter data."""
-    cfg = load_config()
+    cfg = get_config()
     start = time.perf_counter()
 
     try:
         # Prepare the analysis prompt
-        twitter_content = "\n".join([
-            f"Tweet {i+1}: {tweet.get('text', '')} (Created: {tweet.get('created_at', '')})"
-            for i, tweet in enumerate(req.twitter_data)
-        ])
-
-        analysis_prompt = f"""
-        Analyze the following Twitter data for yield opportunities and investment ideas in the Solana ecosystem:
-
-        TWITTER DATA:
-        {twitter_content}
-
-        ANALYSIS INSTRUCTIONS:
-        {req.analysis_instructions}
-
-        Please provide:
-        1. Summary of key themes and sentiment
-        2. Potential yield opportunities identified
-        3. Risk assessment
-        4. Investment recommendations
-        5. Market context and timing considerations
-
-        Focus on actionable insights for yield farming, staking, and DeFi opportunities.
-        """
+        analysis_prompt, prompt_stats = _yield_report_prompt(req, cfg)
 
         # Use the existing analysis function
-        analysis_result, source, error, retries = _analyze_report_with_provider(
-            analysis_prompt, req.analysis_instructions, req, cfg
-        )
+        with deadline_scope(_deadline_s(req.deadline_ms, cfg, "analysis_ms")), output_scope("yield_report"):
+            analysis_result, source, error, retries, routing = await _analyze_report_with_provider(
+                analysis_prompt, req.analysis_instructions, req, cfg
+            )
 
         duration = (time.perf_counter() - start) * 1000.0
 
@@ -537,6 +1003,8 @@ def generate_yield_report(req: YieldReportRequest):
                 report_content="",
                 error=error,
                 retries=retries,
+                routing=routing,
+                prompt_stats=prompt_stats,
                 duration_ms=round(duration, 2)
             )
 
@@ -563,9 +1031,13 @@ def generate_yield_report(req: YieldReportRequest):
             saved_filename=saved_filename,
             error=None,
             retries=retries,
+            routing=routing,
+            prompt_stats=prompt_stats,
             duration_ms=round(duration, 2)
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         duration = (time.perf_counter() - start) * 1000.0
         print(f"Error generating yield report: {e}")
@@ -580,9 +1052,9 @@ def generate_yield_report(req: YieldReportRequest):
         )
 
 @router.post("/yield/analyze", response_model=YieldAnalysisResponse)
-def analyze_yield_report(req: YieldAnalysisRequest):
+async def analyze_yield_report(req: YieldAnalysisRequest):
     """Analyze an existing yield report with specific focus."""
-    cfg = load_config()
+    cfg = get_config()
     start = time.perf_counter()
 
     try:
@@ -602,20 +1074,32 @@ def analyze_yield_report(req: YieldAnalysisRequest):
         report_content = report_path.read_text(encoding="utf-8", errors="ignore")
 
         # Prepare analysis instructions based on focus
-        focus_instructions = {
-            "comprehensive": "Provide a comprehensive analysis of the yield opportunities, risks, and recommendations.",
-            "risk": "Focus on risk assessment, potential downsides, and risk mitigation strategies.",
-            "opportunity": "Focus on identifying the most promising yield opportunities and entry strategies.",
-            "technical": "Focus on technical analysis, smart contract risks, and protocol-specific considerations."
-        }
+        instructions = _yield_analysis_instructions(req.analysis_focus)
 
-        instructions = focus_instructions.get(req.analysis_focus, focus_instructions["comprehensive"])
-        full_instructions = f"{instructions}\n\nAnalyze the following yield report:\n\n{report_content}"
+        cache = None if req.bypass_cache else _analysis_cache(cfg)
+        cache_key = _analysis_cache_key(f"yield_analyze:{req.analysis_focus}", report_content, instructions, req.provider, cfg)
+        cached = cache.get(cache_key) if cache else None
+        if cached:
+            return YieldAnalysisResponse(
+                ok=True,
+                source=cached["source"],
+                ts=datetime.datetime.utcnow().isoformat(),
+                analysis_result=cached["analysis_result"],
+                saved_filename=cached.get("saved_filename"),
+                retries=0,
+                cache_hit=True,
+                duration_ms=round((time.perf_counter() - start) * 1000.0, 2)
+            )
 
         # Analyze with LLM
-        analysis_result, source, error, retries = _analyze_report_with_provider(
-            report_content, full_instructions, req, cfg
-        )
+        chunks = _analysis_chunks(report_content, cfg)
+        with deadline_scope(_deadline_s(req.deadline_ms, cfg, "analysis_ms")), output_scope(f"yield_analysis_{req.analysis_focus}"):
+            if chunks:
+                analysis_result, source, error, retries, routing = await _map_reduce_analyze(chunks, instructions, req, cfg)
+            else:
+                analysis_result, source, error, retries, routing = await _analyze_report_with_provider(
+                    report_content, instructions, req, cfg
+                )
 
         duration = (time.perf_counter() - start) * 1000.0
 
@@ -627,6 +1111,7 @@ def analyze_yield_report(req: YieldAnalysisRequest):
                 analysis_result="",
                 error=error,
                 retries=retries,
+                routing=routing,
                 duration_ms=round(duration, 2)
             )
 
@@ -645,6 +1130,9 @@ def analyze_yield_report(req: YieldAnalysisRequest):
         elif source == "grok-fallback":
             final_source = "grok"
 
+        if cache:
+            cache.put(cache_key, {"analysis_result": analysis_result, "source": final_source, "saved_filename": saved_filename})
+
         return YieldAnalysisResponse(
             ok=True,
             source=final_source,
@@ -653,9 +1141,13 @@ def analyze_yield_report(req: YieldAnalysisRequest):
             saved_filename=saved_filename,
             error=None,
             retries=retries,
+            routing=routing,
+            cache_hit=False,
             duration_ms=round(duration, 2)
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         duration = (time.perf_counter() - start) * 1000.0
         print(f"Error analyzing yield report: {e}")
@@ -668,3 +1160,201 @@ def analyze_yield_report(req: YieldAnalysisRequest):
             retries=0,
             duration_ms=round(duration, 2)
         )
+
+# --- Server-Sent Events variants ---------------------------------------------------------
+# Each stream opens with an SSE comment so the first byte leaves immediately, then sends
+# "meta" (provider picked), "delta" (text chunks) and a final "done" event whose data has
+# the same shape as the matching JSON endpoint's response. The result is still saved to Report/.
+
+
+def _sse(event: str, data: Mapping[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def _bounded_stream(name: str, model: Optional[str], deltas: AsyncIterator[str], pool: asyncio.Semaphore,
+                          t0: float, deadline_at: Optional[float]) -> AsyncIterator[str]:
+    """Pass deltas through until the request deadline; releases the worker slot and records the outcome when done."""
+    backend = get_provider(name)
+    ok = False
+    try:
+        while True:
+            left = None if deadline_at is None else deadline_at - time.monotonic()
+            if left is not None and left <= 0:
+                raise asyncio.TimeoutError("request deadline exceeded")
+            try:
+                text = await (deltas.__anext__() if left is None else asyncio.wait_for(deltas.__anext__(), left))
+            except StopAsyncIteration:
+                break
+            yield text
+        ok = True
+    finally:
+        backend.busy -= 1
+        pool.release()
+        _provider_stats.record(name, model, (time.perf_counter() - t0) * 1000.0, ok)
+        await deltas.aclose()
+
+async def _open_analysis_stream(report_content: str, instructions: str, req: Any, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[AsyncIterator[str]], Optional[str]]:
+    """Open a stream on the first provider in the chain that accepts it: (source, deltas, error).
+
+    Like _call_limited, the stream holds a slot in the provider's worker pool
+    until it ends, is bounded by the request deadline (deadline_ms, else
+    deadlines.analysis_ms) and feeds its duration and outcome to _provider_stats.
+    """
+    error = None
+    seconds = _deadline_s(getattr(req, "deadline_ms", None), cfg, "analysis_ms")
+    deadline_at = None if seconds is None else time.monotonic() + seconds
+    with deadline_scope(seconds):
+        for name in _provider_chain(req.provider or "auto", cfg):
+            if expired():
+                error = deadline_error("Analysis stream")
+                break
+            backend, model = get_provider(name), _provider_model(cfg, name)
+            pool = backend.pool(cfg)
+            t0 = time.perf_counter()
+            left = remaining()
+            try:
+                await (pool.acquire() if left is None else asyncio.wait_for(pool.acquire(), left))
+            except asyncio.TimeoutError:
+                error = deadline_error(name)
+                break
+            backend.busy += 1
+            try:
+                deltas, error = await backend.stream(report_content, instructions, cfg)
+            except BaseException:
+                backend.busy -= 1
+                pool.release()
+                raise
+            if deltas is not None:
+                return name, _bounded_stream(name, model, deltas, pool, t0, deadline_at), None
+            backend.busy -= 1
+            pool.release()
+            _provider_stats.record(name, model, (time.perf_counter() - t0) * 1000.0, False)
+    return None, None, error or "All providers failed"
+
+async def _analysis_events(report_content: str, instructions: str, req: Any, cfg: Mapping[str, Any],
+                           result_field: str, filename_prefix: str,
+                           cache: Optional[DiskCache] = None, cache_key: Optional[str] = None,
+                           fields: Optional[Dict[str, Any]] = None,
+                           prepare: Optional[Callable[[], Awaitable[Tuple[Optional[str], str, Optional[str], Dict[str, Any]]]]] = None) -> AsyncIterator[str]:
+    """SSE events for one analysis; ``fields`` are added to the final done body (e.g. prompt_stats).
+
+    ``prepare`` runs after a cache miss and returns the (report_content, instructions, error, fields)
+    that are actually streamed, e.g. the merge step of a map-reduce analysis; if it raises, the
+    stream ends with an error done event.
+    """
+    start = time.perf_counter()
+    fields = dict(fields or {})
+    yield ": stream open\n\n"
+
+    def body(ok: bool, source: str, result: str, **extra: Any) -> Dict[str, Any]:
+        return {"ok": ok, "source": source, "ts": datetime.datetime.utcnow().isoformat(), result_field: result,
+                "retries": 0, "duration_ms": round((time.perf_counter() - start) * 1000.0, 2), **fields, **extra}
+
+    cached = cache.get(cache_key) if cache and cache_key else None
+    if cached:
+        yield _sse("meta", {"source": cached["source"], "cache_hit": True})
+        yield _sse("delta", {"text": cached["analysis_result"]})
+        yield _sse("done", body(True, cached["source"], cached["analysis_result"],
+                                saved_filename=cached.get("saved_filename"), cache_hit=True))
+        return
+
+    if prepare is not None:
+        try:
+            with output_scope(filename_prefix):
+                prepared, instructions, error, extra_fields = await prepare()
+        except Exception as e:
+            print(f"Preparing {filename_prefix} failed: {e}")
+            prepared, error, extra_fields = None, str(e), {}
+        fields.update(extra_fields)
+        if prepared is None:
+            yield _sse("done", body(False, "error", "", error=error))
+            return
+        report_content = prepared
+
+    with output_scope(filename_prefix):
+        source, deltas, error = await _open_analysis_stream(report_content, instructions, req, cfg)
+    if deltas is None:
+        yield _sse("done", body(False, "error", "", error=error))
+        return
+    yield _sse("meta", {"source": source})
+
+    parts: List[str] = []
+    try:
+        async for text in deltas:
+            parts.append(text)
+            yield _sse("delta", {"text": text})
+    except Exception as e:
+        print(f"Stream from {source} interrupted: {e}")
+        yield _sse("done", body(False, source, "".join(parts), error=f"Stream interrupted: {e}"))
+        return
+
+    result = "".join(parts)
+    if not result:
+        yield _sse("done", body(False, source, "", error="Empty completion"))
+        return
+    ts = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    saved_filename = f"{filename_prefix}_{ts}.txt"
+    (_report_dir(cfg) / saved_filename).write_text(result, encoding="utf-8")
+    if cache and cache_key:
+        cache.put(cache_key, {"analysis_result": result, "source": source, "saved_filename": saved_filename})
+    yield _sse("done", body(True, source, result, saved_filename=saved_filename,
+                            **({"cache_hit": False} if cache is not None else {})))
+
+async def _error_events(result_field: str, error: str) -> AsyncIterator[str]:
+    yield _sse("done", {"ok": False, "source": "error", "ts": datetime.datetime.utcnow().isoformat(),
+                        result_field: "", "error": error, "retries": 0, "duration_ms": 0.0})
+
+@router.post("/analyze_report/stream")
+async def analyze_report_stream(req: AnalyzeReportRequest):
+    """SSE variant of /analyze_report."""
+    cfg = get_config()
+    report_path = Path(__file__).resolve().parent.parent / "Report" / req.filename
+    if not report_path.exists() or not report_path.is_file():
+        return _sse_response(_error_events("analysis_result", f"Report file '{req.filename}' not found"))
+    report_content = report_path.read_text(encoding="utf-8", errors="ignore")
+    cache = None if req.bypass_cache else _analysis_cache(cfg)
+    cache_key = _analysis_cache_key("analyze_report", report_content, req.instructions, req.provider, cfg)
+    return _sse_response(_analysis_events(report_content, req.instructions, req, cfg,
+                                          "analysis_result", "analysis", cache, cache_key))
+
+@router.post("/yield/report/stream")
+async def generate_yield_report_stream(req: YieldReportRequest):
+    """SSE variant of /yield/report."""
+    cfg = get_config()
+
+    async def build_prompt() -> Tuple[Optional[str], str, Optional[str], Dict[str, Any]]:
+        # Inside the event stream, so a failure still arrives as a done event
+        prompt, prompt_stats = _yield_report_prompt(req, cfg)
+        return prompt, req.analysis_instructions, None, {"prompt_stats": prompt_stats}
+
+    return _sse_response(_analysis_events("", req.analysis_instructions, req, cfg,
+                                          "report_content", "yield_report", prepare=build_prompt))
+
+@router.post("/yield/analyze/stream")
+async def analyze_yield_report_stream(req: YieldAnalysisRequest):
+    """SSE variant of /yield/analyze."""
+    cfg = get_config()
+    report_path = Path(__file__).resolve().parent.parent / "Report" / req.report_filename
+    if not report_path.exists() or not report_path.is_file():
+        return _sse_response(_error_events("analysis_result", f"Report file '{req.report_filename}' not found"))
+    report_content = report_path.read_text(encoding="utf-8", errors="ignore")
+    instructions = _yield_analysis_instructions(req.analysis_focus)
+    cache = None if req.bypass_cache else _analysis_cache(cfg)
+    cache_key = _analysis_cache_key(f"yield_analyze:{req.analysis_focus}", report_content, instructions, req.provider, cfg)
+    chunks = _analysis_chunks(report_content, cfg)
+
+    async def map_phase() -> Tuple[Optional[str], str, Optional[str], Dict[str, Any]]:
+        # Only the merge step is streamed; the chunks are analyzed concurrently beforehand
+        try:
+            partials, error, _, meta = await _map_chunks(chunks, instructions, req, cfg)
+        except HTTPException as e:
+            # The response has already started, so a 429 can only be reported in the done event
+            return None, instructions, str(e.detail), {}
+        return partials, _reduce_instructions(instructions, len(chunks)), error, {"routing": {"map_reduce": meta}}
+
+    return _sse_response(_analysis_events(report_content, instructions, req, cfg, "analysis_result",
+                                          f"yield_analysis_{req.analysis_focus}", cache, cache_key,
+                                          prepare=map_phase if chunks else None))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Iterator, List, Optional, Union
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+import time
+
+# Below this many seconds an upstream attempt is not worth starting
+MIN_ATTEMPT_S = 0.1
+
+class SharedDeadline:
+    """Deadline of work shared by several requests: the latest one among its current waiters.
+
+    A waiter without a deadline makes the shared work unbounded while it waits.
+    Once every waiter has left, the last deadline stays in force.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: List[Optional[float]] = []
+        self._last: Optional[float] = None
+
+    @property
+    def at(self) -> Optional[float]:
+        if not self._waiters:
+            return self._last
+        return None if None in self._waiters else max(self._waiters)  # type: ignore[type-var]
+
+    def join(self) -> Optional[float]:
+        """Add the calling request's deadline; returns it for leave()."""
+        at = _current()
+        self._waiters.append(at)
+        return at
+
+    def leave(self, at: Optional[float]) -> None:
+        self._last = self.at
+        self._waiters.remove(at)
+
+    def context(self) -> Context:
+        """Copy of the current context whose deadline follows this shared deadline."""
+        ctx = copy_context()
+        ctx.run(_deadline.set, self)
+        return ctx
+
+# Absolute time.monotonic() deadline of the current request (or a SharedDeadline); copied into tasks spawned from it
+_deadline: ContextVar[Union[None, float, SharedDeadline]] = ContextVar("research_deadline", default=None)
+
+def _current() -> Optional[float]:
+    at = _deadline.get()
+    return at.at if isinstance(at, SharedDeadline) else at
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block under a deadline ``seconds`` from now; an outer, earlier deadline still wins."""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + max(0.0, seconds)
+    outer = _current()
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def share(parts: int) -> Iterator[None]:
+    """Narrow the deadline to 1/parts of what is left, e.g. one provider out of a fallback chain.
+
+    Time a step does not use rolls over to the next one, because the next
+    share is computed from what is left at that point.
+    """
+    left = remaining()
+    with deadline_scope(None if left is None else left / max(1, parts)):
+        yield
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current request, or None without a deadline."""
+    at = _current()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left < MIN_ATTEMPT_S
+
+def budget(timeout_seconds: float) -> float:
+    """Per-call timeout: the provider's own timeout_seconds, capped by the remaining deadline."""
+    left = remaining()
+    return float(timeout_seconds) if left is None else max(MIN_ATTEMPT_S, min(float(timeout_seconds), left))
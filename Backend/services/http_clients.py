@@ -0,0 +1,163 @@
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+import asyncio, importlib.util, weakref
+
+try:
+    import httpx
+except Exception:
+    httpx = None  # type: ignore
+
+try:
+    from openai import AsyncOpenAI
+except Exception:
+    AsyncOpenAI = None  # type: ignore
+
+DEFAULT_POOL_SIZE = 10
+HTTP2_AVAILABLE = httpx is not None and importlib.util.find_spec("h2") is not None
+
+# Async clients are bound to the event loop that created them, so the registry is per loop:
+# loop -> provider name -> (config key, client, transport); a client is only rebuilt when its config key changes.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[Tuple[Any, ...], Any, Any]]]" = weakref.WeakKeyDictionary()
+
+# Pending closes of replaced clients; the loop only keeps weak references to tasks
+_closing: Set["asyncio.Task[None]"] = set()
+
+class _TrackedTransport(httpx.AsyncBaseTransport if httpx is not None else object):  # type: ignore[misc]
+    """httpx transport that counts open responses, so a replaced client can wait for them before closing."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self._inner = httpx.AsyncHTTPTransport(**kwargs)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.active = 0
+        self.closed = False
+
+    async def handle_async_request(self, request: Any) -> Any:
+        self.active += 1
+        self._idle.clear()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            self._release()
+            raise
+        response.stream = _TrackedStream(response.stream, self._release)
+        return response
+
+    def _release(self) -> None:
+        self.active -= 1
+        if not self.active:
+            self._idle.set()
+
+    async def aclose_when_idle(self) -> None:
+        await self._idle.wait()
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            await self._inner.aclose()
+
+class _TrackedStream(httpx.AsyncByteStream if httpx is not None else object):  # type: ignore[misc]
+    """Response body that reports back once it is closed, i.e. the request is over."""
+
+    def __init__(self, stream: Any, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        release, self._release = self._release, None
+        try:
+            await self._stream.aclose()
+        finally:
+            if release is not None:
+                release()
+
+def _pool_size(prov: Mapping[str, Any]) -> int:
+    return max(1, int(prov.get("pool_size", DEFAULT_POOL_SIZE)))
+
+def _use_http2(prov: Mapping[str, Any]) -> bool:
+    return HTTP2_AVAILABLE and bool(prov.get("http2", True))
+
+def _limits(prov: Mapping[str, Any]) -> Any:
+    size = _pool_size(prov)
+    return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+def _transport(prov: Mapping[str, Any]) -> Any:
+    return _TrackedTransport(limits=_limits(prov), http2=_use_http2(prov))
+
+def _get_or_build(name: str, key: Tuple[Any, ...], build) -> Any:
+    """The registered client for ``name``; ``build`` returns (client, transport) when ``key`` changed."""
+    loop = asyncio.get_running_loop()
+    slots = _clients.setdefault(loop, {})
+    entry = slots.get(name)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    client, transport = build()
+    slots[name] = (key, client, transport)
+    if entry is not None and entry[2] is not None:
+        # The replaced client may still be held by callers mid-request: its pool is closed
+        # once nothing references the client any more and its open responses are done
+        weakref.finalize(entry[1], _close_when_idle, loop, entry[2])
+    return client
+
+def _close_when_idle(loop: asyncio.AbstractEventLoop, transport: Any) -> None:
+    # Runs wherever the client is garbage collected, hence the thread-safe hand-off
+    try:
+        loop.call_soon_threadsafe(_start_close, loop, transport)
+    except RuntimeError:
+        # Loop already closed; its connections went with it
+        pass
+
+def _start_close(loop: asyncio.AbstractEventLoop, transport: Any) -> None:
+    task = loop.create_task(transport.aclose_when_idle())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+async def _aclose(client: Any) -> None:
+    try:
+        closer = getattr(client, "aclose", None) or client.close
+        await closer()
+    except Exception:
+        pass
+
+def get_async_openai_client(prov: Mapping[str, Any], api_key: str, timeout_seconds: float, name: str = "openai") -> Optional[Any]:
+    """Shared AsyncOpenAI client per provider ``name`` with a keep-alive pool, reused until its config changes."""
+    if AsyncOpenAI is None:
+        return None
+    base_url = prov.get("base_url") or None
+    key = (base_url, api_key, timeout_seconds, _pool_size(prov), _use_http2(prov))
+
+    def build():
+        # Retries are handled by services/resilience.py; SDK-level retries would multiply them
+        kwargs: Dict[str, Any] = {"api_key": api_key, "timeout": timeout_seconds, "max_retries": 0}
+        if base_url:
+            kwargs["base_url"] = base_url
+        transport = None
+        if httpx is not None:
+            transport = _transport(prov)
+            kwargs["http_client"] = httpx.AsyncClient(transport=transport, timeout=timeout_seconds)
+        return AsyncOpenAI(**kwargs), transport
+
+    return _get_or_build(name, key, build)
+
+def get_async_http_client(name: str, prov: Mapping[str, Any], headers: Mapping[str, str]) -> Optional[Any]:
+    """Shared httpx.AsyncClient per provider with a sized keep-alive pool and fixed auth headers."""
+    if httpx is None:
+        return None
+    key = (prov.get("base_url"), tuple(sorted(headers.items())), _pool_size(prov), _use_http2(prov))
+
+    def build():
+        transport = _transport(prov)
+        return httpx.AsyncClient(headers=dict(headers), transport=transport), transport
+
+    return _get_or_build(name, key, build)
+
+async def aclose_all() -> None:
+    """Close the current loop's clients, e.g. from the application lifespan on shutdown."""
+    slots = _clients.pop(asyncio.get_running_loop(), {})
+    for _, client, _ in slots.values():
+        await _aclose(client)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Any, List, Optional, Tuple
+import json, re
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)```", re.S)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+def _first_balanced_object(text: str) -> Optional[str]:
+    """The first {...} span whose braces balance, ignoring braces inside JSON strings."""
+    start = text.find("{")
+    while start != -1:
+        depth, in_string, escaped = 0, False, False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+        start = text.find("{", start + 1)
+    return None
+
+def _strip_trailing_commas(candidate: str) -> str:
+    """Drop commas directly before } or ], leaving string contents untouched."""
+    out, last = [], 0
+    in_string, escaped = False, False
+    for i, ch in enumerate(candidate):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            m = _TRAILING_COMMA.match(candidate, i)
+            if m:
+                out.append(candidate[last:i])
+                last = i + 1
+    out.append(candidate[last:])
+    return "".join(out)
+
+def extract_json_object(text: Optional[str]) -> Tuple[Optional[dict], Optional[str]]:
+    """Parse a JSON object out of a model reply; returns (object, error).
+
+    Tries, cheapest first: the raw text, the content of a ``` fence, the first
+    balanced {...} span, and that span with trailing commas removed.
+    """
+    if not text:
+        return None, "empty response"
+    raw = text.strip()
+    candidates = [raw]
+    fence = _FENCE.search(raw)
+    if fence:
+        candidates.append(fence.group(1).strip())
+    span = _first_balanced_object(candidates[-1])
+    if span is not None:
+        candidates.append(span)
+        candidates.append(_strip_trailing_commas(span))
+
+    error = None
+    for candidate in candidates:
+        try:
+            value: Any = json.loads(candidate)
+        except ValueError as e:
+            error = str(e)
+            continue
+        if isinstance(value, dict):
+            return value, None
+        error = f"expected a JSON object, got {type(value).__name__}"
+    return None, error
+
+class IncrementalObjectParser:
+    """Feed a JSON object piece by piece and get each top-level (key, value) as soon as it is complete.
+
+    Anything before the first ``{`` (a fence, prose) is skipped. A value counts as
+    complete at the ``,`` or ``}`` that follows it, so nested values arrive whole;
+    values that are not valid JSON are skipped, leaving them to the final parse.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self._buf += text
+        fields: List[Tuple[str, Any]] = []
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        try:
+                            self._key = json.loads(buf[self._key_start:i + 1])
+                        except ValueError:
+                            self._key = None
+                        self._key_start = None
+                continue
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None and self._key is None:
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]" and self._depth > 1:
+                self._depth -= 1
+            elif self._depth == 1 and ch == ":" and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif self._depth == 1 and ch in ",}":
+                self._emit(buf[self._value_start:i] if self._value_start is not None else None, fields)
+                if ch == "}":
+                    self.done = True
+        self._pos = len(buf)
+        return fields
+
+    def _emit(self, raw: Optional[str], fields: List[Tuple[str, Any]]) -> None:
+        if self._key is not None and raw is not None:
+            try:
+                fields.append((self._key, json.loads(raw)))
+            except ValueError:
+                pass
+        self._key, self._value_start = None, None
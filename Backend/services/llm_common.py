@@ -0,0 +1,295 @@
+from __future__ import annotations
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+from dataclasses import dataclass
+import os, json, datetime
+
+from .deadline import expired
+from .json_extract import IncrementalObjectParser, extract_json_object
+from .output_budget import completion_tokens, output_caps, output_key, record_output
+from .rate_limit import admit, estimate_tokens, get_limiter
+from .resilience import ProviderError, call_with_retries, deadline_error, get_breaker, provider_error
+
+# Shared by every chat backend (OpenAI, Grok and OpenAI-compatible servers)
+SYSTEM_PROMPT = (
+    "Du bist der Research-Agent einer Solana-Trading-Org. Antworte ausschließlich als VALIDES JSON "
+    "gemäß dem Schema: {idea_id, asset, thesis, entry_rule, exit_rule, risk, budget_sol, ttl_minutes, expected_catalyst}. "
+    "Rahmenbedingungen: nur Solana-Ökosystem (Spot/DEX), keine Derivate, keine Leverage. "
+    "Gib keine Prosa außerhalb des JSON zurück."
+)
+
+ANALYZE_SYSTEM_PROMPT = (
+    "You are a research analyst specializing in financial markets and trading. "
+    "Analyze the provided research report and improve it based on the given instructions. "
+    "Incorporate macro market analysis and trade detailing where relevant. "
+    "Provide a comprehensive, improved version of the report with your analysis."
+)
+
+def idea_user_content(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> str:
+    payload = {"request": req, "profile": cfg.get("investment_profile", {}), "policy": cfg.get("research_policy", {})}
+    return json.dumps(payload, ensure_ascii=False)
+
+def n_best_system_prompt(n: int) -> str:
+    """SYSTEM_PROMPT for n candidates in one completion (JSON mode needs an object, hence the "ideas" wrapper)."""
+    return (SYSTEM_PROMPT + f" Liefere genau {n} voneinander verschiedene Ideen (andere Assets oder Setups) als "
+            f'{{"ideas": [...]}}, jedes Element nach obigem Schema.')
+
+def analyze_user_content(report_content: str, instructions: str) -> str:
+    return f"Report Content:\n{report_content}\n\nInstructions:\n{instructions}"
+
+def json_response_format(prov: Mapping[str, Any], default: bool) -> Optional[Dict[str, str]]:
+    """response_format for providers.<name>.json_mode (the prompt already asks for JSON, as that mode requires)."""
+    return {"type": "json_object"} if prov.get("json_mode", default) else None
+
+def idea_field_error(key: str, value: Any, cfg: Mapping[str, Any], req: Optional[Mapping[str, Any]] = None) -> Optional[str]:
+    """Why one idea field makes the idea unusable, or None: risk within research_policy.risk_bounds,
+    asset in the request's (or policy's) universe, budget_sol > 0."""
+    policy = cfg.get("research_policy") or {}
+    if key == "risk":
+        lo, hi = (policy.get("risk_bounds") or [1, 5])[:2]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+            return f"risk {value!r} is not an integer"
+        if not lo <= value <= hi:
+            return f"risk {value} outside [{lo}, {hi}]"
+    elif key == "asset":
+        universe = (req or {}).get("universe") or policy.get("universe") or []
+        if not isinstance(value, str):
+            return f"asset {value!r} is not a string"
+        if universe and value.strip().upper() not in {str(a).strip().upper() for a in universe}:
+            return f"asset {value} not in universe {', '.join(map(str, universe))}"
+    elif key == "budget_sol":
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return f"budget_sol {value!r} is not a positive number"
+    return None
+
+def rejected_idea_error(label: str, reason: str) -> ProviderError:
+    """A well-formed answer with an unusable idea: worth another sample right away, no backoff."""
+    err = ProviderError(f"{label + ' ' if label else ''}idea rejected: {reason}", retry_after=0.0, retryable=True)
+    print(err)
+    return err
+
+def idea_stream_check(cfg: Mapping[str, Any], req: Optional[Mapping[str, Any]] = None) -> Callable[[str], Optional[str]]:
+    """A checker for one streamed idea: feed it text deltas, it returns the reason as soon as a field is invalid."""
+    parser = IncrementalObjectParser()
+
+    def feed(delta: str) -> Optional[str]:
+        for key, value in parser.feed(delta):
+            reason = idea_field_error(key, value, cfg, req)
+            if reason:
+                return reason
+        return None
+    return feed
+
+def idea_from_text(text: str, cfg: Mapping[str, Any], label: str = "", id_prefix: str = "IDEA",
+                   req: Optional[Mapping[str, Any]] = None) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
+    """Parse a model reply into an idea dict, filling the optional fields with defaults.
+
+    Fenced or prose-wrapped JSON is accepted (see json_extract.py); risk and
+    budget_sol default to the request's values when the model leaves them out.
+    """
+    data, error = extract_json_object(text)
+    if data is None:
+        err = f"{label + ' ' if label else ''}JSON Parse Error: {error}, Raw response: {text}"
+        print(err)
+        return None, err
+    reason = _complete_idea(data, cfg, id_prefix, req)
+    if reason:
+        return None, rejected_idea_error(label, reason)
+    return data, None
+
+def ideas_from_text(text: str, cfg: Mapping[str, Any], label: str = "", id_prefix: str = "IDEA",
+                    req: Optional[Mapping[str, Any]] = None) -> Tuple[Optional[List[Mapping[str, Any]]], Optional[str]]:
+    """Parse an n-best reply ({"ideas": [...]}, or a single idea) into the usable ideas; unusable ones are dropped."""
+    data, error = extract_json_object(text)
+    if data is None:
+        err = f"{label + ' ' if label else ''}JSON Parse Error: {error}, Raw response: {text}"
+        print(err)
+        return None, err
+    items = data.get("ideas") if isinstance(data.get("ideas"), list) else [data]
+    ideas: List[Mapping[str, Any]] = []
+    reasons: List[str] = []
+    for i, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            continue
+        reason = _complete_idea(item, cfg, f"{id_prefix}{i}-", req)
+        if reason:
+            reasons.append(reason)
+        else:
+            ideas.append(item)
+    if not ideas:
+        return None, rejected_idea_error(label, reasons[0] if reasons else "no ideas in the answer")
+    return ideas, None
+
+def _complete_idea(data: Dict[str, Any], cfg: Mapping[str, Any], id_prefix: str,
+                   req: Optional[Mapping[str, Any]]) -> Optional[str]:
+    """Check the policy fields and fill in defaults in place; returns why the idea is unusable, or None."""
+    # The same field checks the streaming path applies while the answer arrives
+    for key in ("risk", "asset", "budget_sol"):
+        if key in data:
+            reason = idea_field_error(key, data[key], cfg, req)
+            if reason:
+                return reason
+
+    data.setdefault("idea_id", datetime.datetime.utcnow().strftime(f"{id_prefix}%Y%m%d%H%M%S"))
+    data.setdefault("asset", "SOL")
+    data.setdefault("thesis", "No thesis")
+    data.setdefault("entry_rule", "Market BUY")
+    data.setdefault("exit_rule", "Zeit-Exit 60min")
+    data.setdefault("ttl_minutes", int((cfg.get("research_policy") or {}).get("ttl_minutes_default", 90)))
+    if req:
+        data.setdefault("risk", req.get("risk"))
+        data.setdefault("budget_sol", req.get("budget_sol"))
+    return None
+
+async def generate_with_meta(prov: Mapping[str, Any], label: str, source: str,
+                             call: Callable[[], Awaitable[Tuple[Any, Optional[str]]]]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+    """Run a generate call with retries; returns (data, source, error, retries_used).
+
+    On failure source is "fallback" when providers.<name>.enable_fallback_on_error
+    allows the router to move on, else "error".
+    """
+    data, error, retries = await call_with_retries(prov, label, call)
+    if data is not None:
+        return data, source, None, retries
+    if prov.get("enable_fallback_on_error", True):
+        return None, "fallback", error, retries
+    return None, "error", error, retries
+
+# Transport-independent chat plumbing; llm_openai and llm_grok differ only in how a request is sent.
+
+# (delta text, finish_reason) per streamed chunk
+Chunks = AsyncIterator[Tuple[Optional[str], Optional[str]]]
+
+@dataclass(frozen=True)
+class ChatTransport:
+    """How one provider sends a chat completion.
+
+    ``create(call)`` returns (text, finish_reason, usage); ``stream(call)`` opens a
+    streaming completion and returns (chunks, close). ``call`` holds the request
+    body (messages, model, max_tokens, ...); the transport adds the timeout.
+    """
+    create: Callable[[Dict[str, Any]], Awaitable[Tuple[str, Optional[str], Any]]]
+    stream: Callable[[Dict[str, Any]], Awaitable[Tuple[Chunks, Callable[[], Awaitable[None]]]]]
+
+def open_provider(cfg: Mapping[str, Any], provider: str, label: str, package_error: Optional[str],
+                  key_env: str) -> Tuple[Mapping[str, Any], Optional[str], Optional[str]]:
+    """Check that providers.<provider> may be called now; returns (prov, api_key, error).
+
+    The key comes from api_key, else the variable named by api_key_env, else ``key_env``
+    ("" for none). ``package_error`` is set when the client library is missing.
+    """
+    prov = (cfg.get("providers") or {}).get(provider) or {}
+    if not prov.get("enabled", False):
+        return prov, None, f"{label} provider disabled"
+    if package_error:
+        return prov, None, package_error
+
+    api_key = prov.get("api_key") or os.getenv(prov.get("api_key_env") or key_env)
+    if not api_key:
+        return prov, None, f"Missing {label} API key"
+
+    if expired():
+        return prov, None, deadline_error(label)
+    breaker = get_breaker(provider, prov)
+    if not breaker.allow():
+        return prov, None, breaker.open_error()
+    return prov, api_key, None
+
+def api_error(provider: str, label: str, prov: Mapping[str, Any], e: Exception) -> str:
+    """Turn a failed request into a ProviderError, feeding the breaker and the rate limiter."""
+    err = provider_error(f"{label} API Error: {e}", e)
+    # A timeout caused by our own request deadline says nothing about the provider's health
+    if not expired():
+        get_breaker(provider, prov).record(err)
+    if err.status == 429:
+        get_limiter(provider, prov).pause(err.retry_after)
+    print(err)
+    return err
+
+async def stream_checked(transport: ChatTransport, call: Dict[str, Any],
+                         check: Callable[[str], Optional[str]]) -> Tuple[str, Optional[str], Optional[str]]:
+    """Stream a completion through ``check``; returns (text, finish_reason, rejection).
+
+    Closing the stream on a rejection drops the connection, which stops the generation upstream.
+    """
+    chunks, close = await transport.stream(call)
+    parts: List[str] = []
+    finish = None
+    try:
+        async for delta, finish_reason in chunks:
+            finish = finish_reason or finish
+            if delta:
+                parts.append(delta)
+                rejection = check(delta)
+                if rejection:
+                    return "".join(parts), finish, rejection
+    finally:
+        await close()
+    return "".join(parts), finish, None
+
+async def complete_chat(transport: ChatTransport, provider: str, label: str, prov: Mapping[str, Any], kind: str,
+                        configured: int, cfg: Mapping[str, Any], call: Dict[str, Any],
+                        check: Optional[Callable[[], Callable[[str], Optional[str]]]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """One chat completion under the learned max_tokens cap (see output_budget.py); returns (text, error).
+
+    An answer cut off at the cap (finish_reason "length") is asked again with the configured maximum.
+    With ``check`` (a factory for a stream checker such as idea_stream_check) the completion is
+    streamed and abandoned as soon as the checker rejects it.
+    """
+    key = output_key(provider, kind)
+    text = None
+    for max_tokens in output_caps(key, configured, cfg):
+        limited = await admit(provider, prov, estimate_tokens("".join(m["content"] for m in call["messages"]), max_tokens))
+        if limited:
+            return None, limited
+        attempt = {**call, "max_tokens": max_tokens}
+        try:
+            if check is None:
+                text, finish, usage = await transport.create(attempt)
+            else:
+                text, finish, rejection = await stream_checked(transport, attempt, check())
+                usage = None
+                if rejection:
+                    # The provider answered fine; only the idea is unusable
+                    get_breaker(provider, prov).record_success()
+                    return None, rejected_idea_error(label, rejection)
+        except Exception as e:
+            return None, api_error(provider, label, prov, e)
+        truncated = finish == "length"
+        record_output(key, completion_tokens(usage, text), truncated)
+        if not truncated:
+            break
+        print(f"{label} answer cut off at max_tokens={max_tokens}")
+    return text, None
+
+async def stream_analysis(transport: ChatTransport, provider: str, label: str, prov: Mapping[str, Any],
+                          call: Dict[str, Any]) -> Tuple[Optional[AsyncIterator[str]], Optional[str]]:
+    """Open a streaming analysis; returns (text deltas, error) once the stream is open.
+
+    A stream cannot be re-asked once the client has seen it, so ``call`` keeps
+    the configured max_tokens.
+    """
+    key = output_key(provider, "analysis")
+    limited = await admit(provider, prov, estimate_tokens(call["messages"][1]["content"], call["max_tokens"]))
+    if limited:
+        return None, limited
+    try:
+        chunks, close = await transport.stream(call)
+    except Exception as e:
+        return None, api_error(provider, label, prov, e)
+    get_breaker(provider, prov).record_success()
+
+    async def deltas() -> AsyncIterator[str]:
+        chars, finish = 0, None
+        try:
+            async for delta, finish_reason in chunks:
+                finish = finish_reason or finish
+                if delta:
+                    chars += len(delta)
+                    yield delta
+        finally:
+            # Also on client disconnect or cancellation, so the upstream connection is released
+            await close()
+        # Streamed lengths still teach the cap for the non-streaming calls
+        record_output(key, chars // 4, finish == "length")
+
+    return deltas(), None
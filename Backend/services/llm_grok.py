@@ -1,277 +1,357 @@
 from __future__ import annotations
-from typing import Any, Mapping, Optional, Tuple
-import os, json, datetime, time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+import json, time, asyncio
 
 try:
-    import requests
+    import httpx
 except Exception:
-    requests = None  # type: ignore
-
-SYSTEM_PROMPT = (
-    "Du bist der Research-Agent einer Solana-Trading-Org. Antworte ausschließlich als VALIDES JSON "
-    "gemäß dem Schema: {idea_id, asset, thesis, entry_rule, exit_rule, risk, budget_sol, ttl_minutes, expected_catalyst}. "
-    "Rahmenbedingungen: nur Solana-Ökosystem (Spot/DEX), keine Derivate, keine Leverage. "
-    "Gib keine Prosa außerhalb des JSON zurück."
-)
-
-def call_grok_generate(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
-    prov = (cfg.get("providers") or {}).get("grok") or {}
-    if not prov.get("enabled", False):
-        return None, "Grok provider disabled"
-    if requests is None:
-        return None, "requests package not available"
-
-    # Get API key from config or environment
-    api_key = prov.get("api_key") or os.getenv("XAI_API_KEY")
-    if not api_key:
-        return None, "Missing xAI API key"
-
-    base_url = prov.get("base_url", "https://api.x.ai")
-    model = prov.get("model", "grok-beta")
-    temperature = float(prov.get("temperature", 0.2))
-    max_tokens = int(prov.get("max_output_tokens", 600))
+    httpx = None  # type: ignore
+
+from .http_clients import get_async_http_client
+from .deadline import budget, expired
+from .llm_common import (ANALYZE_SYSTEM_PROMPT, SYSTEM_PROMPT, ChatTransport, Chunks, analyze_user_content, api_error,
+                         complete_chat, generate_with_meta, idea_from_text, idea_stream_check, idea_user_content,
+                         ideas_from_text, json_response_format, n_best_system_prompt, open_provider, stream_analysis)
+from .rate_limit import admit, estimate_tokens
+from .resilience import call_with_retries, get_breaker
+
+MODELS_TO_TRY = ["grok-3", "grok-4", "grok-3-mini", "grok-code-fast-1", "grok-beta"]
+RESOLVE_TTL_SECONDS = 3600
+NEGATIVE_TTL_SECONDS = 600
+# HTTP codes that mean "this endpoint/model pair does not exist", as opposed to transient failures
+_NOT_SERVED = (404, 405)
+# Payload/auth errors; only a body naming an unknown model makes them a missing pair
+_REQUEST_ERRORS = (400, 403, 422)
+_MODEL_NOT_FOUND = ("model not found", "model_not_found", "does not exist", "unknown model", "invalid model")
+
+# (base_url, configured model) -> (endpoint, model, expires_at)
+_resolved: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
+# (endpoint, model) -> expires_at
+_failed: Dict[Tuple[str, str], float] = {}
+
+def _candidates(prov: Mapping[str, Any]) -> List[Tuple[str, str]]:
+    base_url = str(prov.get("base_url", "https://api.x.ai")).rstrip("/")
+    endpoints = [
+        f"{base_url}/v1/chat/completions",
+        f"{base_url}/chat/completions",
+        f"{base_url}/api/chat/completions",
+        "https://api.x.ai/v1/chat/completions",
+        "https://api.x.ai/chat/completions"
+    ]
+    models = [prov.get("model")] + MODELS_TO_TRY
+    endpoints = list(dict.fromkeys(endpoints))
+    models = list(dict.fromkeys(m for m in models if m))
+    return [(endpoint, model) for endpoint in endpoints for model in models]
+
+def _resolve_key(prov: Mapping[str, Any]) -> Tuple[str, str]:
+    return (str(prov.get("base_url", "https://api.x.ai")), str(prov.get("model", "")))
+
+def _status(exc: Exception) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+def _not_served(exc: Exception) -> bool:
+    """True if the error says the endpoint/model pair does not exist (404/405, or a model-not-found body)."""
+    status = _status(exc)
+    if status in _NOT_SERVED:
+        return True
+    if status in _REQUEST_ERRORS:
+        try:
+            body = exc.response.text.lower()  # type: ignore[attr-defined]
+        except Exception:
+            return False
+        return "model" in body and any(marker in body for marker in _MODEL_NOT_FOUND)
+    return False
+
+async def _post_once(client: Any, endpoint: str, model_name: str, data: Mapping[str, Any], timeout_seconds: float) -> Mapping[str, Any]:
+    current_data = dict(data)
+    current_data["model"] = model_name
+    response = await client.post(endpoint, json=current_data, timeout=timeout_seconds)
+    response.raise_for_status()
+    return response.json()
+
+async def _open_stream(client: Any, endpoint: str, model_name: str, data: Mapping[str, Any], timeout_seconds: float) -> Any:
+    """Send a streaming request and return the open response once the status is known to be OK."""
+    current_data = dict(data)
+    current_data["model"] = model_name
+    current_data["stream"] = True
+    request = client.build_request("POST", endpoint, json=current_data, timeout=timeout_seconds)
+    response = await client.send(request, stream=True)
+    if response.status_code >= 400:
+        await response.aread()
+        await response.aclose()
+        response.raise_for_status()
+    return response
+
+async def _post_chat(prov: Mapping[str, Any], client: Any, data: Mapping[str, Any], timeout_seconds: float,
+                     send: Callable[..., Awaitable[Any]] = _post_once) -> Any:
+    """POST a chat completion, reusing the last working (endpoint, model) pair.
+
+    Only on a cache miss are the endpoint/model combinations swept; pairs the
+    API reports as unknown are skipped for NEGATIVE_TTL_SECONDS. Only such a
+    "not served" answer moves on to the next pair; any other failure (auth,
+    payload, 429, 5xx, timeouts) goes straight to the caller, so retries, the
+    rate limiter and the circuit breaker see one request, and the resolved route
+    is kept. ``send`` performs the request (_post_once for JSON, _open_stream
+    for streaming).
+    """
+    key = _resolve_key(prov)
+    negative_ttl = float(prov.get("negative_ttl_seconds", NEGATIVE_TTL_SECONDS))
+    cached = _resolved.get(key)
+    if cached and cached[2] > time.monotonic():
+        endpoint, model_name, _ = cached
+        try:
+            return await send(client, endpoint, model_name, data, budget(timeout_seconds))
+        except Exception as e:
+            if not _not_served(e):
+                raise
+            print(f"Grok route {endpoint} / {model_name} stopped working, re-resolving")
+            _resolved.pop(key, None)
+            _failed[(endpoint, model_name)] = time.monotonic() + negative_ttl
+
+    last_error: Optional[Exception] = None
+    for endpoint, model_name in _candidates(prov):
+        if _failed.get((endpoint, model_name), 0.0) > time.monotonic():
+            continue
+        if expired():
+            break
+        try:
+            result = await send(client, endpoint, model_name, data, budget(timeout_seconds))
+        except Exception as e:
+            if not _not_served(e):
+                print(f"Grok API error with {endpoint} and {model_name}: {e}")
+                raise
+            last_error = e
+            _failed[(endpoint, model_name)] = time.monotonic() + negative_ttl
+            continue
+        print(f"Grok API success with endpoint: {endpoint} and model: {model_name}")
+        _resolved[key] = (endpoint, model_name, time.monotonic() + float(prov.get("resolve_ttl_seconds", RESOLVE_TTL_SECONDS)))
+        return result
+
+    if last_error is not None:
+        raise last_error
+    if expired():
+        raise asyncio.TimeoutError("Request deadline exceeded before a Grok endpoint answered")
+    raise Exception("No working xAI Grok endpoint/model combination (all negatively cached)")
+
+def _response_text(result: Mapping[str, Any]) -> str:
+    # Handle different possible response formats
+    if "choices" in result and result["choices"]:
+        return result["choices"][0]["message"]["content"]
+    elif "content" in result:
+        return result["content"]
+    elif "response" in result:
+        return result["response"]
+    return str(result)
+
+def _finish_reason(result: Mapping[str, Any]) -> Optional[str]:
+    choices = result.get("choices") if isinstance(result, Mapping) else None
+    return choices[0].get("finish_reason") if choices and isinstance(choices[0], Mapping) else None
+
+async def _stream_chunks(response: Any) -> Chunks:
+    """(delta, finish_reason) of an open SSE completion stream."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        chunk = line[5:].strip()
+        if chunk == "[DONE]":
+            break
+        try:
+            choice = json.loads(chunk)["choices"][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        yield (choice.get("delta") or {}).get("content"), choice.get("finish_reason")
+
+def _transport(client: Any, prov: Mapping[str, Any]) -> ChatTransport:
+    """Chat completions over httpx, through the resolved endpoint/model pair."""
     timeout_seconds = int(prov.get("timeout_seconds", 30))
 
-    profile = cfg.get("investment_profile", {})
-    payload = {"request": req, "profile": profile, "policy": cfg.get("research_policy", {})}
-
+    async def create(data: Dict[str, Any]) -> Tuple[str, Optional[str], Any]:
+        result = await _post_chat(prov, client, data, timeout_seconds)
+        return _response_text(result), _finish_reason(result), result.get("usage") if isinstance(result, Mapping) else None
+
+    async def stream(data: Dict[str, Any]) -> Tuple[Chunks, Any]:
+        response = await _post_chat(prov, client, data, timeout_seconds, send=_open_stream)
+        return _stream_chunks(response), response.aclose
+    return ChatTransport(create, stream)
+
+def _client(cfg: Mapping[str, Any]) -> Tuple[Any, Mapping[str, Any], Optional[str]]:
+    """Resolve the provider section and shared client; returns (client, prov, error)."""
+    prov, api_key, err = open_provider(cfg, "grok", "Grok", "httpx package not available" if httpx is None else None,
+                                       "XAI_API_KEY")
+    if err:
+        return None, prov, err
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
+    return get_async_http_client("grok", prov, headers), prov, None
+
+def grok_resolution() -> Dict[str, Any]:
+    """Current resolution cache state for the health endpoint."""
+    now = time.monotonic()
+    return {"resolved": [{"base_url": k[0], "endpoint": v[0], "model": v[1], "expires_in_s": round(v[2] - now)}
+                         for k, v in _resolved.items() if v[2] > now],
+            "negative_cached": sum(1 for exp in _failed.values() if exp > now)}
+
+async def aprobe_grok(cfg: Mapping[str, Any]) -> Optional[str]:
+    """Resolve the working endpoint/model pair up front with a minimal completion."""
+    client, prov, err = _client(cfg)
+    if err:
+        return err
+    data = {"messages": [{"role": "user", "content": "ping"}], "max_tokens": 1, "stream": False}
+    try:
+        await _post_chat(prov, client, data, int(prov.get("timeout_seconds", 30)))
+        return None
+    except Exception as e:
+        err = f"Grok probe failed: {e}"
+        print(err)
+        return err
+
+async def acall_grok_generate(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
+    client, prov, err = _client(cfg)
+    if err:
+        return None, err
+
+    model = prov.get("model", "grok-beta")
+    temperature = float(prov.get("temperature", 0.2))
 
     # xAI Grok API Format - korrigierter Endpoint
     data = {
         "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+            {"role": "user", "content": idea_user_content(req, cfg)}
         ],
         "model": model,
         "temperature": temperature,
-        "max_tokens": max_tokens,
         "stream": False
     }
+    response_format = json_response_format(prov, True)
+    if response_format:
+        data["response_format"] = response_format
+
+    # Streamed ideas are checked field by field and cancelled as soon as one is unusable
+    check = (lambda: idea_stream_check(cfg, req)) if prov.get("stream_ideas", True) else None
+    text, err = await complete_chat(_transport(client, prov), "grok", "Grok", prov, "idea",
+                                    int(prov.get("max_output_tokens", 600)), cfg, data, check)
+    if err:
+        return None, err
+    get_breaker("grok", prov).record_success()
 
-    try:
-        # Try different possible endpoints and models for xAI Grok
-        models_to_try = ["grok-3", "grok-4", "grok-3-mini", "grok-code-fast-1", "grok-beta"]
-        endpoints_to_try = []
-
-        # Generate all combinations of endpoints and models
-        base_endpoints = [
-            f"{base_url}/v1/chat/completions",
-            f"{base_url}/chat/completions",
-            f"{base_url}/api/chat/completions",
-            "https://api.x.ai/v1/chat/completions",
-            "https://api.x.ai/chat/completions"
-        ]
-
-        for endpoint in base_endpoints:
-            for model in models_to_try:
-                endpoints_to_try.append((endpoint, model))
-
-        response = None
-        for endpoint, model_name in endpoints_to_try:
-            try:
-                # Update the data with the current model
-                current_data = data.copy()
-                current_data["model"] = model_name
-
-                response = requests.post(
-                    endpoint,
-                    headers=headers,
-                    json=current_data,
-                    timeout=timeout_seconds
-                )
-                response.raise_for_status()
-                print(f"Grok API success with endpoint: {endpoint} and model: {model_name}")
-                break  # Success, stop trying other combinations
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    continue  # Try next combination
-                else:
-                    print(f"Grok API error with {endpoint} and {model_name}: {e}")
-                    continue  # Try next combination
-            except Exception as e:
-                print(f"Grok API connection error with {endpoint} and {model_name}: {e}")
-                continue  # Try next combination
-
-        if response is None:
-            raise Exception("All xAI Grok endpoints returned 404")
-        response.raise_for_status()
+    return idea_from_text(text, cfg, "Grok", "GROK", req=req)
 
-        result = response.json()
-        # Handle different possible response formats
-        if "choices" in result and result["choices"]:
-            text = result["choices"][0]["message"]["content"]
-        elif "content" in result:
-            text = result["content"]
-        elif "response" in result:
-            text = result["response"]
-        else:
-            text = str(result)
+async def acall_grok_generate_n(req: Mapping[str, Any], n: int, cfg: Mapping[str, Any]) -> Tuple[Optional[List[Mapping[str, Any]]], Optional[str]]:
+    """n candidate ideas from one round trip; returns (usable ideas, error).
 
-    except Exception as e:
-        err = f"Grok API Error: {e}"
-        print(err)
+    One completion returns {"ideas": [...]}; with providers.grok.native_n the API's
+    ``n`` samples the candidates as separate choices instead.
+    """
+    client, prov, err = _client(cfg)
+    if err:
         return None, err
 
+    native = bool(prov.get("native_n", False))
+    configured = int(prov.get("max_output_tokens", 600))
+    data: Dict[str, Any] = {
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT if native else n_best_system_prompt(n)},
+            {"role": "user", "content": idea_user_content(req, cfg)}
+        ],
+        "model": prov.get("model", "grok-beta"),
+        # Candidates need some spread; at a low temperature they come out alike
+        "temperature": float(prov.get("n_best_temperature", 0.8)),
+        "stream": False
+    }
+    response_format = json_response_format(prov, True)
+    if response_format:
+        data["response_format"] = response_format
+
+    if not native:
+        text, err = await complete_chat(_transport(client, prov), "grok", "Grok", prov, "ideas", configured * n, cfg, data)
+        if err:
+            return None, err
+        get_breaker("grok", prov).record_success()
+        return ideas_from_text(text, cfg, "Grok", "GROK", req=req)
+
+    data.update(n=n, max_tokens=configured)
+    limited = await admit("grok", prov, estimate_tokens(SYSTEM_PROMPT + data["messages"][1]["content"], configured * n))
+    if limited:
+        return None, limited
     try:
-        data = json.loads(text)
+        result = await _post_chat(prov, client, data, int(prov.get("timeout_seconds", 30)))
     except Exception as e:
-        err = f"Grok JSON Parse Error: {e}, Raw response: {text}"
-        print(err)
-        return None, err
-
-    data.setdefault("idea_id", datetime.datetime.utcnow().strftime("GROK%Y%m%d%H%M%S"))
-    data.setdefault("asset", "SOL")
-    data.setdefault("thesis", "No thesis")
-    data.setdefault("entry_rule", "Market BUY")
-    data.setdefault("exit_rule", "Zeit-Exit 60min")
-    data.setdefault("ttl_minutes", int((cfg.get("research_policy") or {}).get("ttl_minutes_default", 90)))
-    return data, None
-
-def call_grok_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-    prov = (cfg.get("providers") or {}).get("grok") or {}
-    if not prov.get("enabled", False):
-        return None, "Grok provider disabled"
-    if requests is None:
-        return None, "requests package not available"
-
-    # Get API key from config or environment
-    api_key = prov.get("api_key") or os.getenv("XAI_API_KEY")
-    if not api_key:
-        return None, "Missing xAI API key"
-
-    base_url = prov.get("base_url", "https://api.x.ai")
-    model = prov.get("model", "grok-beta")
-    temperature = float(prov.get("temperature", 0.2))
-    max_tokens = int(prov.get("max_output_tokens", 2000))
-    timeout_seconds = int(prov.get("timeout_seconds", 30))
-
-    system_prompt = (
-        "You are a research analyst specializing in financial markets and trading. "
-        "Analyze the provided research report and improve it based on the given instructions. "
-        "Incorporate macro market analysis and trade detailing where relevant. "
-        "Provide a comprehensive, improved version of the report with your analysis."
-    )
-
-    user_content = f"Report Content:\n{report_content}\n\nInstructions:\n{instructions}"
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
+        return None, api_error("grok", "Grok", prov, e)
+    get_breaker("grok", prov).record_success()
+
+    ideas: List[Mapping[str, Any]] = []
+    error = None
+    for i, choice in enumerate(result.get("choices") or [], 1):
+        idea, error = idea_from_text((choice.get("message") or {}).get("content") or "", cfg, "Grok", f"GROK{i}-", req=req)
+        if idea is not None:
+            ideas.append(idea)
+    return (ideas, None) if ideas else (None, error or "Grok returned no choices")
+
+def _analyze_data(report_content: str, instructions: str, prov: Mapping[str, Any]) -> Dict[str, Any]:
     # xAI Grok API Format
-    data = {
+    return {
         "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content}
+            {"role": "system", "content": ANALYZE_SYSTEM_PROMPT},
+            {"role": "user", "content": analyze_user_content(report_content, instructions)}
         ],
-        "model": model,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
+        "model": prov.get("model", "grok-beta"),
+        "temperature": float(prov.get("temperature", 0.2)),
+        "max_tokens": int(prov.get("max_output_tokens", 2000)),
         "stream": False
     }
 
-    try:
-        # Try different possible endpoints and models for xAI Grok
-        models_to_try = ["grok-3", "grok-4", "grok-3-mini", "grok-code-fast-1", "grok-beta"]
-        endpoints_to_try = []
-
-        # Generate all combinations of endpoints and models
-        base_endpoints = [
-            f"{base_url}/v1/chat/completions",
-            f"{base_url}/chat/completions",
-            f"{base_url}/api/chat/completions",
-            "https://api.x.ai/v1/chat/completions",
-            "https://api.x.ai/chat/completions"
-        ]
-
-        for endpoint in base_endpoints:
-            for model in models_to_try:
-                endpoints_to_try.append((endpoint, model))
-
-        response = None
-        for endpoint, model_name in endpoints_to_try:
-            try:
-                # Update the data with the current model
-                current_data = data.copy()
-                current_data["model"] = model_name
-
-                response = requests.post(
-                    endpoint,
-                    headers=headers,
-                    json=current_data,
-                    timeout=timeout_seconds
-                )
-                response.raise_for_status()
-                print(f"Grok API success with endpoint: {endpoint} and model: {model_name}")
-                break  # Success, stop trying other combinations
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    continue  # Try next combination
-                else:
-                    print(f"Grok API error with {endpoint} and {model_name}: {e}")
-                    continue  # Try next combination
-            except Exception as e:
-                print(f"Grok API connection error with {endpoint} and {model_name}: {e}")
-                continue  # Try next combination
-
-        if response is None:
-            raise Exception("All xAI Grok endpoints returned 404")
-        response.raise_for_status()
+async def _analyze_once(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    client, prov, err = _client(cfg)
+    if err:
+        return None, err
 
-        result = response.json()
-        # Handle different possible response formats
-        if "choices" in result and result["choices"]:
-            text = result["choices"][0]["message"]["content"]
-        elif "content" in result:
-            text = result["content"]
-        elif "response" in result:
-            text = result["response"]
-        else:
-            text = str(result)
-
-        return text, None
-    except Exception as e:
-        err = f"Grok API Error: {e}"
-        print(err)
+    text, err = await complete_chat(_transport(client, prov), "grok", "Grok", prov, "analysis",
+                                    int(prov.get("max_output_tokens", 2000)), cfg, _analyze_data(report_content, instructions, prov))
+    if err:
         return None, err
+    get_breaker("grok", prov).record_success()
+    return text, None
 
-def call_grok_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+async def acall_grok_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    prov = (cfg.get("providers") or {}).get("grok") or {}
+    text, error, _ = await call_with_retries(prov, "Grok", lambda: _analyze_once(report_content, instructions, cfg))
+    return text, error
+
+async def astream_grok_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[AsyncIterator[str]], Optional[str]]:
+    """Streaming variant of acall_grok_analyze; returns (text deltas, error) once the stream is open."""
+    client, prov, err = _client(cfg)
+    if err:
+        return None, err
+
+    return await stream_analysis(_transport(client, prov), "grok", "Grok", prov, _analyze_data(report_content, instructions, prov))
+
+async def acall_grok_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
     """
     Enhanced Grok call with retry/backoff and metadata.
     Returns: (data, source, error, retries_used)
     """
     prov = (cfg.get("providers") or {}).get("grok") or {}
-    retries = int(prov.get("retries", 1))
-    backoff_ms = int(prov.get("backoff_ms", 500))
-    enable_fallback = prov.get("enable_fallback_on_error", True)
-
-    # Try Grok with retries
-    for attempt in range(retries + 1):
-        data, error = call_grok_generate(req, cfg)
-
-        if data is not None:
-            return data, "grok", None, attempt
-
-        # Check if it's a rate limit or quota error
-        if error and ("429" in error or "rate" in error.lower() or "quota" in error.lower()):
-            if attempt < retries:
-                print(f"Grok rate limit error, retrying in {backoff_ms}ms (attempt {attempt + 1}/{retries + 1})")
-                time.sleep(backoff_ms / 1000.0)
-                continue
-            else:
-                print(f"Grok rate limit error after {retries + 1} attempts, falling back")
-                break
-        else:
-            # Non-rate-limit error, don't retry
-            break
+    return await generate_with_meta(prov, "Grok", "grok", lambda: acall_grok_generate(req, cfg))
+
+async def acall_grok_generate_n_with_meta(req: Mapping[str, Any], n: int, cfg: Mapping[str, Any]) -> Tuple[Optional[List[Mapping[str, Any]]], str, Optional[str], int]:
+    """acall_grok_generate_n with retry/backoff; returns (ideas, source, error, retries_used)."""
+    prov = (cfg.get("providers") or {}).get("grok") or {}
+    return await generate_with_meta(prov, "Grok", "grok", lambda: acall_grok_generate_n(req, n, cfg))
+
+# Blocking wrappers for scripts and tests; inside an event loop use the acall_* variants.
+
+def call_grok_generate(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
+    return asyncio.run(acall_grok_generate(req, cfg))
+
+def call_grok_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    return asyncio.run(acall_grok_analyze(report_content, instructions, cfg))
+
+def call_grok_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+    return asyncio.run(acall_grok_generate_with_meta(req, cfg))
 
-    # If we get here, Grok failed and we should use fallback
-    if enable_fallback:
-        return None, "fallback", error, retries
-    else:
-        return None, "error", error, retries
\ No newline at end of file
+def probe_grok(cfg: Mapping[str, Any]) -> Optional[str]:
+    return asyncio.run(aprobe_grok(cfg))
@@ -1,153 +1,204 @@
 from __future__ import annotations
-from typing import Any, Mapping, Optional, Tuple
-import os, json, datetime, time
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+import asyncio
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 except Exception:
-    OpenAI = None  # type: ignore
-
-SYSTEM_PROMPT = (
-    "Du bist der Research-Agent einer Solana-Trading-Org. Antworte ausschließlich als VALIDES JSON "
-    "gemäß dem Schema: {idea_id, asset, thesis, entry_rule, exit_rule, risk, budget_sol, ttl_minutes, expected_catalyst}. "
-    "Rahmenbedingungen: nur Solana-Ökosystem (Spot/DEX), keine Derivate, keine Leverage. "
-    "Gib keine Prosa außerhalb des JSON zurück."
-)
-
-def call_openai_generate(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
-    prov = (cfg.get("providers") or {}).get("openai") or {}
-    if not prov.get("enabled", False):
-        return None, "OpenAI provider disabled"
-    if OpenAI is None:
-        return None, "openai package not available"
-
-    # Get API key from config or environment
-    api_key = prov.get("api_key") or os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None, "Missing OpenAI API key"
-
+    AsyncOpenAI = None  # type: ignore
+
+from .http_clients import get_async_openai_client
+from .deadline import budget
+from .llm_common import (ANALYZE_SYSTEM_PROMPT, SYSTEM_PROMPT, ChatTransport, Chunks, analyze_user_content, api_error,
+                         complete_chat, generate_with_meta, idea_from_text, idea_stream_check, idea_user_content,
+                         ideas_from_text, json_response_format, n_best_system_prompt, open_provider, stream_analysis)
+from .rate_limit import admit, estimate_tokens
+from .resilience import call_with_retries, get_breaker
+
+# Every function takes ``provider``, the key under providers: in the config. Besides "openai"
+# itself this serves any OpenAI-compatible server (vLLM, llama.cpp, Ollama, ...) via base_url.
+
+def _label(provider: str) -> str:
+    return "OpenAI" if provider == "openai" else provider
+
+def _client(cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Any, Mapping[str, Any], Optional[str]]:
+    """Resolve the provider section and shared client; returns (client, prov, error)."""
+    # Only the openai provider falls back to OPENAI_API_KEY, so the key never goes to another backend
+    prov, api_key, err = open_provider(cfg, provider, _label(provider),
+                                       "openai package not available" if AsyncOpenAI is None else None,
+                                       "OPENAI_API_KEY" if provider == "openai" else "")
+    if err:
+        return None, prov, err
     timeout_seconds = int(prov.get("timeout_seconds", 30))
-    client = OpenAI(api_key=api_key, timeout=timeout_seconds)
+    return get_async_openai_client(prov, api_key, timeout_seconds, name=provider), prov, None
+
+async def _chunks(stream: Any) -> Chunks:
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        yield (choice.delta.content if choice.delta else None), choice.finish_reason
+
+def _transport(client: Any, prov: Mapping[str, Any]) -> ChatTransport:
+    """Chat completions through the openai SDK client."""
+    timeout_seconds = prov.get("timeout_seconds", 30)
+
+    async def create(call: Dict[str, Any]) -> Tuple[str, Optional[str], Any]:
+        resp = await client.chat.completions.create(timeout=budget(timeout_seconds), **call)
+        return resp.choices[0].message.content, resp.choices[0].finish_reason, getattr(resp, "usage", None)
+
+    async def stream(call: Dict[str, Any]) -> Tuple[Chunks, Any]:
+        opened = await client.chat.completions.create(stream=True, timeout=budget(timeout_seconds), **call)
+        return _chunks(opened), opened.close
+    return ChatTransport(create, stream)
+
+async def acall_openai_generate(req: Mapping[str, Any], cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
+    client, prov, err = _client(cfg, provider)
+    if err:
+        return None, err
 
     model = prov.get("model", "gpt-4o-mini")
     temperature = float(prov.get("temperature", 0.2))
-    max_tokens = int(prov.get("max_output_tokens", 600))
-
-    profile = cfg.get("investment_profile", {})
-    payload = {"request": req, "profile": profile, "policy": cfg.get("research_policy", {})}
 
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)}
+        {"role": "user", "content": idea_user_content(req, cfg)}
     ]
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        text = resp.choices[0].message.content
-    except Exception as e:
-        err = f"OpenAI API Error: {e}"
-        print(err)
-        return None, err
-
-    try:
-        data = json.loads(text)
-    except Exception as e:
-        err = f"JSON Parse Error: {e}, Raw response: {text}"
-        print(err)
+    kwargs: Dict[str, Any] = {}
+    # JSON mode by default only for OpenAI itself; other compatible servers opt in via json_mode
+    response_format = json_response_format(prov, provider == "openai")
+    if response_format:
+        kwargs["response_format"] = response_format
+
+    # Streamed ideas are checked field by field and cancelled as soon as one is unusable
+    check = (lambda: idea_stream_check(cfg, req)) if prov.get("stream_ideas", True) else None
+    text, err = await complete_chat(_transport(client, prov), provider, _label(provider), prov, "idea",
+                                    int(prov.get("max_output_tokens", 600)), cfg,
+                                    dict(model=model, messages=messages, temperature=temperature, **kwargs), check)
+    if err:
         return None, err
 
-    data.setdefault("idea_id", datetime.datetime.utcnow().strftime("IDEA%Y%m%d%H%M%S"))
-    data.setdefault("asset", "SOL")
-    data.setdefault("thesis", "No thesis")
-    data.setdefault("entry_rule", "Market BUY")
-    data.setdefault("exit_rule", "Zeit-Exit 60min")
-    data.setdefault("ttl_minutes", int((cfg.get("research_policy") or {}).get("ttl_minutes_default", 90)))
-    return data, None
-
-def call_openai_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-    prov = (cfg.get("providers") or {}).get("openai") or {}
-    if not prov.get("enabled", False):
-        return None, "OpenAI provider disabled"
-    if OpenAI is None:
-        return None, "openai package not available"
+    get_breaker(provider, prov).record_success()
+    return idea_from_text(text, cfg, _label(provider), req=req)
 
-    # Get API key from config or environment
-    api_key = prov.get("api_key") or os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None, "Missing OpenAI API key"
-
-    timeout_seconds = int(prov.get("timeout_seconds", 30))
-    client = OpenAI(api_key=api_key, timeout=timeout_seconds)
-
-    model = prov.get("model", "gpt-4o-mini")
-    temperature = float(prov.get("temperature", 0.2))
-    max_tokens = int(prov.get("max_output_tokens", 2000))
+async def acall_openai_generate_n(req: Mapping[str, Any], n: int, cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[List[Mapping[str, Any]]], Optional[str]]:
+    """n candidate ideas from one round trip; returns (usable ideas, error).
 
-    system_prompt = (
-        "You are a research analyst specializing in financial markets and trading. "
-        "Analyze the provided research report and improve it based on the given instructions. "
-        "Incorporate macro market analysis and trade detailing where relevant. "
-        "Provide a comprehensive, improved version of the report with your analysis."
-    )
-
-    user_content = f"Report Content:\n{report_content}\n\nInstructions:\n{instructions}"
+    With providers.<name>.native_n (default for OpenAI itself) the API's ``n``
+    samples n choices in parallel; otherwise one completion returns {"ideas": [...]}.
+    """
+    client, prov, err = _client(cfg, provider)
+    if err:
+        return None, err
 
+    native = bool(prov.get("native_n", provider == "openai"))
+    configured = int(prov.get("max_output_tokens", 600))
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_content}
+        {"role": "system", "content": SYSTEM_PROMPT if native else n_best_system_prompt(n)},
+        {"role": "user", "content": idea_user_content(req, cfg)}
     ]
-
+    kwargs: Dict[str, Any] = dict(model=prov.get("model", "gpt-4o-mini"), messages=messages,
+                                  # Candidates need some spread; at a low temperature they come out alike
+                                  temperature=float(prov.get("n_best_temperature", 0.8)))
+    response_format = json_response_format(prov, provider == "openai")
+    if response_format:
+        kwargs["response_format"] = response_format
+
+    if not native:
+        text, err = await complete_chat(_transport(client, prov), provider, _label(provider), prov, "ideas",
+                                        configured * n, cfg, kwargs)
+        if err:
+            return None, err
+        get_breaker(provider, prov).record_success()
+        return ideas_from_text(text, cfg, _label(provider), req=req)
+
+    limited = await admit(provider, prov, estimate_tokens(SYSTEM_PROMPT + messages[1]["content"], configured * n))
+    if limited:
+        return None, limited
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        text = resp.choices[0].message.content
-        return text, None
+        resp = await client.chat.completions.create(n=n, max_tokens=configured, timeout=budget(prov.get("timeout_seconds", 30)), **kwargs)
     except Exception as e:
-        err = f"OpenAI API Error: {e}"
-        print(err)
+        return None, api_error(provider, _label(provider), prov, e)
+    get_breaker(provider, prov).record_success()
+
+    ideas: List[Mapping[str, Any]] = []
+    error = None
+    for i, choice in enumerate(resp.choices, 1):
+        data, error = idea_from_text(choice.message.content, cfg, _label(provider), f"IDEA{i}-", req=req)
+        if data is not None:
+            ideas.append(data)
+    return (ideas, None) if ideas else (None, error)
+
+def _analyze_kwargs(report_content: str, instructions: str, prov: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "model": prov.get("model", "gpt-4o-mini"),
+        "messages": [
+            {"role": "system", "content": ANALYZE_SYSTEM_PROMPT},
+            {"role": "user", "content": analyze_user_content(report_content, instructions)}
+        ],
+        "temperature": float(prov.get("temperature", 0.2)),
+    }
+
+async def _analyze_once(report_content: str, instructions: str, cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[str], Optional[str]]:
+    client, prov, err = _client(cfg, provider)
+    if err:
         return None, err
 
-def call_openai_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+    text, err = await complete_chat(_transport(client, prov), provider, _label(provider), prov, "analysis",
+                                    int(prov.get("max_output_tokens", 2000)), cfg, _analyze_kwargs(report_content, instructions, prov))
+    if err:
+        return None, err
+    get_breaker(provider, prov).record_success()
+    return text, None
+
+async def acall_openai_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[str], Optional[str]]:
+    prov = (cfg.get("providers") or {}).get(provider) or {}
+    text, error, _ = await call_with_retries(prov, _label(provider), lambda: _analyze_once(report_content, instructions, cfg, provider))
+    return text, error
+
+async def astream_openai_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[AsyncIterator[str]], Optional[str]]:
+    """Streaming variant of acall_openai_analyze; returns (text deltas, error) once the stream is open."""
+    client, prov, err = _client(cfg, provider)
+    if err:
+        return None, err
+
+    call = dict(_analyze_kwargs(report_content, instructions, prov), max_tokens=int(prov.get("max_output_tokens", 2000)))
+    return await stream_analysis(_transport(client, prov), provider, _label(provider), prov, call)
+
+async def acall_openai_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
     """
     Enhanced OpenAI call with retry/backoff and metadata.
     Returns: (data, source, error, retries_used)
     """
-    prov = (cfg.get("providers") or {}).get("openai") or {}
-    retries = int(prov.get("retries", 1))
-    backoff_ms = int(prov.get("backoff_ms", 500))
-    enable_fallback = prov.get("enable_fallback_on_error", True)
+    prov = (cfg.get("providers") or {}).get(provider) or {}
+    return await generate_with_meta(prov, _label(provider), provider, lambda: acall_openai_generate(req, cfg, provider))
+
+async def acall_openai_generate_n_with_meta(req: Mapping[str, Any], n: int, cfg: Mapping[str, Any], provider: str = "openai") -> Tuple[Optional[List[Mapping[str, Any]]], str, Optional[str], int]:
+    """acall_openai_generate_n with retry/backoff; returns (ideas, source, error, retries_used)."""
+    prov = (cfg.get("providers") or {}).get(provider) or {}
+    return await generate_with_meta(prov, _label(provider), provider, lambda: acall_openai_generate_n(req, n, cfg, provider))
+
+async def aprobe_openai(cfg: Mapping[str, Any], provider: str = "openai") -> Optional[str]:
+    """Cheap connectivity check (model list); returns None when the backend answers."""
+    client, prov, err = _client(cfg, provider)
+    if err:
+        return err
+    try:
+        await client.models.list(timeout=budget(prov.get("timeout_seconds", 30)))
+        return None
+    except Exception as e:
+        err = f"{_label(provider)} probe failed: {e}"
+        print(err)
+        return err
 
-    # Try OpenAI with retries
-    for attempt in range(retries + 1):
-        data, error = call_openai_generate(req, cfg)
+# Blocking wrappers for scripts and tests; inside an event loop use the acall_* variants.
 
-        if data is not None:
-            return data, "openai", None, attempt
-
-        # Check if it's a quota/429 error that we should retry
-        if error and ("429" in error or "insufficient_quota" in error or "quota" in error.lower()):
-            if attempt < retries:
-                print(f"OpenAI quota error, retrying in {backoff_ms}ms (attempt {attempt + 1}/{retries + 1})")
-                time.sleep(backoff_ms / 1000.0)
-                continue
-            else:
-                print(f"OpenAI quota error after {retries + 1} attempts, falling back")
-                break
-        else:
-            # Non-quota error, don't retry
-            break
-
-    # If we get here, OpenAI failed and we should use fallback
-    if enable_fallback:
-        return None, "fallback", error, retries
-    else:
-        return None, "error", error, retries
+def call_openai_generate(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], Optional[str]]:
+    return asyncio.run(acall_openai_generate(req, cfg))
+
+def call_openai_analyze(report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    return asyncio.run(acall_openai_analyze(report_content, instructions, cfg))
+
+def call_openai_generate_with_meta(req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+    return asyncio.run(acall_openai_generate_with_meta(req, cfg))
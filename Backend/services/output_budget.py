@@ -0,0 +1,88 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import math, threading
+
+# What the current request generates (e.g. "yield_analyze:risk"); set by the router, nested with "/"
+_kind: ContextVar[Optional[str]] = ContextVar("research_output_kind", default=None)
+
+@contextmanager
+def output_scope(kind: str) -> Iterator[None]:
+    outer = _kind.get()
+    token = _kind.set(kind if outer is None else f"{outer}/{kind}")
+    try:
+        yield
+    finally:
+        _kind.reset(token)
+
+def _settings(cfg: Mapping[str, Any]) -> Mapping[str, Any]:
+    return cfg.get("output_tokens") or {}
+
+class OutputBudget:
+    """Observed completion lengths per provider and output kind, and the max_tokens cap derived from them.
+
+    Only complete answers are sampled; a truncated one is counted and re-asked
+    with the configured maximum, whose full length is then sampled instead.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[int]] = {}
+        self._truncated: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def cap(self, key: str, configured: int, settings: Mapping[str, Any]) -> int:
+        """percentile of the observed lengths plus margin, never above the configured maximum."""
+        with self._lock:
+            samples = sorted(self._samples.get(key) or ())
+        if len(samples) < int(settings.get("min_samples", 20)):
+            return configured
+        pct = float(settings.get("percentile", 0.99))
+        observed = samples[min(len(samples) - 1, math.ceil(pct * len(samples)) - 1)]
+        adaptive = math.ceil(observed * (1.0 + float(settings.get("margin", 0.15))))
+        return min(configured, max(int(settings.get("min_tokens", 64)), adaptive))
+
+    def record(self, key: str, tokens: int, truncated: bool) -> None:
+        with self._lock:
+            if truncated:
+                self._truncated[key] = self._truncated.get(key, 0) + 1
+                return
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(int(tokens))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            keys = set(self._samples) | set(self._truncated)
+            return {key: {"samples": len(self._samples.get(key) or ()), "max_seen": max(self._samples.get(key) or [0]),
+                          "truncated": self._truncated.get(key, 0)} for key in sorted(keys)}
+
+_budget = OutputBudget()
+
+def output_key(provider: str, kind: str) -> str:
+    """Statistics key; take it when the call starts, since a stream is recorded after the scope has ended."""
+    return f"{provider}:{_kind.get() or kind}"
+
+def output_caps(key: str, configured: int, cfg: Mapping[str, Any]) -> List[int]:
+    """max_tokens per attempt: the learned cap, then the configured maximum should that answer be cut off."""
+    settings = _settings(cfg)
+    if not settings.get("adaptive", False):
+        return [configured]
+    cap = _budget.cap(key, configured, settings)
+    return [cap] if cap >= configured else [cap, configured]
+
+def record_output(key: str, tokens: int, truncated: bool) -> None:
+    _budget.record(key, tokens, truncated)
+
+def completion_tokens(usage: Any, text: Optional[str]) -> int:
+    """usage.completion_tokens (object or dict) when the API reports it, else ~4 characters per token."""
+    value = usage.get("completion_tokens") if isinstance(usage, Mapping) else getattr(usage, "completion_tokens", None)
+    if isinstance(value, int):
+        return value
+    return len(text or "") // 4
+
+def output_states() -> Dict[str, Dict[str, Any]]:
+    return _budget.snapshot()
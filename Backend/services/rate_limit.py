@@ -0,0 +1,179 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio, heapq, itertools, math, time
+
+from .deadline import remaining
+from .resilience import ProviderError
+
+# How often queued callers re-check whether it is their turn
+POLL_INTERVAL_S = 0.05
+
+# Lower runs first; interactive requests use 0, background work such as batches a higher value
+_priority: ContextVar[int] = ContextVar("research_priority", default=0)
+
+class RateLimited(ProviderError):
+    """Local admission refusal: the provider's queue is full or the wait would overrun the deadline."""
+
+    def __new__(cls, message: str, retry_after: float) -> "RateLimited":
+        return super().__new__(cls, message, status=429, retry_after=retry_after, retryable=False)
+
+@contextmanager
+def priority_scope(priority: int) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+def estimate_tokens(prompt_text: str, max_output_tokens: int) -> int:
+    """Rough upstream token cost: ~4 characters per prompt token plus the completion budget."""
+    return len(prompt_text) // 4 + int(max_output_tokens)
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute up to ``burst``."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst) if burst else max(1.0, per_minute / 6.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (capped at the burst size) is available."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+class ProviderLimiter:
+    """Requests/min and tokens/min buckets for one provider behind a bounded priority queue.
+
+    Callers are admitted in (priority, arrival) order. When max_queue callers
+    are already waiting, or the expected wait exceeds the request deadline,
+    acquire() returns a RateLimited error with a Retry-After estimate instead
+    of queueing.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests: Optional[TokenBucket] = None
+        self.tokens: Optional[TokenBucket] = None
+        self.max_queue = 50
+        self.paused_until = 0.0
+        self.rejected = 0
+        self._settings: Optional[tuple] = None
+        self._queue: List[list] = []
+        self._seq = itertools.count()
+
+    def configure(self, prov: Mapping[str, Any]) -> "ProviderLimiter":
+        rl = prov.get("rate_limit") or {}
+        settings = (rl.get("requests_per_min"), rl.get("tokens_per_min"), rl.get("burst_requests"), rl.get("burst_tokens"))
+        if settings != self._settings:
+            # Only rebuild the buckets when the config actually changed, so their levels survive reloads
+            self._settings = settings
+            self.requests = TokenBucket(float(settings[0]), settings[2]) if settings[0] else None
+            self.tokens = TokenBucket(float(settings[1]), settings[3]) if settings[1] else None
+        self.max_queue = int(rl.get("max_queue", self.max_queue))
+        return self
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = max(0.0, self.paused_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _backlog_time(self, tokens: int, now: float) -> float:
+        """Rough time until the queue plus one more call of ``tokens`` would drain."""
+        wait = self._wait_time(tokens, now)
+        if self.requests is not None:
+            wait += len(self._queue) / self.requests.rate
+        if self.tokens is not None:
+            wait += sum(e[2] for e in self._queue) / self.tokens.rate
+        return wait
+
+    def pause(self, seconds: Optional[float]) -> None:
+        """Hold all calls for ``seconds`` after the provider itself answered 429."""
+        self.paused_until = max(self.paused_until, time.monotonic() + (seconds if seconds else 1.0))
+
+    def _refuse(self, reason: str, retry_after: float) -> RateLimited:
+        self.rejected += 1
+        return RateLimited(f"{self.name} rate limit: {reason}", retry_after=round(retry_after, 3))
+
+    async def acquire(self, tokens: int = 0) -> Optional[RateLimited]:
+        if self.requests is None and self.tokens is None and self.paused_until <= time.monotonic():
+            return None
+        now = time.monotonic()
+        if not self._queue and self._wait_time(tokens, now) <= 0:
+            self._take(tokens)
+            return None
+        if len(self._queue) >= self.max_queue:
+            return self._refuse("admission queue full", self._backlog_time(tokens, now))
+        left = remaining()
+        if left is not None and self._backlog_time(tokens, now) > left:
+            return self._refuse("wait exceeds the request deadline", self._backlog_time(tokens, now))
+
+        entry = [_priority.get(), next(self._seq), tokens]
+        heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                now = time.monotonic()
+                if self._queue[0] is entry:
+                    wait = self._wait_time(tokens, now)
+                    if wait <= 0:
+                        heapq.heappop(self._queue)
+                        self._take(tokens)
+                        return None
+                else:
+                    wait = POLL_INTERVAL_S
+                left = remaining()
+                if left is not None and wait > left:
+                    return self._refuse("wait exceeds the request deadline", wait)
+                await asyncio.sleep(min(wait, POLL_INTERVAL_S))
+        finally:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+
+    def _take(self, tokens: int) -> None:
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {"queued": len(self._queue), "max_queue": self.max_queue, "rejected": self.rejected,
+                "requests_available": round(self.requests.level, 1) if self.requests else None,
+                "tokens_available": round(self.tokens.level) if self.tokens else None,
+                "paused_for_s": round(max(0.0, self.paused_until - now), 1)}
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+def get_limiter(name: str, prov: Mapping[str, Any]) -> ProviderLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = _limiters[name] = ProviderLimiter(name)
+    return limiter.configure(prov)
+
+async def admit(name: str, prov: Mapping[str, Any], tokens: int = 0) -> Optional[RateLimited]:
+    """Wait for provider ``name``'s rate limits; returns None when admitted, else the refusal."""
+    return await get_limiter(name, prov).acquire(tokens)
+
+def limiter_states() -> Dict[str, Dict[str, Any]]:
+    return {name: l.snapshot() for name, l in _limiters.items()}
+
+def retry_after_header(error: ProviderError) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after or 0)))}
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+from abc import ABC, abstractmethod
+import asyncio, weakref
+
+from .llm_openai import acall_openai_analyze, acall_openai_generate_n_with_meta, acall_openai_generate_with_meta, aprobe_openai, astream_openai_analyze
+from .llm_grok import acall_grok_analyze, acall_grok_generate_n_with_meta, acall_grok_generate_with_meta, aprobe_grok, astream_grok_analyze
+
+DEFAULT_WORKERS = 8
+
+class Provider(ABC):
+    """An LLM backend as the router sees it: generate, analyze, stream and health.
+
+    Each provider owns a worker pool (providers.<name>.workers concurrent
+    upstream calls) so a slow backend only queues its own callers. Subclasses
+    must implement generate, generate_n, analyze, stream and probe.
+    """
+
+    kind = "base"
+
+    def __init__(self, name: str):
+        self.name = name
+        # Semaphores are bound to an event loop, so the pool is kept per loop
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[int, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self.busy = 0
+
+    def settings(self, cfg: Mapping[str, Any]) -> Mapping[str, Any]:
+        return (cfg.get("providers") or {}).get(self.name) or {}
+
+    def enabled(self, cfg: Mapping[str, Any]) -> bool:
+        return bool(self.settings(cfg).get("enabled", False))
+
+    def pool(self, cfg: Mapping[str, Any]) -> asyncio.Semaphore:
+        size = max(1, int(self.settings(cfg).get("workers", DEFAULT_WORKERS)))
+        loop = asyncio.get_running_loop()
+        entry = self._pools.get(loop)
+        if entry is None or entry[0] != size:
+            entry = self._pools[loop] = (size, asyncio.Semaphore(size))
+        return entry[1]
+
+    @abstractmethod
+    async def generate(self, req: Mapping[str, Any], cfg: Mapping[str, Any]) -> Tuple[Optional[Mapping[str, Any]], str, Optional[str], int]:
+        ...
+
+    @abstractmethod
+    async def generate_n(self, req: Mapping[str, Any], n: int, cfg: Mapping[str, Any]) -> Tuple[Optional[List[Mapping[str, Any]]], str, Optional[str], int]:
+        """n candidate ideas in one round trip: (ideas, source, error, retries)."""
+
+    @abstractmethod
+    async def analyze(self, report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        ...
+
+    @abstractmethod
+    async def stream(self, report_content: str, instructions: str, cfg: Mapping[str, Any]) -> Tuple[Optional[AsyncIterator[str]], Optional[str]]:
+        ...
+
+    @abstractmethod
+    async def probe(self, cfg: Mapping[str, Any]) -> Optional[str]:
+        """Connectivity check; None when healthy, else the error."""
+
+    def status(self, cfg: Mapping[str, Any]) -> Dict[str, Any]:
+        prov = self.settings(cfg)
+        return {"type": self.kind, "enabled": self.enabled(cfg), "model": prov.get("model"),
+                "base_url": prov.get("base_url"), "workers": int(prov.get("workers", DEFAULT_WORKERS)),
+                "busy": self.busy, "timeout_s": prov.get("timeout_seconds")}
+
+class OpenAICompatibleProvider(Provider):
+    """OpenAI itself or any server speaking its chat completions API (set base_url)."""
+
+    kind = "openai_compatible"
+
+    async def generate(self, req, cfg):
+        return await acall_openai_generate_with_meta(req, cfg, self.name)
+
+    async def generate_n(self, req, n, cfg):
+        return await acall_openai_generate_n_with_meta(req, n, cfg, self.name)
+
+    async def analyze(self, report_content, instructions, cfg):
+        return await acall_openai_analyze(report_content, instructions, cfg, self.name)
+
+    async def stream(self, report_content, instructions, cfg):
+        return await astream_openai_analyze(report_content, instructions, cfg, self.name)
+
+    async def probe(self, cfg):
+        return await aprobe_openai(cfg, self.name)
+
+class GrokProvider(Provider):
+    """xAI Grok with its endpoint/model resolution (see llm_grok.py)."""
+
+    kind = "grok"
+
+    async def generate(self, req, cfg):
+        return await acall_grok_generate_with_meta(req, cfg)
+
+    async def generate_n(self, req, n, cfg):
+        return await acall_grok_generate_n_with_meta(req, n, cfg)
+
+    async def analyze(self, report_content, instructions, cfg):
+        return await acall_grok_analyze(report_content, instructions, cfg)
+
+    async def stream(self, report_content, instructions, cfg):
+        return await astream_grok_analyze(report_content, instructions, cfg)
+
+    async def probe(self, cfg):
+        return await aprobe_grok(cfg)
+
+# providers.<name>.type -> implementation for entries beyond the built-ins
+PROVIDER_TYPES = {"openai_compatible": OpenAICompatibleProvider, "grok": GrokProvider}
+
+# Built-ins first; their order is the default order for provider="auto"
+_registry: Dict[str, Provider] = {"openai": OpenAICompatibleProvider("openai"), "grok": GrokProvider("grok")}
+# Providers defined by config entries with a ``type``; rebuilt from each config snapshot
+_configured: Dict[str, Provider] = {}
+
+def register(provider: Provider) -> Provider:
+    _registry[provider.name] = provider
+    return provider
+
+def get_provider(name: str) -> Optional[Provider]:
+    return _registry.get(name) or _configured.get(name)
+
+def _sync_configured(cfg: Mapping[str, Any]) -> None:
+    """Make _configured match cfg: new entries are added, dropped or retyped ones removed, unchanged ones kept."""
+    wanted: Dict[str, type] = {}
+    for name, prov in (cfg.get("providers") or {}).items():
+        kind = (prov or {}).get("type") if isinstance(prov, Mapping) else None
+        if not kind or name in _registry:
+            continue
+        cls = PROVIDER_TYPES.get(kind)
+        if cls is None:
+            print(f"Unknown provider type '{kind}' for '{name}', skipping")
+            continue
+        wanted[name] = cls
+    for name in [n for n, p in _configured.items() if type(p) is not wanted.get(n)]:
+        del _configured[name]
+    for name, cls in wanted.items():
+        if name not in _configured:
+            _configured[name] = cls(name)
+
+def provider_names(cfg: Mapping[str, Any]) -> List[str]:
+    """Every LLM provider known to the router: the built-ins plus config entries with a ``type``.
+
+    The config entries follow the snapshot passed in, so after a hot reload a
+    removed or renamed backend disappears and a new OpenAI-compatible one only
+    needs a providers: section with type: openai_compatible.
+    """
+    _sync_configured(cfg)
+    return list(_registry) + list(_configured)
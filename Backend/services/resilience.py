@@ -0,0 +1,208 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+import asyncio, email.utils, random, re, time
+
+from .deadline import MIN_ATTEMPT_S, remaining
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server-side failures
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+class ProviderError(str):
+    """Error message that also carries what the retry engine needs.
+
+    Subclassing str keeps the services' (value, error) tuples and every
+    existing string check working unchanged.
+    """
+    status: Optional[int]
+    retry_after: Optional[float]
+    retryable: bool
+
+    def __new__(cls, message: str, status: Optional[int] = None, retry_after: Optional[float] = None,
+                retryable: bool = False) -> "ProviderError":
+        obj = super().__new__(cls, message)
+        obj.status = status
+        obj.retry_after = retry_after
+        obj.retryable = retryable
+        return obj
+
+_duration_part = re.compile(r"([\d.]+)(ms|s|m|h)")
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI-style reset durations like '1s', '6m0s' or '20ms'."""
+    total, matched = 0.0, False
+    for number, unit in _duration_part.findall(value):
+        matched = True
+        total += float(number) * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}[unit]
+    return total if matched else None
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After or rate-limit reset headers."""
+    if not headers:
+        return None
+    h = {k.lower(): v for k, v in headers.items()}
+    if "retry-after-ms" in h:
+        try:
+            return max(0.0, float(h["retry-after-ms"]) / 1000.0)
+        except ValueError:
+            pass
+    if "retry-after" in h:
+        value = h["retry-after"].strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value) if value else None
+            if parsed is not None:
+                return max(0.0, parsed.timestamp() - time.time())
+    # OpenAI / xAI: durations until the request or token window resets
+    resets = [_parse_duration(h[k]) for k in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens") if k in h]
+    resets = [r for r in resets if r is not None]
+    if resets and (h.get("x-ratelimit-remaining-requests") == "0" or h.get("x-ratelimit-remaining-tokens") == "0"):
+        return max(resets)
+    # Twitter: epoch seconds when the window resets
+    if "x-rate-limit-reset" in h and h.get("x-rate-limit-remaining", "0") == "0":
+        try:
+            return max(0.0, float(h["x-rate-limit-reset"]) - time.time())
+        except ValueError:
+            pass
+    return None
+
+def provider_error(message: str, exc: Optional[BaseException] = None, status: Optional[int] = None,
+                   headers: Optional[Mapping[str, str]] = None) -> ProviderError:
+    """Classify a failed provider call from the exception or the raw HTTP status/headers."""
+    response = getattr(exc, "response", None) if exc is not None else None
+    if status is None:
+        status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if headers is None and response is not None:
+        headers = getattr(response, "headers", None)
+    if status is None:
+        # No HTTP status: connection errors and timeouts are transient, anything else is a bug/config issue
+        name = type(exc).__name__.lower() if exc is not None else ""
+        retryable = any(word in name for word in ("timeout", "connect", "network", "remoteprotocol"))
+    else:
+        retryable = status in RETRYABLE_STATUS and "insufficient_quota" not in message
+    return ProviderError(message, status=status, retry_after=retry_after_seconds(headers), retryable=retryable)
+
+def is_retryable(error: Optional[str]) -> bool:
+    if isinstance(error, ProviderError):
+        return error.retryable
+    # Plain strings from older code paths: keep the historic rate-limit heuristic
+    return bool(error) and ("429" in error or "rate" in error.lower() or "quota" in error.lower())
+
+def deadline_error(label: str) -> ProviderError:
+    return ProviderError(f"{label}: request deadline exceeded", retryable=False)
+
+def backoff_delay(attempt: int, base_s: float, cap_s: float, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter; a server-provided Retry-After wins (capped at cap_s)."""
+    if retry_after is not None:
+        return min(cap_s, retry_after)
+    return random.uniform(0.0, min(cap_s, base_s * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Per-provider breaker: closed -> open after N consecutive failures -> half-open probe -> closed."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    def configure(self, prov: Mapping[str, Any]) -> "CircuitBreaker":
+        cb = prov.get("circuit_breaker") or {}
+        self.failure_threshold = int(cb.get("failure_threshold", self.failure_threshold))
+        self.reset_seconds = float(cb.get("reset_seconds", self.reset_seconds))
+        return self
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if self.state == "open" and now - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self._probe_in_flight = False
+        # A probe that never reported back (e.g. cancelled) must not wedge the breaker
+        if self.state == "half_open" and (not self._probe_in_flight or now - self._probe_started > self.reset_seconds):
+            self._probe_in_flight = True
+            self._probe_started = now
+            return True
+        return False
+
+    def rejecting(self) -> bool:
+        """True while the breaker is open and its reset time has not come; unlike allow() it changes nothing."""
+        return self.state == "open" and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record(self, error: Optional[str]) -> None:
+        """Record an attempt outcome; only transient failures count against the provider.
+
+        Non-retryable errors (bad key, unknown model, rejected payload) say nothing
+        about the provider's health and leave the breaker as it is; a half-open
+        probe that ends that way keeps its slot until reset_seconds have passed.
+        """
+        if error is None:
+            self.record_success()
+        elif is_retryable(error):
+            self.record_failure()
+
+    def open_error(self) -> ProviderError:
+        wait = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+        return ProviderError(f"{self.name} circuit open, skipping call", retry_after=wait, retryable=False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures,
+                "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.state != "closed" else None}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str, prov: Mapping[str, Any]) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker.configure(prov)
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {name: b.snapshot() for name, b in _breakers.items()}
+
+async def call_with_retries(prov: Mapping[str, Any], label: str,
+                            call: Callable[[], Awaitable[Tuple[Any, Optional[str]]]]) -> Tuple[Any, Optional[str], int]:
+    """Run ``call`` (returning (value, error)) with jittered exponential backoff.
+
+    Returns (value, error, retries_used). Only retryable errors are retried,
+    at most providers.<name>.retries times, and only while the request
+    deadline (services/deadline.py) leaves room for the wait plus another attempt.
+    """
+    retries = int(prov.get("retries", 1))
+    base_s = int(prov.get("backoff_ms", 500)) / 1000.0
+    cap_s = int(prov.get("max_backoff_ms", 8000)) / 1000.0
+    error: Optional[str] = None
+    for attempt in range(retries + 1):
+        value, error = await call()
+        if value is not None:
+            return value, None, attempt
+        if attempt < retries and is_retryable(error):
+            delay = backoff_delay(attempt, base_s, cap_s, getattr(error, "retry_after", None))
+            left = remaining()
+            if left is not None and delay + MIN_ATTEMPT_S > left:
+                print(f"{label} retryable error, but the request deadline leaves no time for a retry")
+                return None, error, attempt
+            print(f"{label} retryable error, retrying in {delay * 1000:.0f}ms (attempt {attempt + 1}/{retries + 1})")
+            await asyncio.sleep(delay)
+            continue
+        return None, error, attempt
+    return None, error, retries
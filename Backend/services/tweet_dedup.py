@@ -0,0 +1,57 @@
+from __future__ import annotations
+from typing import Any, Dict, FrozenSet, List, Mapping, Sequence, Tuple
+import hashlib, re, struct
+
+_URL = re.compile(r"https?://\S+")
+_RT = re.compile(r"^rt @\w+:\s*")
+_TOKEN = re.compile(r"[a-z0-9$#@']+")
+# 32 MinHash values of 16 bits come from one 64-byte blake2b digest per feature
+_HASHES = 32
+_UNPACK = struct.Struct(f">{_HASHES}H").unpack
+_BANDS, _ROWS = 16, 2
+# Candidates compared per band bucket; keeps the pass linear when one shill text floods a bucket
+_MAX_BUCKET = 32
+
+def features(text: str) -> FrozenSet[str]:
+    """Words and word pairs of the normalized text (case, links and RT prefix ignored)."""
+    words = _TOKEN.findall(_RT.sub("", _URL.sub(" ", text.lower()).strip()))
+    return frozenset(words) | {f"{a} {b}" for a, b in zip(words, words[1:])} or frozenset({""})
+
+def minhash(feats: FrozenSet[str]) -> Tuple[int, ...]:
+    return tuple(map(min, zip(*(_UNPACK(hashlib.blake2b(f.encode("utf-8"), digest_size=64).digest()) for f in feats))))
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / float(len(a | b))
+
+def dedupe_tweets(tweets: Sequence[Mapping[str, Any]], threshold: float = 0.6) -> Tuple[List[Dict[str, Any]], int]:
+    """Collapse near-identical tweets (Jaccard of words and word pairs >= threshold); returns (kept, dropped).
+
+    The first tweet of each group is kept with ``dup_count`` set to the number
+    of tweets it stands for (an incoming dup_count is added up). Candidates come
+    from LSH band buckets of the MinHash signature and are confirmed with the
+    exact Jaccard, so the pass is linear in the number of tweets.
+    """
+    buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(_BANDS)]
+    kept: List[Dict[str, Any]] = []
+    kept_features: List[FrozenSet[str]] = []
+    for tweet in tweets:
+        weight = int(tweet.get("dup_count", 1) or 1)
+        feats = features(str(tweet.get("text", "")))
+        sig = minhash(feats)
+        keys = [sig[b * _ROWS:(b + 1) * _ROWS] for b in range(_BANDS)]
+        match = None
+        for key, bucket in zip(keys, buckets):
+            for idx in bucket.get(key, ())[:_MAX_BUCKET]:
+                if jaccard(feats, kept_features[idx]) >= threshold:
+                    match = idx
+                    break
+            if match is not None:
+                break
+        if match is not None:
+            kept[match]["dup_count"] += weight
+            continue
+        for key, bucket in zip(keys, buckets):
+            bucket.setdefault(key, []).append(len(kept))
+        kept.append({**tweet, "dup_count": weight})
+        kept_features.append(feats)
+    return kept, len(tweets) - len(kept)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from pathlib import Path
+import datetime, json, sqlite3, threading, time
+
+def tweet_ts(created_at: Optional[str]) -> float:
+    """Epoch seconds of an API created_at ("2024-05-01T12:00:00.000Z"); 0.0 when missing."""
+    if not created_at:
+        return 0.0
+    try:
+        return datetime.datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+def query_key(query: str) -> str:
+    return " ".join(query.split())
+
+class TweetStore:
+    """SQLite store of search results per query, with the coverage of what has been fetched.
+
+    ``covered_from`` is the start of the contiguous span the store holds up to
+    the last poll; ``newest_id`` is the since_id for the next poll.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS tweets (query TEXT, id TEXT, ts REAL, data TEXT, PRIMARY KEY (query, id))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS tweets_by_time ON tweets (query, ts)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, newest_id TEXT, covered_from REAL, last_poll REAL)")
+
+    def state(self, query: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT newest_id, covered_from, last_poll FROM queries WHERE query = ?", (query_key(query),)).fetchone()
+        return None if row is None else {"newest_id": row[0], "covered_from": row[1], "last_poll": row[2]}
+
+    def add(self, query: str, tweets: Sequence[Mapping[str, Any]], newest_id: Optional[str] = None,
+            covered_from: Optional[float] = None, polled: bool = False) -> None:
+        """Upsert tweets and move the query's coverage; None leaves a coverage field as it is."""
+        key = query_key(query)
+        rows = [(key, str(t["id"]), tweet_ts(t.get("created_at")), json.dumps(dict(t), ensure_ascii=False)) for t in tweets if t.get("id")]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO tweets VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("INSERT OR IGNORE INTO queries (query) VALUES (?)", (key,))
+            if newest_id is not None:
+                self._db.execute("UPDATE queries SET newest_id = ? WHERE query = ?", (newest_id, key))
+            if covered_from is not None:
+                self._db.execute("UPDATE queries SET covered_from = ? WHERE query = ?", (covered_from, key))
+            if polled:
+                self._db.execute("UPDATE queries SET last_poll = ? WHERE query = ?", (time.time(), key))
+
+    def window(self, query: str, since: float, limit: int) -> List[Dict[str, Any]]:
+        """Stored tweets created at or after ``since``, newest first."""
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM tweets WHERE query = ? AND ts >= ? ORDER BY ts DESC, id DESC LIMIT ?",
+                                    (query_key(query), since, int(limit))).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def prune(self, older_than: float) -> int:
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM tweets WHERE ts < ?", (older_than,)).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+            queries = self._db.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        return {"path": str(self.path), "tweets": count, "queries": queries}
+
+_stores: Dict[str, TweetStore] = {}
+_stores_lock = threading.Lock()
+
+def get_tweet_store(prov: Mapping[str, Any]) -> Optional[TweetStore]:
+    """The store configured under providers.twitter.store, or None when disabled."""
+    settings = prov.get("store") or {}
+    if not settings.get("enabled", False):
+        return None
+    path = str(Path(__file__).resolve().parents[2] / settings.get("path", "Cache/tweets.sqlite3"))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = TweetStore(Path(path))
+        return store
+
+def store_states() -> Dict[str, Dict[str, Any]]:
+    return {path: store.stats() for path, store in _stores.items()}
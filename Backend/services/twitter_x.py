@@ -1,44 +1,193 @@
 from __future__ import annotations
-from typing import Any, Mapping, List, Dict, Tuple
-import datetime
+from typing import Any, AsyncIterator, Mapping, List, Dict, Optional, Tuple
+import asyncio, datetime, time
 try:
-    import requests
+    import httpx
 except Exception:
-    requests = None  # type: ignore
+    httpx = None  # type: ignore
 
-def recent_search(cfg: Mapping[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
-    """Return tweets and error message if any."""
+from .http_clients import get_async_http_client
+from .deadline import budget, expired
+from .rate_limit import admit, get_limiter
+from .resilience import call_with_retries, deadline_error, get_breaker, provider_error
+from .tweet_dedup import dedupe_tweets
+from .tweet_store import TweetStore, get_tweet_store, tweet_ts
+
+# Recent search only reaches back seven days
+SEARCH_WINDOW_S = 7 * 24 * 3600
+
+def _api_time(epoch: float) -> str:
+    return datetime.datetime.utcfromtimestamp(epoch).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _tweet(t: Mapping[str, Any]) -> Dict[str, Any]:
+    tweet = {"id": t.get("id"), "text": t.get("text"), "created_at": t.get("created_at")}
+    if t.get("public_metrics"):
+        tweet["public_metrics"] = t["public_metrics"]
+    return tweet
+
+async def asearch_pages(cfg: Mapping[str, Any], params: Mapping[str, Any],
+                        max_pages: int = 1) -> AsyncIterator[Tuple[List[Dict[str, Any]], Optional[str], bool]]:
+    """Yield (tweets, error, more) per page of a recent search, following meta.next_token up to max_pages.
+
+    ``params`` are the search parameters (query, start_time, since_id, ...);
+    ``more`` says whether a next_token remained, so the last page shows whether
+    max_pages cut the results short. An error ends the iteration after being
+    yielded with an empty page.
+    """
     prov = (cfg.get("providers") or {}).get("twitter") or {}
-    if not prov.get("enabled", False):
-        return [], "Twitter provider is not enabled"
     token = cfg.get("env", {}).get("X_BEARER_TOKEN")
     if not token:
-        return [], "Twitter bearer token not found in environment variables"
-    if requests is None:
-        return [], "Requests library not available"
+        yield [], "Twitter bearer token not found in environment variables", False
+        return
+    if httpx is None:
+        yield [], "httpx library not available", False
+        return
     base = prov.get("base_url", "https://api.twitter.com/2").rstrip("/")
-    ep = prov.get("recent_search_endpoint", "/tweets/search/recent")
-    url = base + ep
-    params = {
-        "query": prov.get("query", "(SOL OR Solana) (DEX OR DeFi) -is:retweet lang:en"),
-        "max_results": min(int(prov.get("max_results", 25)), 100)
-    }
-    # Add start_time if lookback_minutes is specified
-    lookback_minutes = prov.get("lookback_minutes")
-    if lookback_minutes:
-        start_time = datetime.datetime.utcnow() - datetime.timedelta(minutes=lookback_minutes)
-        params["start_time"] = start_time.isoformat() + "Z"
-    try:
-        r = requests.get(url, headers={"Authorization": f"Bearer {token}"}, params=params, timeout=10)
+    url = base + prov.get("recent_search_endpoint", "/tweets/search/recent")
+    client = get_async_http_client("twitter", prov, {"Authorization": f"Bearer {token}"})
+    breaker = get_breaker("twitter", prov)
+
+    async def attempt(page_params: Mapping[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if expired():
+            return None, deadline_error("Twitter")
+        if not breaker.allow():
+            return None, breaker.open_error()
+        limited = await admit("twitter", prov)
+        if limited:
+            return None, limited
+        try:
+            r = await client.get(url, params=page_params, timeout=budget(prov.get("timeout_seconds", 10)))
+        except Exception as e:
+            err = provider_error(f"Request failed: {str(e)}", e)
+            breaker.record(err)
+            return None, err
         if r.status_code != 200:
             try:
                 error_data = r.json()
                 error_msg = error_data.get("title", f"HTTP {r.status_code}")
             except:
                 error_msg = f"HTTP {r.status_code}: {r.text[:100]}"
-            return [], f"Twitter API error: {error_msg}"
-        data = r.json()
-        tweets = [{"id": t.get("id"), "text": t.get("text"), "created_at": t.get("created_at")} for t in data.get("data", [])]
-        return tweets, ""
-    except Exception as e:
-        return [], f"Request failed: {str(e)}"
\ No newline at end of file
+            err = provider_error(f"Twitter API error: {error_msg}", status=r.status_code, headers=r.headers)
+            breaker.record(err)
+            if r.status_code == 429:
+                get_limiter("twitter", prov).pause(err.retry_after)
+            return None, err
+        breaker.record_success()
+        return r.json(), None
+
+    page_params = {"tweet.fields": "created_at,public_metrics", **params}
+    for _ in range(max(1, max_pages)):
+        try:
+            data, error, _ = await call_with_retries({"retries": 1, **prov}, "Twitter", lambda: attempt(page_params))
+        except Exception as e:
+            data, error = None, f"Request failed: {str(e)}"
+        if data is None:
+            yield [], error or "Twitter request failed", False
+            return
+        next_token = (data.get("meta") or {}).get("next_token")
+        yield [_tweet(t) for t in data.get("data", [])], None, bool(next_token)
+        if not next_token:
+            return
+        page_params = {**page_params, "next_token": next_token}
+
+async def _fetch(cfg: Mapping[str, Any], params: Mapping[str, Any], max_pages: int) -> Tuple[List[Dict[str, Any]], bool, Optional[str]]:
+    """All pages for ``params``: (tweets, complete, error); complete is False when max_pages cut the results short."""
+    tweets: List[Dict[str, Any]] = []
+    more = False
+    async for page, error, more in asearch_pages(cfg, params, max_pages):
+        if error:
+            return tweets, False, error
+        tweets.extend(page)
+    return tweets, not more, None
+
+async def _sync_store(store: TweetStore, cfg: Mapping[str, Any], query: str, since: float,
+                      settings: Mapping[str, Any]) -> Optional[str]:
+    """Bring the store up to date for tweets since ``since``: new tweets via since_id, older gaps via start/end_time."""
+    max_pages = int(settings.get("max_pages", 5))
+    page_size = 100
+    state = await asyncio.to_thread(store.state, query)
+    now = time.time()
+
+    if state is None or state["covered_from"] is None:
+        tweets, complete, error = await _fetch(cfg, {"query": query, "max_results": page_size, "start_time": _api_time(since)}, max_pages)
+        if error and not tweets:
+            return error
+        # Pages come newest first, so a cut-off fetch covers only back to its oldest tweet
+        covered = since if complete else min((tweet_ts(t["created_at"]) for t in tweets), default=now)
+        newest = max((t["id"] for t in tweets), key=int, default=None)
+        await asyncio.to_thread(store.add, query, tweets, newest, covered, True)
+        return error
+
+    error = None
+    if now - (state["last_poll"] or 0.0) >= float(settings.get("min_poll_seconds", 30)):
+        params: Dict[str, Any] = {"query": query, "max_results": page_size}
+        if state["newest_id"]:
+            params["since_id"] = state["newest_id"]
+        else:
+            params["start_time"] = _api_time(state["covered_from"])
+        tweets, complete, error = await _fetch(cfg, params, max_pages)
+        if not error or tweets:
+            newest = max((t["id"] for t in tweets), key=int, default=None)
+            # A gap between this poll and the stored tweets shrinks the contiguous coverage
+            covered = None if complete else min((tweet_ts(t["created_at"]) for t in tweets), default=now)
+            await asyncio.to_thread(store.add, query, tweets, newest, covered, not error)
+
+    state = await asyncio.to_thread(store.state, query)
+    if since < state["covered_from"] and not error:
+        params = {"query": query, "max_results": page_size, "start_time": _api_time(since), "end_time": _api_time(state["covered_from"])}
+        tweets, complete, error = await _fetch(cfg, params, max_pages)
+        if not error or tweets:
+            covered = since if complete else min((tweet_ts(t["created_at"]) for t in tweets), default=state["covered_from"])
+            await asyncio.to_thread(store.add, query, tweets, None, min(covered, state["covered_from"]))
+
+    retention = float(settings.get("retention_hours", 168)) * 3600.0
+    await asyncio.to_thread(store.prune, now - max(retention, SEARCH_WINDOW_S))
+    return error
+
+def _dedupe(tweets: List[Dict[str, Any]], prov: Mapping[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """Near-duplicates collapsed into one tweet with dup_count (providers.twitter.dedup), cut to limit."""
+    if not prov.get("dedup", True):
+        return tweets[:limit]
+    kept, dropped = dedupe_tweets(tweets, float(prov.get("dedup_threshold", 0.6)))
+    if dropped:
+        print(f"Twitter dedup: {dropped} of {len(tweets)} tweets were near-duplicates")
+    return kept[:limit]
+
+async def arecent_search(cfg: Mapping[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+    """Return tweets and error message if any.
+
+    With providers.twitter.store enabled the window (lookback_minutes) is served
+    from the local tweet store, which only fetches what it does not hold yet.
+    Near-identical tweets come back once, with dup_count as their weight.
+    """
+    prov = (cfg.get("providers") or {}).get("twitter") or {}
+    if not prov.get("enabled", False):
+        return [], "Twitter provider is not enabled"
+    query = prov.get("query", "(SOL OR Solana) (DEX OR DeFi) -is:retweet lang:en")
+    limit = int(prov.get("max_results", 25))
+    lookback_minutes = prov.get("lookback_minutes")
+
+    store = get_tweet_store(prov)
+    if store is None:
+        params: Dict[str, Any] = {"query": query, "max_results": min(max(limit, 10), 100)}
+        # Add start_time if lookback_minutes is specified
+        if lookback_minutes:
+            params["start_time"] = _api_time(time.time() - float(lookback_minutes) * 60.0)
+        async for tweets, error, _ in asearch_pages(cfg, params):
+            return (_dedupe(tweets, prov, limit), "") if not error else ([], error)
+        return [], "Twitter request failed"
+
+    since = time.time() - min(float(lookback_minutes or 60) * 60.0, SEARCH_WINDOW_S - 60)
+    error = await _sync_store(store, cfg, query, since, prov.get("store") or {})
+    # Read past the limit so that collapsed duplicates still leave limit distinct tweets
+    window = limit * int(prov.get("dedup_overfetch", 4)) if prov.get("dedup", True) else limit
+    tweets = await asyncio.to_thread(lambda: _dedupe(store.window(query, since, window), prov, limit))
+    if error:
+        if not tweets:
+            return [], error
+        print(f"Twitter sync failed ({error}), serving {len(tweets)} stored tweets")
+    return tweets, ""
+
+def recent_search(cfg: Mapping[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+    """Blocking wrapper around arecent_search for use outside an event loop."""
+    return asyncio.run(arecent_search(cfg))
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import asyncio, time
+from .config_loader import get_config
+from .prompt_budget import build_tweet_block
+from .services.twitter_x import arecent_search
+
+def signal_settings(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    routing = cfg.get("routing") or {}
+    return {"enabled": bool(routing.get("use_twitter_signals", False))
+                       and bool(((cfg.get("providers") or {}).get("twitter") or {}).get("enabled", False)),
+            "refresh_seconds": max(5.0, float(routing.get("twitter_refresh_seconds", 120))),
+            "max_age_seconds": float(routing.get("twitter_max_age_seconds", 900)),
+            "digest": bool(routing.get("twitter_digest", True)),
+            "digest_tokens": int(routing.get("twitter_digest_tokens", 300)),
+            "digest_tokens_per_tweet": int(routing.get("twitter_digest_tokens_per_tweet", 60))}
+
+class SignalSnapshot:
+    """Latest Twitter signals, refreshed off the request path; readers never wait on the API.
+
+    A failed refresh keeps the previous tweets; they are served until they are
+    older than max_age_seconds.
+    """
+
+    def __init__(self):
+        self.tweets: List[Dict[str, Any]] = []
+        self.fetched_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.refreshes = 0
+        self._digests: Dict[Tuple[float, int, int], str] = {}
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def refresh(self, cfg: Mapping[str, Any]) -> None:
+        start = time.perf_counter()
+        tweets, error = await arecent_search(cfg)
+        self.refreshes += 1
+        self.error = error or None
+        if error:
+            print(f"Twitter signal refresh failed: {error}")
+            return
+        self.tweets, self.fetched_at, self._digests = list(tweets), time.time(), {}
+        print(f"Twitter signals refreshed: {len(tweets)} tweets in {(time.perf_counter() - start) * 1000.0:.0f}ms")
+
+    async def run(self) -> None:
+        """Refresh every refresh_seconds until cancelled.
+
+        The config is read each round, so a hot reload changes the interval, the
+        query or the enable flag; while signals are off the loop only idles.
+        """
+        while True:
+            cfg = get_config()
+            settings = signal_settings(cfg)
+            if settings["enabled"]:
+                try:
+                    await self.refresh(cfg)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"Twitter signal refresh failed: {e}")
+            await asyncio.sleep(settings["refresh_seconds"])
+
+    def current(self, cfg: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Snapshot tweets, or [] when stale; a missing snapshot starts one refresh in the background."""
+        settings = signal_settings(cfg)
+        if not settings["enabled"]:
+            return []
+        if self.fetched_at is None:
+            # No refresher running (e.g. no lifespan): fill the snapshot for the next request
+            if self._refreshing is None or self._refreshing.done():
+                try:
+                    self._refreshing = asyncio.get_running_loop().create_task(self.refresh(cfg))
+                except RuntimeError:
+                    pass
+            return []
+        if time.time() - self.fetched_at > settings["max_age_seconds"]:
+            return []
+        return self.tweets
+
+    def digest(self, cfg: Mapping[str, Any]) -> str:
+        """Compact rendering of the current snapshot for the idea prompt; "" when off or empty."""
+        settings = signal_settings(cfg)
+        tweets = self.current(cfg)
+        if not settings["digest"] or not tweets:
+            return ""
+        key = (self.fetched_at or 0.0, settings["digest_tokens"], settings["digest_tokens_per_tweet"])
+        if key not in self._digests:
+            self._digests[key], _ = build_tweet_block(tweets, settings["digest_tokens"], settings["digest_tokens_per_tweet"])
+        return self._digests[key]
+
+    def digest_bucket(self, cfg: Mapping[str, Any], seconds: float) -> Optional[int]:
+        """The ``seconds``-wide window the digest's snapshot was fetched in, for cache keys; None without a digest."""
+        if not self.digest(cfg):
+            return None
+        return int((self.fetched_at or 0.0) // max(1.0, seconds))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tweets": len(self.tweets), "refreshes": self.refreshes, "error": self.error,
+                "age_s": None if self.fetched_at is None else round(time.time() - self.fetched_at, 1)}
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from .services.deadline import SharedDeadline
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight upstream call.
+
+    Callers that arrive while a call for their key is running await the
+    same future instead of issuing their own; ``coalesced`` counts them.
+    The shared call is cancelled only when every waiter has gone away. It runs
+    in a copy of the first caller's context under a SharedDeadline: the latest
+    request deadline among the callers still waiting, so retries and timeouts
+    inside it neither stop at the first caller's deadline nor run unbounded.
+    """
+
+    def __init__(self) -> None:
+        # (event loop, key) -> [future, waiter count, deadline]; futures cannot be awaited across loops
+        self._inflight: Dict[Tuple[int, str], List[Any]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        slot = (id(asyncio.get_running_loop()), key)
+        entry = self._inflight.get(slot)
+        if entry is None:
+            self.calls += 1
+            deadline = SharedDeadline()
+            # A task copies the context it is created in
+            entry = [deadline.context().run(asyncio.ensure_future, fn()), 0, deadline]
+            self._inflight[slot] = entry
+
+            def _forget(_: asyncio.Future, entry: List[Any] = entry) -> None:
+                if self._inflight.get(slot) is entry:
+                    del self._inflight[slot]
+            entry[0].add_done_callback(_forget)
+        else:
+            self.coalesced += 1
+
+        entry[1] += 1
+        at = entry[2].join()
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not entry[0].done():
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+            entry[2].leave(at)
+
+    def stats(self) -> Dict[str, int]:
+        return {"upstream_calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
@@ -0,0 +1,11 @@
+import pytest
+from Backend import research_router
+from Backend.config_loader import get_config
+
+@pytest.fixture
+def tmp_report_dir(tmp_path, monkeypatch):
+    """Point logging.report_dir at tmp_path so idea reports stay out of the repo's Report/."""
+    cfg = get_config()
+    patched = {**cfg, "logging": {**(cfg.get("logging") or {}), "report_dir": str(tmp_path)}}
+    monkeypatch.setattr(research_router, "get_config", lambda: patched)
+    return tmp_path
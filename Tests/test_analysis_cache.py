@@ -0,0 +1,64 @@
+from pathlib import Path
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.caching import DiskCache
+
+client = TestClient(app)
+REPORT_DIR = Path(__file__).resolve().parent.parent / "Report"
+
+def test_analyze_report_is_served_from_disk_cache(tmp_path, monkeypatch):
+    calls = []
+    async def analyze(report_content, instructions, cfg):
+        calls.append(report_content)
+        return "analysis", None
+    cache = DiskCache(tmp_path)
+    monkeypatch.setattr(research_router, "_analysis_cache", lambda cfg: cache)
+    monkeypatch.setattr(registry.get_provider("openai"), "analyze", analyze)
+
+    report = REPORT_DIR / "test_cache_report.txt"
+    report.write_text("some report", encoding="utf-8")
+    try:
+        body = {"filename": report.name, "instructions": "summarize", "provider": "openai"}
+        first = client.post("/api/research/analyze_report", json=body).json()
+        second = client.post("/api/research/analyze_report", json=body).json()
+    finally:
+        report.unlink()
+        if first.get("saved_filename"):
+            (REPORT_DIR / first["saved_filename"]).unlink(missing_ok=True)
+
+    assert first["cache_hit"] is False and second["cache_hit"] is True
+    assert second["saved_filename"] == first["saved_filename"]
+    assert len(calls) == 1
+
+def test_disk_cache_evicts_oldest_above_size(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=60)
+    cache.put("a", "x" * 20)
+    cache.put("b", "y" * 20)
+    cache.put("c", "z" * 20)
+    assert cache.get("a") is None and cache.get("c") == "z" * 20
+
+def test_disk_cache_does_not_rescan_its_own_writes(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path, max_bytes=60)
+    cache.put("a", "x" * 20)
+    cache.put("b", "y" * 20)
+    cache.get("a")
+    def no_scan(self, pattern):
+        raise AssertionError("directory rescanned")
+    monkeypatch.setattr(Path, "glob", no_scan)
+    cache.put("c", "z" * 20)
+    assert cache.get("b") is None and cache.get("a") == "x" * 20
+    monkeypatch.undo()
+
+    restarted = DiskCache(tmp_path, max_bytes=60)
+    assert restarted._bytes == 44 and set(restarted._index) == {"a", "c"}
+
+def test_disk_cache_byte_cap_holds_across_workers(tmp_path):
+    first = DiskCache(tmp_path, max_bytes=60)
+    second = DiskCache(tmp_path, max_bytes=60)
+    first.put("a", "x" * 20)
+    second.put("b", "y" * 20)
+    second.put("c", "z" * 20)
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["b", "c"]
+    assert second._bytes == 44
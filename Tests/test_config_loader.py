@@ -0,0 +1,45 @@
+import os
+import pytest
+from Backend import config_loader
+
+@pytest.fixture(autouse=True)
+def _isolated_snapshot(monkeypatch):
+    # Restore the process-wide snapshot afterwards so other tests see the real config again.
+    monkeypatch.setattr(config_loader, "_snapshot", config_loader._snapshot)
+    monkeypatch.setattr(config_loader, "_next_check", 0.0)
+
+def test_config_is_cached_and_hot_reloaded(tmp_path, monkeypatch):
+    path = tmp_path / "research.yaml"
+    path.write_text("routing:\n  prefer_openai: true\n", encoding="utf-8")
+    monkeypatch.setenv("RESEARCH_CONFIG", str(path))
+
+    snap = config_loader.get_config_snapshot(force_check=True)
+    assert snap.data["routing"]["prefer_openai"] is True
+    assert config_loader.get_config_snapshot() is snap
+
+    path.write_text("routing:\n  prefer_openai: false\n", encoding="utf-8")
+    os.utime(path, (snap.mtime + 5, snap.mtime + 5))
+    new = config_loader.get_config_snapshot(force_check=True)
+    assert new.version == snap.version + 1
+    assert new.data["routing"]["prefer_openai"] is False
+
+def test_config_is_read_only(tmp_path, monkeypatch):
+    path = tmp_path / "research.yaml"
+    path.write_text("research_policy:\n  universe: [SOL]\n", encoding="utf-8")
+    monkeypatch.setenv("RESEARCH_CONFIG", str(path))
+    cfg = config_loader.get_config_snapshot(force_check=True).data
+    with pytest.raises(TypeError):
+        cfg["routing"] = {}
+    assert cfg["research_policy"]["universe"] == ("SOL",)
+
+def test_invalid_reload_keeps_last_good_config(tmp_path, monkeypatch):
+    path = tmp_path / "research.yaml"
+    path.write_text("routing:\n  prefer_openai: true\n", encoding="utf-8")
+    monkeypatch.setenv("RESEARCH_CONFIG", str(path))
+    snap = config_loader.get_config_snapshot(force_check=True)
+
+    path.write_text("providers: [broken]\n", encoding="utf-8")
+    os.utime(path, (snap.mtime + 5, snap.mtime + 5))
+    kept = config_loader.get_config_snapshot(force_check=True)
+    assert kept.version == snap.version
+    assert kept.data is snap.data
@@ -0,0 +1,35 @@
+import asyncio, time
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.caching import TTLCache
+from Backend.services import deadline
+
+client = TestClient(app)
+
+def test_nested_scopes_and_shares_only_shrink():
+    assert deadline.remaining() is None and deadline.budget(30) == 30.0
+    with deadline.deadline_scope(10):
+        with deadline.deadline_scope(60):
+            assert deadline.remaining() <= 10
+        with deadline.share(2):
+            assert 4.5 < deadline.remaining() <= 5
+            assert deadline.budget(30) <= 5
+    assert deadline.remaining() is None
+
+def test_idea_falls_back_to_file_when_deadline_runs_out(monkeypatch, tmp_report_dir):
+    calls = []
+    async def slow(request, cfg):
+        calls.append(request)
+        await asyncio.sleep(5)
+        return None, "fallback", "too slow", 0
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", slow)
+    monkeypatch.setattr(registry.get_provider("grok"), "generate", slow)
+
+    t0 = time.perf_counter()
+    j = client.post("/api/research/idea", json={"risk": 2, "budget_sol": 0.1, "deadline_ms": 400}).json()
+    assert time.perf_counter() - t0 < 2
+    assert j["ok"] and j["source"] == "error" and "deadline" in j["error"]
+    assert j["payload"]["budget_sol"] == 0.1
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+httpx = pytest.importorskip("httpx")
+from Backend.services import llm_grok
+
+class _Client:
+    def __init__(self, working):
+        self.working = working
+        self.calls = []
+    async def post(self, endpoint, json, timeout):
+        self.calls.append((endpoint, json["model"]))
+        status = 200 if (endpoint, json["model"]) == self.working else 404
+        return httpx.Response(status, json={"choices": [{"message": {"content": "ok"}}]},
+                              request=httpx.Request("POST", endpoint))
+
+def test_working_route_is_cached(monkeypatch):
+    monkeypatch.setattr(llm_grok, "_resolved", {})
+    monkeypatch.setattr(llm_grok, "_failed", {})
+    prov = {"base_url": "https://grok.test", "model": "grok-4"}
+    client = _Client(("https://grok.test/chat/completions", "grok-3"))
+
+    asyncio.run(llm_grok._post_chat(prov, client, {"messages": []}, 1))
+    sweep_calls = len(client.calls)
+    assert sweep_calls > 1
+    assert len(llm_grok._failed) == sweep_calls - 1
+
+    asyncio.run(llm_grok._post_chat(prov, client, {"messages": []}, 1))
+    assert len(client.calls) == sweep_calls + 1
+    assert client.calls[-1] == client.working
+
+def test_payload_error_keeps_route_and_caches_nothing(monkeypatch):
+    monkeypatch.setattr(llm_grok, "_resolved", {})
+    monkeypatch.setattr(llm_grok, "_failed", {})
+    prov = {"base_url": "https://grok.test", "model": "grok-4"}
+    client = _Client(("https://grok.test/v1/chat/completions", "grok-4"))
+    asyncio.run(llm_grok._post_chat(prov, client, {"messages": []}, 1))
+    route = dict(llm_grok._resolved)
+
+    async def too_long(endpoint, json, timeout):
+        client.calls.append((endpoint, json["model"]))
+        return httpx.Response(400, json={"error": "maximum context length exceeded"}, request=httpx.Request("POST", endpoint))
+    monkeypatch.setattr(client, "post", too_long)
+    calls = len(client.calls)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(llm_grok._post_chat(prov, client, {"messages": []}, 1))
+    assert len(client.calls) == calls + 1
+    assert llm_grok._resolved == route and llm_grok._failed == {}
+
+@pytest.mark.parametrize("status", [401, 429, 503])
+def test_other_errors_do_not_sweep(monkeypatch, status):
+    monkeypatch.setattr(llm_grok, "_resolved", {})
+    monkeypatch.setattr(llm_grok, "_failed", {})
+    prov = {"base_url": "https://grok.test", "model": "grok-4"}
+    calls = []
+    class Client:
+        async def post(self, endpoint, json, timeout):
+            calls.append(endpoint)
+            return httpx.Response(status, json={"error": "nope"}, request=httpx.Request("POST", endpoint))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(llm_grok._post_chat(prov, Client(), {"messages": []}, 1))
+    assert len(calls) == 1 and llm_grok._failed == {}
@@ -0,0 +1,33 @@
+import asyncio
+from Backend.hedging import race
+
+def _attempt(delay, value, log, name):
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+            return value
+        except asyncio.CancelledError:
+            log.append(name)
+            raise
+    return run
+
+def test_hedge_wins_when_primary_is_slow():
+    cancelled = []
+    starters = [("openai", _attempt(1.0, "slow", cancelled, "openai")),
+                ("grok", _attempt(0.01, "fast", cancelled, "grok"))]
+    winner, result, meta = asyncio.run(race(starters, 0.02, bool))
+    assert (winner, result) == ("grok", "fast")
+    assert meta["launched"] == ["openai", "grok"] and meta["cancelled"] == ["openai"]
+    assert meta["hedge_fired_ms"] is not None
+
+def test_primary_wins_before_hedge_delay():
+    starters = [("openai", _attempt(0.01, "ok", [], "openai")),
+                ("grok", _attempt(0.01, "unused", [], "grok"))]
+    winner, result, meta = asyncio.run(race(starters, 1.0, bool))
+    assert winner == "openai" and meta["launched"] == ["openai"]
+
+def test_rejected_result_starts_next_immediately():
+    starters = [("openai", _attempt(0.0, "", [], "openai")),
+                ("grok", _attempt(0.0, "ok", [], "grok"))]
+    winner, result, meta = asyncio.run(race(starters, 10.0, bool))
+    assert winner == "grok" and meta["hedge_delay_ms"] == 10000.0
@@ -0,0 +1,85 @@
+import asyncio
+from Backend.services import http_clients
+
+def test_client_is_reused_until_config_changes():
+    async def run():
+        prov = {"base_url": "https://example.invalid", "pool_size": 2}
+        a = http_clients.get_async_http_client("test", prov, {"Authorization": "Bearer a"})
+        b = http_clients.get_async_http_client("test", dict(prov), {"Authorization": "Bearer a"})
+        c = http_clients.get_async_http_client("test", prov, {"Authorization": "Bearer b"})
+        await http_clients.aclose_all()
+        return a, b, c
+    a, b, c = asyncio.run(run())
+    assert a is b
+    assert c is not a
+    assert c.headers["Authorization"] == "Bearer b"
+
+def test_openai_client_is_shared():
+    async def run():
+        prov = {"pool_size": 1}
+        a = http_clients.get_async_openai_client(prov, "sk-test", 5)
+        b = http_clients.get_async_openai_client(prov, "sk-test", 5)
+        c = http_clients.get_async_openai_client(prov, "sk-test", 6)
+        await http_clients.aclose_all()
+        return a, b, c
+    a, b, c = asyncio.run(run())
+    assert a is b and a is not c
+
+def _streaming_transport(monkeypatch):
+    import httpx
+
+    async def body():
+        yield b"ok"
+    # A streamed body stays open until the caller closes the response
+    monkeypatch.setattr(httpx, "AsyncHTTPTransport", lambda **kw: httpx.MockTransport(lambda r: httpx.Response(200, content=body())))
+
+def test_replaced_client_closes_when_unreferenced_and_idle(monkeypatch):
+    import gc
+    _streaming_transport(monkeypatch)
+
+    async def settle():
+        gc.collect()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    async def run():
+        prov = {"pool_size": 1}
+        old = http_clients.get_async_http_client("tracked", prov, {"Authorization": "Bearer a"})
+        transport = http_clients._clients[asyncio.get_running_loop()]["tracked"][2]
+        response = await old.send(old.build_request("GET", "https://example.invalid"), stream=True)
+        http_clients.get_async_http_client("tracked", prov, {"Authorization": "Bearer b"})
+        await settle()
+        states = [transport.closed]
+        # Still referenced by a caller, though idle
+        await response.aclose()
+        await settle()
+        states.append(transport.closed)
+        del old
+        await settle()
+        states.append(transport.closed)
+        await http_clients.aclose_all()
+        return states
+
+    assert asyncio.run(run()) == [False, False, True]
+
+def test_unreferenced_client_waits_for_open_responses(monkeypatch):
+    import gc
+    _streaming_transport(monkeypatch)
+
+    async def run():
+        prov = {"pool_size": 1}
+        old = http_clients.get_async_http_client("tracked", prov, {"Authorization": "Bearer a"})
+        transport = http_clients._clients[asyncio.get_running_loop()]["tracked"][2]
+        response = await old.send(old.build_request("GET", "https://example.invalid"), stream=True)
+        http_clients.get_async_http_client("tracked", prov, {"Authorization": "Bearer b"})
+        del old
+        gc.collect()
+        await asyncio.sleep(0.01)
+        states = [transport.closed]
+        await response.aclose()
+        await asyncio.sleep(0.01)
+        states.append(transport.closed)
+        await http_clients.aclose_all()
+        return states
+
+    assert asyncio.run(run()) == [False, True]
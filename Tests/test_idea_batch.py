@@ -0,0 +1,46 @@
+import asyncio
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.services.rate_limit import RateLimited
+from Backend.caching import TTLCache
+
+client = TestClient(app)
+
+def test_batch_runs_concurrently_in_order_with_one_report(monkeypatch, tmp_report_dir):
+    active, peak = [0], [0]
+    async def generate(request, cfg):
+        active[0] += 1; peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return ({"idea_id": f"B{request['risk']}", "asset": "SOL", "thesis": "t", "entry_rule": "e",
+                 "exit_rule": "x", "risk": request["risk"], "budget_sol": request["budget_sol"],
+                 "ttl_minutes": 60}, "openai", None, 0)
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", generate)
+
+    reqs = [{"risk": r, "budget_sol": 0.1, "provider": "openai"} for r in (1, 2, 3, 4, 5)]
+    j = client.post("/api/research/ideas/batch", json={"requests": reqs, "max_concurrency": 2}).json()
+    assert [r["payload"]["risk"] for r in j["results"]] == [1, 2, 3, 4, 5]
+    assert peak[0] == 2
+    assert j["saved_filename"].startswith("research_batch_")
+    assert (tmp_report_dir / j["saved_filename"]).exists()
+
+def test_rate_limited_item_fails_alone(monkeypatch, tmp_report_dir):
+    async def generate(request, cfg):
+        if request["risk"] == 3:
+            return None, "openai", RateLimited("openai rate limit queue is full", 7.0), 0
+        return ({"idea_id": f"B{request['risk']}", "asset": "SOL", "thesis": "t", "entry_rule": "e",
+                 "exit_rule": "x", "risk": request["risk"], "budget_sol": request["budget_sol"],
+                 "ttl_minutes": 60}, "openai", None, 0)
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", generate)
+
+    reqs = [{"risk": r, "budget_sol": 0.1, "provider": "openai"} for r in (1, 3, 5)]
+    r = client.post("/api/research/ideas/batch", json={"requests": reqs})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [x["ok"] for x in results] == [True, False, True]
+    assert results[1]["retry_after"] == 7.0 and "rate limit" in results[1]["error"]
+    assert len(list(tmp_report_dir.glob("research_batch_*.txt"))) == 1
@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.caching import TTLCache
+
+client = TestClient(app)
+
+def _fake_provider(calls):
+    async def generate(request, cfg):
+        calls.append(request)
+        return ({"idea_id": f"T{len(calls)}", "asset": "SOL", "thesis": "t", "entry_rule": "e",
+                 "exit_rule": "x", "risk": request["risk"], "budget_sol": request["budget_sol"],
+                 "ttl_minutes": 60}, "openai", None, 0)
+    return generate
+
+def test_identical_idea_requests_hit_cache(monkeypatch, tmp_report_dir):
+    calls = []
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", _fake_provider(calls))
+    body = {"risk": 2, "budget_sol": 0.05, "provider": "openai", "universe": ["sol", "JUP"]}
+
+    first = client.post("/api/research/idea", json=body).json()
+    second = client.post("/api/research/idea", json={**body, "universe": ["JUP", "SOL"]}).json()
+    assert first["cache_hit"] is False and second["cache_hit"] is True
+    assert second["payload"] == first["payload"]
+    assert len(calls) == 1
+
+    third = client.post("/api/research/idea", json={**body, "bypass_cache": True}).json()
+    assert third["cache_hit"] is False and len(calls) == 2
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_bytes=10_000, max_entries=2)
+    cache.put("a", 1, 60); cache.put("b", 2, 60)
+    cache.get("a")
+    cache.put("c", 3, 60)
+    assert cache.get("b") is None and cache.get("a")[0] == 1
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+from Backend.services import llm_openai
+from Backend.services.resilience import ProviderError
+
+CFG = {"providers": {"openai": {"enabled": True, "retries": 0}},
+       "research_policy": {"risk_bounds": [1, 5], "universe": ["SOL", "JUP"], "ttl_minutes_default": 90}}
+
+def _fake_client(text, sent):
+    class Stream:
+        closed = False
+        def __aiter__(self):
+            return self._gen()
+        async def _gen(self):
+            for ch in text:
+                sent.append(ch)
+                yield SimpleNamespace(choices=[SimpleNamespace(finish_reason=None, delta=SimpleNamespace(content=ch))])
+        async def close(self):
+            Stream.closed = True
+    async def create(stream=False, **kwargs):
+        assert stream
+        return Stream()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))), Stream
+
+def _generate(monkeypatch, text):
+    sent = []
+    client, stream = _fake_client(text, sent)
+    monkeypatch.setattr(llm_openai, "_client", lambda cfg, provider="openai": (client, CFG["providers"]["openai"], None))
+    data, err = asyncio.run(llm_openai.acall_openai_generate({"risk": 2, "budget_sol": 0.1, "universe": ["SOL"]}, CFG))
+    return data, err, sent, stream
+
+def test_invalid_field_cancels_the_stream(monkeypatch):
+    text = '{"asset": "SOL", "risk": 9, "thesis": "' + "long thesis " * 200 + '"}'
+    data, err, sent, stream = _generate(monkeypatch, text)
+    assert data is None and "risk 9 outside [1, 5]" in err
+    assert isinstance(err, ProviderError) and err.retryable
+    assert len(sent) < 40 and stream.closed
+
+def test_asset_outside_request_universe_is_rejected(monkeypatch):
+    data, err, sent, _ = _generate(monkeypatch, '{"asset": "JUP", "risk": 2}')
+    assert data is None and "not in universe" in err
+
+def test_valid_idea_streams_to_the_end(monkeypatch):
+    data, err, _, stream = _generate(monkeypatch, '{"asset": "sol", "risk": 2, "budget_sol": 0.2, "thesis": "t"}')
+    assert err is None and data["risk"] == 2 and data["budget_sol"] == 0.2 and stream.closed
@@ -0,0 +1,50 @@
+from pathlib import Path
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.caching import DiskCache
+from Backend.report_sections import diff_sections, section_fingerprint, split_sections
+
+client = TestClient(app)
+REPORT_DIR = Path(__file__).resolve().parent.parent / "Report"
+
+REPORT = "\n".join(f"## Section {i}\n" + f"Body of section {i}. " * 20 for i in range(10))
+
+def test_sections_split_at_headings_and_ignore_whitespace():
+    sections = split_sections(REPORT)
+    assert len(sections) == 10 and sections[3].startswith("## Section 3")
+    edited = split_sections(REPORT.replace("Body of section 3.", "Body of  section 3.").replace("section 7.", "section 7!"))
+    changed, removed = diff_sections([section_fingerprint(s) for s in sections], edited)
+    assert changed == [7] and removed == 0
+    changed, removed = diff_sections([section_fingerprint(s) for s in sections], sections[:8])
+    assert changed == [] and removed == 2
+
+def test_reanalysis_sends_only_changed_sections(tmp_path, monkeypatch):
+    calls = []
+    async def analyze(report_content, instructions, cfg):
+        calls.append(report_content)
+        return f"analysis {len(calls)}", None
+    cache = DiskCache(tmp_path)
+    monkeypatch.setattr(research_router, "_analysis_cache", lambda cfg: cache)
+    monkeypatch.setattr(registry.get_provider("openai"), "analyze", analyze)
+
+    report = REPORT_DIR / "test_incremental_report.txt"
+    body = {"filename": report.name, "instructions": "summarize", "provider": "openai"}
+    saved = []
+    try:
+        report.write_text(REPORT, encoding="utf-8")
+        first = client.post("/api/research/analyze_report", json=body).json()
+        report.write_text(REPORT.replace("Body of section 4.", "Rewritten section 4."), encoding="utf-8")
+        second = client.post("/api/research/analyze_report", json=body).json()
+        saved = [first.get("saved_filename"), second.get("saved_filename")]
+    finally:
+        report.unlink()
+        for name in saved:
+            if name:
+                (REPORT_DIR / name).unlink(missing_ok=True)
+
+    assert first["ok"] and second["ok"] and second["analysis_result"] == "analysis 2"
+    assert second["routing"]["incremental"] == {"sections": 10, "changed": 1, "removed": 0}
+    assert "analysis 1" in calls[1] and "Rewritten section 4" in calls[1] and "## Section 5" not in calls[1]
+    assert len(calls[1]) < len(calls[0])
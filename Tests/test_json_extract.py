@@ -0,0 +1,27 @@
+from Backend.services.json_extract import IncrementalObjectParser, extract_json_object
+from Backend.services.llm_common import idea_from_text
+
+def test_plain_fenced_and_prose_wrapped_objects():
+    assert extract_json_object('{"a": 1}') == ({"a": 1}, None)
+    assert extract_json_object('```json\n{"a": 1}\n```') == ({"a": 1}, None)
+    assert extract_json_object('Here is the idea: {"a": {"b": "}"}} Hope it helps!') == ({"a": {"b": "}"}}, None)
+
+def test_trailing_commas_are_repaired_outside_strings():
+    value, error = extract_json_object('```\n{"a": [1, 2,], "s": "x,}",}\n```')
+    assert error is None and value == {"a": [1, 2], "s": "x,}"}
+
+def test_non_objects_and_garbage_fail():
+    assert extract_json_object("[1, 2]")[0] is None
+    assert extract_json_object("no json here")[0] is None
+    assert extract_json_object("")[1] == "empty response"
+
+def test_idea_defaults_from_request():
+    data, error = idea_from_text('Sure!\n```json\n{"asset": "JUP", "thesis": "t",}\n```', {}, req={"risk": 3, "budget_sol": 0.2})
+    assert error is None and data["asset"] == "JUP" and data["risk"] == 3 and data["budget_sol"] == 0.2
+
+def test_incremental_parser_emits_fields_as_they_complete():
+    parser = IncrementalObjectParser()
+    text = '```json\n{"asset": "SOL", "nested": {"a": [1, "}"]}, "risk": 3, "note": "a \\"b\\", c"}```'
+    fields = [f for i in range(len(text)) for f in parser.feed(text[i])]
+    assert fields == [("asset", "SOL"), ("nested", {"a": [1, "}"]}), ("risk", 3), ("note", 'a "b", c')]
+    assert parser.done
@@ -0,0 +1,53 @@
+import asyncio
+from pathlib import Path
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+
+client = TestClient(app)
+REPORT_DIR = Path(__file__).resolve().parent.parent / "Report"
+
+def _analyze_yield(monkeypatch, report_text, analyze):
+    monkeypatch.setattr(research_router, "_analysis_cache", lambda cfg: None)
+    monkeypatch.setattr(registry.get_provider("openai"), "analyze", analyze)
+    report = REPORT_DIR / "test_map_reduce_report.txt"
+    report.write_text(report_text, encoding="utf-8")
+    try:
+        j = client.post("/api/research/yield/analyze", json={"report_filename": report.name, "provider": "openai"}).json()
+    finally:
+        report.unlink()
+        if j.get("saved_filename"):
+            (REPORT_DIR / j["saved_filename"]).unlink(missing_ok=True)
+    return j
+
+def test_yield_analysis_sends_report_once(monkeypatch):
+    calls = []
+    async def analyze(report_content, instructions, cfg):
+        calls.append((report_content, instructions))
+        return "fine", None
+
+    j = _analyze_yield(monkeypatch, "UNIQUE-REPORT-MARKER stake SOL", analyze)
+    assert j["ok"] and len(calls) == 1
+    content, instructions = calls[0]
+    assert "UNIQUE-REPORT-MARKER" in content and "UNIQUE-REPORT-MARKER" not in instructions
+
+def test_large_report_is_mapped_concurrently_then_merged(monkeypatch):
+    active, peak, calls = 0, 0, []
+    async def analyze(report_content, instructions, cfg):
+        nonlocal active, peak
+        calls.append((report_content, instructions))
+        if "Partial analysis" in report_content:
+            return "merged", None
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return f"part {len(calls)}", None
+
+    paragraphs = "\n\n".join(f"Section {i}: " + "yield " * 2000 for i in range(6))
+    j = _analyze_yield(monkeypatch, paragraphs, analyze)
+    meta = j["routing"]["map_reduce"]
+    assert j["ok"] and j["analysis_result"] == "merged"
+    assert meta["chunks"] > 1 and meta["failed_chunks"] == 0
+    assert len(calls) == meta["chunks"] + 1 and peak > 1
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.services.llm_common import ideas_from_text
+from Backend.caching import TTLCache
+
+client = TestClient(app)
+
+def _idea(idea_id, risk, entry, exit_rule, thesis):
+    return {"idea_id": idea_id, "asset": "SOL", "thesis": thesis, "entry_rule": entry, "exit_rule": exit_rule,
+            "risk": risk, "budget_sol": 0.1, "ttl_minutes": 60}
+
+def test_n_candidates_from_one_call_are_deduped_and_ranked(monkeypatch, tmp_report_dir):
+    calls = []
+    async def generate_n(request, n, cfg):
+        calls.append(n)
+        return ([_idea("A", 5, "Market BUY", "Zeit-Exit 60min", "vague"),
+                 _idea("B", 2, "Buy below 142.5", "Stop 1.5%, take profit 2%", "JUP volume rising into the unlock"),
+                 _idea("C", 2, "buy below 142.5 ", "stop 1.5%, take profit 2%", "same setup again"),
+                 {"idea_id": "broken"}], "openai", None, 0)
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate_n", generate_n)
+
+    j = client.post("/api/research/idea", json={"risk": 2, "budget_sol": 0.1, "provider": "openai", "n": 3}).json()
+    assert calls == [3]
+    assert j["payload"]["idea_id"] == "B"
+    assert [c["idea_id"] for c in j["candidates"]] == ["B", "A"]
+    assert j["candidate_scores"] == sorted(j["candidate_scores"], reverse=True)
+
+def test_ideas_from_text_keeps_usable_candidates():
+    cfg = {"research_policy": {"risk_bounds": [1, 5], "universe": ["SOL", "JUP"]}}
+    text = '{"ideas": [{"asset": "SOL", "risk": 2}, {"asset": "DOGE", "risk": 2}, {"asset": "JUP", "risk": 3}]}'
+    ideas, err = ideas_from_text(text, cfg, req={"risk": 2, "budget_sol": 0.1})
+    assert err is None and [i["asset"] for i in ideas] == ["SOL", "JUP"]
+    assert ideas[0]["idea_id"] != ideas[1]["idea_id"] and ideas[1]["budget_sol"] == 0.1
@@ -0,0 +1,40 @@
+import asyncio
+from types import SimpleNamespace
+from Backend.services import llm_openai
+from Backend.services.llm_common import complete_chat
+from Backend.services.output_budget import OutputBudget, output_key, output_scope
+
+SETTINGS = {"adaptive": True, "min_samples": 5, "percentile": 0.99, "margin": 0.2, "min_tokens": 10}
+
+def test_cap_follows_observed_lengths_and_ignores_truncated():
+    budget = OutputBudget()
+    assert budget.cap("k", 2000, SETTINGS) == 2000
+    for tokens in (100, 120, 110, 150, 130):
+        budget.record("k", tokens, False)
+    budget.record("k", 2000, True)
+    assert budget.cap("k", 2000, SETTINGS) == 180
+    assert budget.cap("k", 160, SETTINGS) == 160
+    assert budget.snapshot()["k"] == {"samples": 5, "max_seen": 150, "truncated": 1}
+
+def test_scopes_nest_into_the_key():
+    with output_scope("yield_analysis_risk"), output_scope("map"):
+        assert output_key("openai", "analysis") == "openai:yield_analysis_risk/map"
+    assert output_key("openai", "analysis") == "openai:analysis"
+
+def test_truncated_answer_is_asked_again_with_configured_maximum(monkeypatch):
+    asked = []
+    async def create(max_tokens, **kwargs):
+        asked.append(max_tokens)
+        finish = "length" if max_tokens < 2000 else "stop"
+        return SimpleNamespace(choices=[SimpleNamespace(finish_reason=finish, message=SimpleNamespace(content=f"text {max_tokens}"))],
+                               usage=SimpleNamespace(completion_tokens=max_tokens if finish == "length" else 300))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    cfg = {"output_tokens": SETTINGS}
+    kwargs = {"messages": [{"role": "user", "content": "report"}]}
+
+    with output_scope("test_truncation"):
+        for _ in range(5):
+            asyncio.run(complete_chat(llm_openai._transport(client, {}), "openai", "OpenAI", {}, "analysis", 2000, cfg, kwargs))
+        assert asked == [2000] * 5
+        text, err = asyncio.run(complete_chat(llm_openai._transport(client, {}), "openai", "OpenAI", {}, "analysis", 2000, cfg, kwargs))
+    assert asked[5:] == [360, 2000] and text == "text 2000" and err is None
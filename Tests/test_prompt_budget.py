@@ -0,0 +1,22 @@
+from Backend.prompt_budget import build_tweet_block, count_tokens
+
+def test_duplicates_dropped_and_relevant_tweets_first():
+    tweets = [{"text": "gm everyone", "created_at": "t1"},
+              {"text": "New SOL staking vault with 9% APY https://x.co/a", "created_at": "t2"},
+              {"text": "RT @someone: new sol staking vault with 9% apy https://x.co/b", "created_at": "t3"}]
+    text, stats = build_tweet_block(tweets, budget_tokens=1000)
+    assert text.splitlines()[0].startswith("Tweet 1: New SOL staking vault")
+    assert stats["tweets_included"] == 2 and stats["dropped_duplicates"] == 1 and stats["tweets_dropped"] == 1
+
+def test_budget_and_per_tweet_cap_are_respected():
+    tweets = [{"text": f"yield farm {i} " + "x" * 2000} for i in range(50)]
+    text, stats = build_tweet_block(tweets, budget_tokens=500, max_tokens_per_tweet=50)
+    assert count_tokens(text) <= 500 and stats["truncated"] == stats["tweets_included"]
+    assert stats["tweets_included"] + stats["dropped_over_budget"] == 50 and stats["tweets_included"] > 0
+
+def test_near_duplicates_become_one_weighted_line():
+    tweets = [{"text": f"Stake SOL in the new Jupiter vault for 9% APY, link in bio {handle}"} for handle in ("@a", "@b", "@c")]
+    tweets += [{"text": "gm"}, {"text": "   "}, {"created_at": "t9"}]
+    text, stats = build_tweet_block(tweets, budget_tokens=1000)
+    assert text.splitlines()[0].endswith("posted 3x)")
+    assert stats["tweets_included"] == 2 and stats["dropped_duplicates"] == 2 and stats["dropped_empty"] == 2
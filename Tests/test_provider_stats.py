@@ -0,0 +1,64 @@
+import random
+from Backend import research_router
+from Backend.provider_stats import ProviderStats
+
+def test_fast_reliable_provider_ranks_first():
+    stats = ProviderStats(alpha=0.5)
+    for _ in range(5):
+        stats.record("openai", "gpt", 900.0, True)
+        stats.record("grok", "g4", 400.0, False)
+    # grok is faster but mostly fails, so its expected time to a valid answer is worse
+    assert stats.order([("openai", "gpt"), ("grok", "g4")])[0] == ["openai", "grok"]
+    snap = stats.snapshot()
+    assert snap["openai/gpt"]["p95_ms"] == 900.0 and snap["grok/g4"]["error_rate"] > 0.9
+
+def test_unmeasured_provider_is_tried_and_exploration_reorders():
+    stats = ProviderStats()
+    stats.record("openai", "gpt", 500.0, True)
+    assert stats.order([("openai", "gpt"), ("grok", "g4")])[0] == ["grok", "openai"]
+    stats.record("grok", "g4", 2000.0, True)
+    order, explored = stats.order([("openai", "gpt"), ("grok", "g4")], explore_ratio=1.0, rng=random.Random(1))
+    assert explored and order == ["grok", "openai"]
+
+def test_auto_chain_follows_scores(monkeypatch):
+    stats = ProviderStats()
+    stats.record("openai", "gpt-4o-mini", 3000.0, True)
+    stats.record("grok", "grok-4", 300.0, True)
+    monkeypatch.setattr(research_router, "_provider_stats", stats)
+    cfg = {"providers": {"openai": {"enabled": True, "model": "gpt-4o-mini"}, "grok": {"enabled": True, "model": "grok-4"}},
+           "routing": {"adaptive": True, "explore_ratio": 0.0}}
+    assert research_router._provider_chain("auto", cfg) == ["grok", "openai"]
+    assert research_router._provider_chain("openai", cfg) == ["openai", "grok"]
+
+def test_analysis_cache_key_ignores_adaptive_order(monkeypatch):
+    stats = ProviderStats()
+    monkeypatch.setattr(research_router, "_provider_stats", stats)
+    cfg = {"providers": {"openai": {"enabled": True, "model": "gpt-4o-mini"}, "grok": {"enabled": True, "model": "grok-4"}},
+           "routing": {"adaptive": True, "explore_ratio": 0.5}}
+    keys = {research_router._analysis_cache_key("analysis", "report", "x", None, cfg) for _ in range(50)}
+    assert len(keys) == 1 and stats.snapshot() == {}
+
+def test_fast_failing_provider_does_not_outrank_a_healthy_one():
+    stats = ProviderStats(alpha=0.2)
+    for _ in range(3):
+        stats.record("openai", "gpt", 4000.0, True)
+    stats.record("grok", "g4", 50.0, True)
+    stats.record("grok", "g4", 50.0, False)
+    # 20% errors at 50ms used to score ~60ms; a failure costs about a timeout
+    assert stats.order([("openai", "gpt"), ("grok", "g4")])[0] == ["openai", "grok"]
+
+def test_open_breaker_goes_last(monkeypatch):
+    from Backend.services import resilience
+    stats = ProviderStats()
+    stats.record("openai", "gpt-4o-mini", 3000.0, True)
+    stats.record("grok", "grok-4", 300.0, True)
+    monkeypatch.setattr(research_router, "_provider_stats", stats)
+    monkeypatch.setattr(resilience, "_breakers", {})
+    cfg = {"providers": {"openai": {"enabled": True, "model": "gpt-4o-mini"}, "grok": {"enabled": True, "model": "grok-4"}},
+           "routing": {"adaptive": True, "explore_ratio": 0.0}}
+    breaker = resilience.get_breaker("grok", cfg["providers"]["grok"])
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert research_router._provider_chain("auto", cfg) == ["openai", "grok"]
+    breaker.record_success()
+    assert research_router._provider_chain("auto", cfg) == ["grok", "openai"]
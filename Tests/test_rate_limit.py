@@ -0,0 +1,56 @@
+import asyncio
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+from Backend.caching import TTLCache
+from Backend.services.rate_limit import ProviderLimiter, RateLimited, priority_scope
+
+client = TestClient(app)
+
+def _limiter(**rl):
+    return ProviderLimiter("test").configure({"rate_limit": rl})
+
+def test_bucket_admits_burst_then_queues_by_priority():
+    limiter = _limiter(requests_per_min=600, burst_requests=1, max_queue=5)  # one call per 100ms
+    order = []
+
+    async def call(tag, priority):
+        with priority_scope(priority):
+            assert await limiter.acquire() is None
+        order.append(tag)
+
+    async def main():
+        await call("first", 0)
+        low = asyncio.ensure_future(call("batch", 1))
+        await asyncio.sleep(0)
+        high = asyncio.ensure_future(call("interactive", 0))
+        await asyncio.gather(low, high)
+
+    asyncio.run(main())
+    assert order == ["first", "interactive", "batch"]
+
+def test_full_queue_is_refused_with_retry_after():
+    limiter = _limiter(requests_per_min=60, burst_requests=1, max_queue=1)
+
+    async def main():
+        assert await limiter.acquire() is None
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        refused = await limiter.acquire()
+        waiting.cancel()
+        return refused
+
+    refused = asyncio.run(main())
+    assert isinstance(refused, RateLimited) and refused.status == 429 and refused.retry_after > 0
+    assert limiter.snapshot()["rejected"] == 1 and limiter.snapshot()["queued"] == 0
+
+def test_idea_returns_429_when_every_provider_refuses(monkeypatch):
+    async def refused(request, cfg):
+        return None, "fallback", RateLimited("openai rate limit: admission queue full", retry_after=2.4), 0
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", refused)
+    monkeypatch.setattr(registry.get_provider("grok"), "generate", refused)
+
+    r = client.post("/api/research/idea", json={"risk": 2, "budget_sol": 0.1})
+    assert r.status_code == 429 and r.headers["Retry-After"] == "3"
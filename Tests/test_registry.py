@@ -0,0 +1,55 @@
+import asyncio
+from Backend import research_router
+from Backend.services import registry
+
+CFG = {"providers": {"openai": {"enabled": True}, "grok": {"enabled": False},
+                     "local": {"type": "openai_compatible", "enabled": True, "base_url": "http://localhost:8000/v1", "workers": 1},
+                     "twitter": {"enabled": True}}}
+
+def test_config_defined_provider_joins_the_chain():
+    assert "local" in registry.provider_names(CFG) and "twitter" not in registry.provider_names(CFG)
+    assert isinstance(registry.get_provider("local"), registry.OpenAICompatibleProvider)
+    assert research_router._provider_chain("local", CFG) == ["local", "openai"]
+    assert registry.get_provider("local").status(CFG)["base_url"] == "http://localhost:8000/v1"
+
+def test_slow_provider_only_queues_its_own_pool(monkeypatch):
+    registry.provider_names(CFG)
+    running = {"local": 0, "openai": 0}
+    peak = {"local": 0, "openai": 0}
+
+    def fake(name, delay):
+        async def analyze(report_content, instructions, cfg):
+            running[name] += 1; peak[name] = max(peak[name], running[name])
+            await asyncio.sleep(delay)
+            running[name] -= 1
+            return "ok", None
+        return analyze
+
+    monkeypatch.setattr(registry.get_provider("local"), "analyze", fake("local", 0.05))
+    monkeypatch.setattr(registry.get_provider("openai"), "analyze", fake("openai", 0.0))
+
+    async def main():
+        local = [research_router._call_limited(None, "local", registry.get_provider("local").analyze, f"r{i}", "x", CFG) for i in range(3)]
+        fast = [research_router._call_limited(None, "openai", registry.get_provider("openai").analyze, f"r{i}", "x", CFG) for i in range(3)]
+        tasks = [asyncio.ensure_future(c) for c in local + fast]
+        await asyncio.sleep(0.02)
+        assert all(t.done() for t in tasks[3:]) and not any(t.done() for t in tasks[1:3])
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert peak["local"] == 1 and peak["openai"] == 3
+
+def test_removed_config_provider_disappears():
+    registry.provider_names(CFG)
+    renamed = {"providers": {**{k: v for k, v in CFG["providers"].items() if k != "local"},
+                             "vllm": {"type": "openai_compatible", "enabled": True}}}
+    assert registry.provider_names(renamed) == ["openai", "grok", "vllm"]
+    assert registry.get_provider("local") is None
+
+def test_incomplete_provider_fails_at_instantiation():
+    import pytest
+    class Partial(registry.Provider):
+        async def generate(self, req, cfg):
+            return None, "partial", None, 0
+    with pytest.raises(TypeError):
+        Partial("partial")
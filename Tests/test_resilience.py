@@ -0,0 +1,63 @@
+import asyncio
+from Backend.services import resilience
+from Backend.services.resilience import CircuitBreaker, ProviderError, backoff_delay, call_with_retries, provider_error, retry_after_seconds
+
+def test_retry_after_headers():
+    assert retry_after_seconds({"Retry-After": "3"}) == 3.0
+    assert retry_after_seconds({"retry-after-ms": "250"}) == 0.25
+    assert retry_after_seconds({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s"}) == 90.0
+    assert retry_after_seconds({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "1s"}) is None
+
+def test_provider_error_classification():
+    err = provider_error("Twitter API error: Too Many Requests", status=429, headers={"Retry-After": "2"})
+    assert isinstance(err, str) and err.retryable and err.retry_after == 2.0
+    assert not provider_error("bad request", status=400).retryable
+    assert not provider_error("insufficient_quota", status=429).retryable
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(3, 0.5, 2.0) for _ in range(50)]
+    assert all(0.0 <= d <= 2.0 for d in delays) and len(set(delays)) > 1
+    assert backoff_delay(0, 0.5, 2.0, retry_after=10) == 2.0
+
+def test_breaker_opens_and_half_opens(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    cb = CircuitBreaker("x", failure_threshold=2, reset_seconds=10)
+    transient = ProviderError("503", status=503, retryable=True)
+    cb.record(transient); cb.record(transient)
+    assert cb.state == "open" and not cb.allow()
+    now[0] += 11
+    assert cb.allow() and not cb.allow()  # one half-open probe at a time
+    cb.record(None)
+    assert cb.state == "closed"
+
+def test_non_retryable_errors_leave_breaker_alone(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    cb = CircuitBreaker("x", failure_threshold=2, reset_seconds=10)
+    transient = ProviderError("503", status=503, retryable=True)
+    revoked = ProviderError("401 invalid api key", status=401, retryable=False)
+    cb.record(transient); cb.record(revoked)
+    assert cb.failures == 1
+    cb.record(transient)
+    now[0] += 11
+    assert cb.allow()
+    cb.record(revoked)
+    assert cb.state == "half_open" and not cb.allow()
+
+def test_call_with_retries_only_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda *a: 0.0)
+    calls = []
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            return None, ProviderError("503", status=503, retryable=True)
+        return "ok", None
+    assert asyncio.run(call_with_retries({"retries": 3}, "t", flaky)) == ("ok", None, 2)
+
+    async def broken():
+        calls.append(1)
+        return None, ProviderError("400", status=400)
+    calls.clear()
+    value, error, used = asyncio.run(call_with_retries({"retries": 3}, "t", broken))
+    assert value is None and used == 0 and len(calls) == 1
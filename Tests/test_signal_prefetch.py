@@ -0,0 +1,109 @@
+import asyncio, time
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router, signal_prefetch
+from Backend.config_loader import get_config
+from Backend.services import registry
+from Backend.caching import TTLCache
+
+client = TestClient(app)
+
+def _cfg(report_dir="Report", enabled=True):
+    cfg = get_config()
+    return {**cfg, "routing": {**cfg["routing"], "use_twitter_signals": enabled, "twitter_digest_tokens": 100},
+            "providers": {**cfg["providers"], "twitter": {"enabled": True}},
+            "logging": {**cfg["logging"], "report_dir": str(report_dir)}}
+
+def test_missing_snapshot_does_not_wait_for_twitter(monkeypatch):
+    async def slow_search(cfg):
+        await asyncio.sleep(0.2)
+        return [{"id": "1", "text": "SOL staking yield up", "created_at": ""}], ""
+    monkeypatch.setattr(signal_prefetch, "arecent_search", slow_search)
+    snapshot, cfg = signal_prefetch.SignalSnapshot(), _cfg()
+
+    async def scenario():
+        start = time.perf_counter()
+        first = snapshot.current(cfg)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.3)
+        return first, elapsed, snapshot.current(cfg)
+    first, elapsed, later = asyncio.run(scenario())
+    assert first == [] and elapsed < 0.05
+    assert [t["id"] for t in later] == ["1"] and snapshot.refreshes == 1
+
+def test_idea_prompt_gets_digest_of_snapshot(monkeypatch, tmp_path):
+    snapshot = signal_prefetch.SignalSnapshot()
+    snapshot.tweets, snapshot.fetched_at = [{"id": "7", "text": "JUP volume rising", "created_at": "2026-01-01"}], time.time()
+    seen = []
+    async def generate(request, cfg):
+        seen.append(request)
+        return ({"idea_id": "X", "asset": "SOL", "thesis": "t", "entry_rule": "Buy 1", "exit_rule": "Stop 1%",
+                 "risk": 2, "budget_sol": 0.1, "ttl_minutes": 60}, "openai", None, 0)
+    monkeypatch.setattr(research_router, "_signals", snapshot)
+    monkeypatch.setattr(research_router, "_idea_cache", TTLCache())
+    monkeypatch.setattr(research_router, "get_config", lambda: _cfg(tmp_path))
+    monkeypatch.setattr(registry.get_provider("openai"), "generate", generate)
+
+    j = client.post("/api/research/idea", json={"risk": 2, "budget_sol": 0.1, "provider": "openai"}).json()
+    assert "JUP volume rising" in seen[0]["twitter_signals"]
+    assert j["twitter_signals"][0]["id"] == "7"
+
+    snapshot.fetched_at -= 3600
+    client.post("/api/research/idea", json={"risk": 2, "budget_sol": 0.1, "provider": "openai"})
+    assert "twitter_signals" not in seen[1]
+
+def test_refresher_follows_config_reloads(monkeypatch):
+    configs = [_cfg(enabled=False), _cfg(), _cfg(enabled=False)]
+    searches, sleeps = [], []
+    async def search(cfg):
+        searches.append(cfg)
+        return [{"id": "1", "text": "SOL", "created_at": ""}], ""
+    real_sleep = asyncio.sleep
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        if not configs:
+            raise asyncio.CancelledError
+        await real_sleep(0)
+    monkeypatch.setattr(signal_prefetch, "arecent_search", search)
+    monkeypatch.setattr(signal_prefetch, "get_config", lambda: configs.pop(0))
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+    snapshot = signal_prefetch.SignalSnapshot()
+    try:
+        asyncio.run(snapshot.run())
+    except asyncio.CancelledError:
+        pass
+    assert len(searches) == 1 and len(sleeps) == 3 and snapshot.refreshes == 1
+
+def test_idea_cache_key_follows_snapshot_window_not_digest_text(monkeypatch):
+    snapshot, cfg = signal_prefetch.SignalSnapshot(), _cfg()
+    monkeypatch.setattr(research_router, "_signals", snapshot)
+    req = research_router.IdeaRequest(risk=2, budget_sol=0.1)
+    window = (time.time() // 300) * 300 + 1
+
+    def key(text, fetched_at):
+        snapshot.tweets, snapshot.fetched_at, snapshot._digests = [{"id": "1", "text": text, "created_at": ""}], fetched_at, {}
+        return research_router._idea_cache_key(req, cfg)
+
+    first = key("JUP volume rising", window)
+    assert key("BONK listing rumour", window + 60) == first
+    assert key("BONK listing rumour", window + 300) != first
+
+def test_idea_cache_settings_apply_on_config_change(monkeypatch):
+    cache = TTLCache(max_bytes=10_000)
+    cache.put("a", "x" * 100, 60)
+    cache.put("b", "y" * 100, 60)
+    version = [1]
+    monkeypatch.setattr(research_router, "_idea_cache", cache)
+    monkeypatch.setattr(research_router, "config_version", lambda: version[0])
+    monkeypatch.setattr(research_router, "_idea_cache_version", None)
+    cfg = {"caching": {"idea_max_bytes": 150}}
+    assert research_router._configured_idea_cache(cfg) is cache
+    assert cache.max_bytes == 150 and cache.get("a") is None and cache.get("b") is not None
+
+    cache.max_bytes = 10_000
+    research_router._configured_idea_cache(cfg)
+    assert cache.max_bytes == 10_000
+    version[0] = 2
+    research_router._configured_idea_cache(cfg)
+    assert cache.max_bytes == 150
@@ -0,0 +1,92 @@
+import asyncio
+from Backend.singleflight import SingleFlight
+
+def test_concurrent_identical_calls_share_one_upstream():
+    sf = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"idea": 1}
+
+    async def run():
+        return await asyncio.gather(*[sf.do("k", upstream) for _ in range(5)], sf.do("other", upstream))
+
+    results = asyncio.run(run())
+    assert len(calls) == 2
+    assert all(r is results[0] for r in results[:5])
+    assert sf.stats()["coalesced"] == 4 and sf.stats()["in_flight"] == 0
+
+def test_cancelling_one_follower_keeps_shared_call():
+    sf = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def run():
+        leader = asyncio.ensure_future(sf.do("k", upstream))
+        follower = asyncio.ensure_future(sf.do("k", upstream))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == "ok"
+
+def test_shared_call_runs_under_the_latest_waiters_deadline():
+    from Backend.services.deadline import deadline_scope, remaining
+    sf = SingleFlight()
+    seen = []
+
+    async def upstream():
+        seen.append(remaining())
+        await asyncio.sleep(0.05)
+        # The short leader has given up; the follower's deadline now bounds the call
+        seen.append(remaining())
+        return "ok"
+
+    async def short_leader():
+        with deadline_scope(0.01):
+            try:
+                return await asyncio.wait_for(sf.do("k", upstream), remaining())
+            except asyncio.TimeoutError:
+                return "timed out"
+
+    async def follower():
+        await asyncio.sleep(0)
+        with deadline_scope(5.0):
+            return await asyncio.wait_for(sf.do("k", upstream), remaining())
+
+    async def run():
+        return await asyncio.gather(short_leader(), follower())
+
+    assert asyncio.run(run()) == ["timed out", "ok"]
+    assert seen[0] is not None and 4.0 < seen[1] <= 5.0
+
+def test_shared_call_is_unbounded_only_while_an_unbounded_caller_waits():
+    from Backend.services.deadline import deadline_scope, remaining
+    sf = SingleFlight()
+    seen = []
+
+    async def upstream():
+        await asyncio.sleep(0.01)
+        seen.append(remaining())
+        await asyncio.sleep(0.02)
+        seen.append(remaining())
+        return "ok"
+
+    async def unbounded():
+        task = asyncio.ensure_future(sf.do("k", upstream))
+        await asyncio.sleep(0.02)
+        task.cancel()
+
+    async def bounded():
+        with deadline_scope(1.0):
+            return await sf.do("k", upstream)
+
+    async def run():
+        return await asyncio.gather(unbounded(), bounded())
+
+    assert asyncio.run(run())[1] == "ok"
+    assert seen[0] is None and 0.0 < seen[1] <= 1.0
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+from fastapi.testclient import TestClient
+from Backend.app import app
+from Backend import research_router
+from Backend.services import registry
+
+client = TestClient(app)
+REPORT_DIR = Path(__file__).resolve().parent.parent / "Report"
+
+def _events(text):
+    for block in text.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            yield lines["event"], json.loads(lines["data"])
+
+def test_yield_report_stream_forwards_deltas_and_saves(monkeypatch):
+    async def stream(report_content, instructions, cfg):
+        async def deltas():
+            for part in ("Yield ", "looks ", "good"):
+                yield part
+        return deltas(), None
+    monkeypatch.setattr(registry.get_provider("openai"), "stream", stream)
+
+    body = {"twitter_data": [{"text": "stake SOL", "created_at": ""}], "analysis_instructions": "x", "provider": "openai"}
+    with client.stream("POST", "/api/research/yield/report/stream", json=body) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        events = list(_events(r.read().decode()))
+
+    assert [e for e, _ in events] == ["meta", "delta", "delta", "delta", "done"]
+    done = events[-1][1]
+    assert done["ok"] is True and done["report_content"] == "Yield looks good"
+    saved = REPORT_DIR / done["saved_filename"]
+    assert saved.read_text(encoding="utf-8") == "Yield looks good"
+    saved.unlink()
+
+def test_stream_reports_missing_file():
+    r = client.post("/api/research/analyze_report/stream", json={"filename": "nope.txt", "instructions": "x"})
+    (event, data), = _events(r.text)
+    assert event == "done" and data["ok"] is False and "not found" in data["error"]
+
+def test_stream_is_bounded_by_deadline_and_releases_its_worker(monkeypatch):
+    import asyncio
+    from Backend.provider_stats import ProviderStats
+    closed = []
+    async def stream(report_content, instructions, cfg):
+        async def deltas():
+            try:
+                yield "Yield "
+                await asyncio.sleep(5)
+                yield "never"
+            finally:
+                closed.append(True)
+        return deltas(), None
+    stats = ProviderStats()
+    monkeypatch.setattr(research_router, "_provider_stats", stats)
+    monkeypatch.setattr(registry.get_provider("openai"), "stream", stream)
+
+    body = {"twitter_data": [{"text": "stake SOL", "created_at": ""}], "analysis_instructions": "x",
+            "provider": "openai", "deadline_ms": 200}
+    with client.stream("POST", "/api/research/yield/report/stream", json=body) as r:
+        events = list(_events(r.read().decode()))
+
+    done = events[-1][1]
+    assert done["ok"] is False and "Stream interrupted" in done["error"]
+    assert closed == [True] and registry.get_provider("openai").busy == 0
+    assert len(stats.snapshot()) == 1 and list(stats.snapshot().values())[0]["error_rate"] > 0
+
+def test_yield_report_stream_reports_prompt_errors(monkeypatch):
+    def broken_prompt(req, cfg):
+        raise ValueError("bad tweet data")
+    monkeypatch.setattr(research_router, "_yield_report_prompt", broken_prompt)
+
+    body = {"twitter_data": [{"text": "stake SOL", "created_at": ""}], "analysis_instructions": "x", "provider": "openai"}
+    with client.stream("POST", "/api/research/yield/report/stream", json=body) as r:
+        assert r.status_code == 200
+        (event, data), = _events(r.read().decode())
+    assert event == "done" and data["ok"] is False and data["source"] == "error"
+    assert data["report_content"] == "" and data["error"] == "bad tweet data"
@@ -0,0 +1,28 @@
+import random
+from Backend.services import tweet_dedup
+from Backend.services.tweet_dedup import dedupe_tweets
+
+SHILL = "New SOL staking vault with 9% APY on Jupiter, deposit now before the cap fills up https://x.co/a"
+
+def test_near_identical_tweets_collapse_with_weight():
+    tweets = [{"id": "1", "text": SHILL},
+              {"id": "2", "text": "RT @bot: new sol staking vault with 9% apy on jupiter, deposit now before the cap fills up!! https://x.co/b"},
+              {"id": "3", "text": "New SOL staking vault with 12% APY on Jupiter, deposit now before the cap fills up @alice", "dup_count": 3},
+              {"id": "4", "text": "Orca pool rewards dropped to 4% today, moving liquidity elsewhere"},
+              {"id": "5", "text": "New ORCA farming pool with 20% APR launched, deposit before the rewards end"}]
+    kept, dropped = dedupe_tweets(tweets)
+    assert dropped == 2
+    assert [(t["id"], t["dup_count"]) for t in kept] == [("1", 5), ("4", 1), ("5", 1)]
+
+def test_thousands_of_tweets_compare_only_bucket_candidates(monkeypatch):
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(3000)]
+    tweets = [{"text": " ".join(rng.choices(words, k=20))} for _ in range(3000)]
+    tweets += [{"text": f"{SHILL} {i}"} for i in range(2000)]
+    compared = []
+    jaccard = tweet_dedup.jaccard
+    monkeypatch.setattr(tweet_dedup, "jaccard", lambda a, b: compared.append(1) or jaccard(a, b))
+    kept, dropped = dedupe_tweets(tweets)
+    assert dropped == 1999 and len(kept) == 3001
+    # Pairwise would be ~12.5M comparisons; each shill copy is confirmed against its first candidate
+    assert len(compared) < 2 * len(tweets)
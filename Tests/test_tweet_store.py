@@ -0,0 +1,64 @@
+import asyncio, datetime, time
+from types import SimpleNamespace
+from Backend.services import twitter_x
+from Backend.services.tweet_store import TweetStore
+
+def _created(minutes_ago: float) -> str:
+    return datetime.datetime.utcfromtimestamp(time.time() - minutes_ago * 60).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def _setup(tmp_path, monkeypatch, pages):
+    calls = []
+    async def get(url, params=None, timeout=None):
+        calls.append(dict(params))
+        data = pages.pop(0)
+        return SimpleNamespace(status_code=200, json=lambda: data, headers={}, text="")
+    store = TweetStore(tmp_path / "tweets.sqlite3")
+    monkeypatch.setattr(twitter_x, "get_async_http_client", lambda *a: SimpleNamespace(get=get))
+    monkeypatch.setattr(twitter_x, "get_tweet_store", lambda prov: store)
+    cfg = {"providers": {"twitter": {"enabled": True, "query": "SOL", "max_results": 10, "lookback_minutes": 60,
+                                     "store": {"enabled": True, "min_poll_seconds": 0}}},
+           "env": {"X_BEARER_TOKEN": "token"}}
+    return cfg, calls, store
+
+def test_first_fetch_follows_next_token_and_poll_uses_since_id(tmp_path, monkeypatch):
+    pages = [{"data": [{"id": "30", "text": "c", "created_at": _created(5)}], "meta": {"next_token": "p2"}},
+             {"data": [{"id": "20", "text": "b", "created_at": _created(20)}], "meta": {}},
+             {"data": [{"id": "40", "text": "d", "created_at": _created(1)}], "meta": {}}]
+    cfg, calls, store = _setup(tmp_path, monkeypatch, pages)
+
+    tweets, error = asyncio.run(twitter_x.arecent_search(cfg))
+    assert error == "" and [t["id"] for t in tweets] == ["30", "20"]
+    assert "start_time" in calls[0] and calls[1]["next_token"] == "p2"
+
+    tweets, error = asyncio.run(twitter_x.arecent_search(cfg))
+    assert [t["id"] for t in tweets] == ["40", "30", "20"]
+    assert calls[2]["since_id"] == "30" and "start_time" not in calls[2]
+    assert store.state("SOL")["newest_id"] == "40"
+
+def test_longer_window_backfills_only_the_gap(tmp_path, monkeypatch):
+    pages = [{"data": [{"id": "30", "text": "c", "created_at": _created(5)}], "meta": {}},
+             {"meta": {"result_count": 0}},
+             {"data": [{"id": "10", "text": "a", "created_at": _created(100)}], "meta": {}}]
+    cfg, calls, store = _setup(tmp_path, monkeypatch, pages)
+    asyncio.run(twitter_x.arecent_search(cfg))
+
+    cfg["providers"]["twitter"]["lookback_minutes"] = 180
+    tweets, error = asyncio.run(twitter_x.arecent_search(cfg))
+    assert [t["id"] for t in tweets] == ["30", "10"]
+    assert calls[1]["since_id"] == "30"
+    assert "end_time" in calls[2] and calls[2]["start_time"] < calls[2]["end_time"]
+
+def test_api_error_serves_stored_window(tmp_path, monkeypatch):
+    cfg, calls, store = _setup(tmp_path, monkeypatch, [])
+    store.add("SOL", [{"id": "5", "text": "x", "created_at": _created(2)}], "5", time.time() - 7200)
+    cfg["env"] = {}
+    tweets, error = asyncio.run(twitter_x.arecent_search(cfg))
+    assert error == "" and [t["id"] for t in tweets] == ["5"] and calls == []
+
+def test_max_pages_stops_without_an_extra_request(tmp_path, monkeypatch):
+    pages = [{"data": [{"id": str(50 - i), "text": f"t{i}", "created_at": _created(i + 1)}], "meta": {"next_token": f"p{i + 2}"}}
+             for i in range(3)]
+    cfg, calls, store = _setup(tmp_path, monkeypatch, pages)
+    cfg["providers"]["twitter"]["store"]["max_pages"] = 2
+    tweets, complete, error = asyncio.run(twitter_x._fetch(cfg, {"query": "SOL"}, 2))
+    assert len(calls) == 2 and len(tweets) == 2 and complete is False and error is None